@@ -1,20 +1,24 @@
 import logging
-import time
 import pandas as pd
 from config.logging import setup_logging
 from services.redis_manager import redis_manager
+from services.redis_metrics import redis_metrics
+from services.latency_tracer import latency_tracer
+from utils.clock import clock
 
 def run(ticker):
     setup_logging(file_name=f'{ticker}/candlestick_process_worker.log')
+    redis_metrics.set_source('candlestick_process_worker', ticker)
 
     while True:
         try:
             candlestick_data = redis_manager.pop_candlestick(ticker)
             if not candlestick_data:
-                time.sleep(0.1)
+                clock.sleep(0.1)
                 continue
             
             df = pd.DataFrame(candlestick_data)
+            recv_ts = df['recv_ts'].min() if 'recv_ts' in df.columns else None
             agg_df = df.groupby('timestamp').agg(
                 open=('open', 'last'),
                 high=('high', 'last'),
@@ -25,7 +29,7 @@ def run(ticker):
             )
             
             if agg_df.empty:
-                time.sleep(0.1)
+                clock.sleep(0.1)
                 continue
 
             for _, row in agg_df.iterrows():
@@ -37,9 +41,14 @@ def run(ticker):
                     'close': row['close'],
                     'volume': row['volume']
                 })
+                redis_manager.record_candle_activity(ticker, row['timestamp'], float(row['volume']))
                 logging.info(f"Candlestick processed: {row['timestamp']} {row['open']} {row['high']} {row['low']} {row['close']} {row['volume']}")
+
+            if recv_ts:
+                latency_tracer.record_since('candle', recv_ts)
+                redis_manager.set_trace_timestamp(ticker, 'candle', recv_ts)
                 
         except Exception as e:
             logging.error(f"Error in aggregate worker: {e}", exc_info=True)
         
-        time.sleep(0.1)
\ No newline at end of file
+        clock.sleep(0.1)
\ No newline at end of file
@@ -23,6 +23,7 @@ import CandlestickChart from '@/components/CandlestickChart';
 import StockDescription from '@/components/StockDescription';
 import { Stock } from '@/types';
 import { getIndicatorColor, formatNumber, formatLargeNumber, checkAllGreen, getGreenIndicatorCount, humanReadableDateTime } from '@/utils/helpers';
+import { decodeFrame } from '@/utils/msgpack';
 
 export default function MomentumTrading() {
   const { user } = useAuth();
@@ -221,25 +222,28 @@ export default function MomentumTrading() {
         });
       };
 
-      const handleIndicatorsUpdate = (data: any) => {
+      const handleIndicatorsUpdate = (frame: any) => {
+        // Compact frames only carry the indicators that changed since the last keyframe
+        const data = decodeFrame(frame);
         console.log('Received technical analysis update:', data);
         setStocks(prevStocks => {
           const newStocks = { ...prevStocks };
           newStocks[data.ticker] = {
             ...newStocks[data.ticker],
-            indicators: data.indicators
+            indicators: data.keyframe === false ? { ...newStocks[data.ticker]?.indicators, ...data.indicators } : data.indicators
           };
           return newStocks;
         });
       };
 
-      const handleScoresUpdate = (data: any) => {
+      const handleScoresUpdate = (frame: any) => {
+        const data = decodeFrame(frame);
         console.log('Received technical analysis update:', data);
         setStocks(prevStocks => {
           const newStocks = { ...prevStocks };
           newStocks[data.ticker] = {
             ...newStocks[data.ticker],
-            scores: data.scores
+            scores: data.keyframe === false ? { ...newStocks[data.ticker]?.scores, ...data.scores } : data.scores
           };
           return newStocks;
         });
@@ -269,17 +273,19 @@ export default function MomentumTrading() {
         });
       };
 
-      const handleCandleUpdate = (data: {
-        ticker: string;
-        candle: {
-          open: number;
-          close: number;
-          high: number;
-          low: number;
-          volume: number;
-          timestamp: string;
-        };
-      }) => {
+      const handleCandleUpdate = (frame: any) => {
+        // Updates of a bar already sent may only carry its changed prices
+        const data: {
+          ticker: string;
+          candle: {
+            open: number;
+            close: number;
+            high: number;
+            low: number;
+            volume: number;
+            timestamp: string;
+          };
+        } = decodeFrame(frame);
         console.log('Received candle update:', data);
         setStocks(prevStocks => {
           const newStocks = { ...prevStocks };
@@ -291,11 +297,7 @@ export default function MomentumTrading() {
                   if (candle.timestamp === data.candle.timestamp) {
                     return {
                       ...candle,
-                      close: data.candle.close,
-                      open: data.candle.open,
-                      high: data.candle.high,
-                      low: data.candle.low,
-                      volume: data.candle.volume
+                      ...data.candle
                     };
                   }
                   return candle;
@@ -377,6 +379,22 @@ export default function MomentumTrading() {
         });
       };
 
+      const handlePrevClosePricesUpdate = (data: any) => {
+        console.log('Received prev close prices update:', Object.keys(data.prices).length);
+        setStocks(prevStocks => {
+          const newStocks = { ...prevStocks };
+          Object.entries(data.prices).forEach(([ticker, prevClosePrice]) => {
+            if (newStocks[ticker]) {
+              newStocks[ticker] = {
+                ...newStocks[ticker],
+                prev_close_price: prevClosePrice as number
+              };
+            }
+          });
+          return newStocks;
+        });
+      };
+
       const handleUnsubscribe = (data: any) => {
         console.log('Received unsubscribe:', data);
         setStocks(prevStocks => {
@@ -410,6 +428,7 @@ export default function MomentumTrading() {
       socket.on('coaching_narrative', handleCoachingNarrativeUpdate);
       socket.on('strategy', handleStrategyUpdate);
       socket.on('prev_close_price', handlePrevClosePriceUpdate);
+      socket.on('prev_close_prices', handlePrevClosePricesUpdate);
       socket.on('unsubscribe', handleUnsubscribe);
       socket.on('orderbook', handleOrderbook)
 
@@ -427,11 +446,24 @@ export default function MomentumTrading() {
         socket.off('coaching_narrative', handleCoachingNarrativeUpdate);
         socket.off('strategy', handleStrategyUpdate);
         socket.off('prev_close_price', handlePrevClosePriceUpdate);
+        socket.off('prev_close_prices', handlePrevClosePricesUpdate);
         socket.off('unsubscribe', handleUnsubscribe);
       };
     }
   }, [socket]);
 
+  useEffect(() => {
+    if (socket) {
+      // Table events for every ticker; candles, order book and narrative only for the expanded charts
+      const watch = () => socket.emit('watch', { all: true, tickers: selectedTickers, protocol: 'compact' });
+      watch();
+      socket.on('connect', watch);
+      return () => {
+        socket.off('connect', watch);
+      };
+    }
+  }, [socket, selectedTickers]);
+
   useEffect(() => {
     fetch(`${process.env.NEXT_PUBLIC_API_URL}/get_market_context`)
       .then(response => response.json())
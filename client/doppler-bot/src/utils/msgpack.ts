@@ -0,0 +1,79 @@
+// Minimal MessagePack decoder for the compact websocket protocol (nil, bool, int, float, str, bin, array, map)
+export const decodeMsgpack = (buffer: ArrayBuffer | Uint8Array): any => {
+    const bytes = buffer instanceof Uint8Array ? buffer : new Uint8Array(buffer);
+    const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    const textDecoder = new TextDecoder();
+    let offset = 0;
+
+    const str = (length: number) => {
+        const value = textDecoder.decode(bytes.subarray(offset, offset + length));
+        offset += length;
+        return value;
+    };
+    const bin = (length: number) => {
+        const value = bytes.slice(offset, offset + length);
+        offset += length;
+        return value;
+    };
+    const array = (length: number): any[] => {
+        const value = [];
+        for (let i = 0; i < length; i++) value.push(read());
+        return value;
+    };
+    const map = (length: number): { [key: string]: any } => {
+        const value: { [key: string]: any } = {};
+        for (let i = 0; i < length; i++) {
+            const key = read();
+            value[key] = read();
+        }
+        return value;
+    };
+
+    const read = (): any => {
+        const type = bytes[offset++];
+        if (type <= 0x7f) return type;
+        if (type <= 0x8f) return map(type & 0x0f);
+        if (type <= 0x9f) return array(type & 0x0f);
+        if (type <= 0xbf) return str(type & 0x1f);
+        if (type >= 0xe0) return type - 0x100;
+
+        let value: any;
+        switch (type) {
+            case 0xc0: return null;
+            case 0xc2: return false;
+            case 0xc3: return true;
+            case 0xca: value = view.getFloat32(offset); offset += 4; return value;
+            case 0xcb: value = view.getFloat64(offset); offset += 8; return value;
+            case 0xcc: value = view.getUint8(offset); offset += 1; return value;
+            case 0xcd: value = view.getUint16(offset); offset += 2; return value;
+            case 0xce: value = view.getUint32(offset); offset += 4; return value;
+            case 0xcf: value = Number(view.getBigUint64(offset)); offset += 8; return value;
+            case 0xd0: value = view.getInt8(offset); offset += 1; return value;
+            case 0xd1: value = view.getInt16(offset); offset += 2; return value;
+            case 0xd2: value = view.getInt32(offset); offset += 4; return value;
+            case 0xd3: value = Number(view.getBigInt64(offset)); offset += 8; return value;
+            default: break;
+        }
+
+        // Length-prefixed str, bin, array and map
+        const lengths: { [type: number]: number } = {
+            0xd9: 1, 0xda: 2, 0xdb: 4, 0xc4: 1, 0xc5: 2, 0xc6: 4, 0xdc: 2, 0xdd: 4, 0xde: 2, 0xdf: 4,
+        };
+        const size = lengths[type];
+        if (size === undefined) throw new Error(`Unsupported msgpack type 0x${type.toString(16)}`);
+        const length = size === 1 ? view.getUint8(offset) : size === 2 ? view.getUint16(offset) : view.getUint32(offset);
+        offset += size;
+        if (type === 0xd9 || type === 0xda || type === 0xdb) return str(length);
+        if (type === 0xc4 || type === 0xc5 || type === 0xc6) return bin(length);
+        if (type === 0xdc || type === 0xdd) return array(length);
+        return map(length);
+    };
+
+    return read();
+};
+
+// Socket payloads of the compact protocol arrive as binary; other events stay JSON
+export const decodeFrame = (data: any): any => {
+    if (data instanceof ArrayBuffer || data instanceof Uint8Array) return decodeMsgpack(data);
+    return data;
+};
@@ -21,9 +21,26 @@ class ProductionConfig:
     # Moomoo settings
     MOOMOO_HOST = '69.197.187.190'
     MOOMOO_PORT1 = 8080
+
+    # Subscription capacity: OpenD quote subscription quota, host process/CPU budget and repeat request debounce
+    MOOMOO_SUBSCRIPTION_QUOTA = int(os.getenv('MOOMOO_SUBSCRIPTION_QUOTA', 300))
+    MAX_SUBSCRIBED_TICKERS = int(os.getenv('MAX_SUBSCRIBED_TICKERS', 40))
+    SUBSCRIPTION_CPU_BUDGET = float(os.getenv('SUBSCRIPTION_CPU_BUDGET', 85))
+    SUBSCRIBE_DEBOUNCE_SECONDS = float(os.getenv('SUBSCRIBE_DEBOUNCE_SECONDS', 60))
+    WARM_WORKER_POOL_SIZE = int(os.getenv('WARM_WORKER_POOL_SIZE', 2))
+
+    # Ingest queue caps (tick: newest ticks kept, orderbook: newest books kept) and consumer lag alert threshold
+    INGEST_TICK_CAP = int(os.getenv('INGEST_TICK_CAP', 5000))
+    INGEST_ORDERBOOK_CAP = int(os.getenv('INGEST_ORDERBOOK_CAP', 2))
+    INGEST_MAX_AGE_SECONDS = float(os.getenv('INGEST_MAX_AGE_SECONDS', 5))
+
+    # Seconds between full frames of a delta-encoded websocket stream (compact protocol clients)
+    SOCKET_KEYFRAME_SECONDS = float(os.getenv('SOCKET_KEYFRAME_SECONDS', 10))
     
     # Polygon API settings
     POLYGON_API_KEY = os.getenv('POLYGON_API_KEY')
+    POLYGON_RATE_LIMIT = float(os.getenv('POLYGON_RATE_LIMIT', 50))  # REST requests per second across processes
+    POLYGON_RATE_BURST = int(os.getenv('POLYGON_RATE_BURST', 100))
     
     # Database settings
     MYSQL_HOST = os.getenv('MYSQL_HOST', 'localhost')
@@ -33,11 +50,36 @@ class ProductionConfig:
     
     # Redis settings (for SocketIO)
     REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
+    # Redis command accounting (switchable at runtime via redis_metrics:enabled)
+    REDIS_METRICS_ENABLED = os.getenv('REDIS_METRICS_ENABLED', 'false').lower() == 'true'
+    REDIS_METRICS_EXPORT_INTERVAL = float(os.getenv('REDIS_METRICS_EXPORT_INTERVAL', 10))
+
+    # Market data recorder (disabled when unset), read back by simulation_master --mode replay
+    MARKET_RECORD_DIR = os.getenv('MARKET_RECORD_DIR')
+
+    # Per ticker-day 1-minute candle archive used to shorten subscription backfills (disabled when empty)
+    CANDLE_ARCHIVE_DIR = os.getenv('CANDLE_ARCHIVE_DIR', 'data/candles')
+
+    # Market context sources (point the URL at a local stand-in for testing) and their shared request budget
+    FINNHUB_API_URL = os.getenv('FINNHUB_API_URL', 'https://api.finnhub.io/api/v1')
+    FINNHUB_API_KEY = os.getenv('FINNHUB_API_KEY', 'cu9nrnhr01qnf5nnh5o0cu9nrnhr01qnf5nnh5og')
+    MARKET_CONTEXT_RATE = float(os.getenv('MARKET_CONTEXT_RATE', 1))  # requests per second
+    MARKET_CONTEXT_BURST = int(os.getenv('MARKET_CONTEXT_BURST', 4))
+    MARKET_CONTEXT_WORKERS = int(os.getenv('MARKET_CONTEXT_WORKERS', 8))
+
+    # Clock driving workers and services: wall, scaled (CLOCK_SPEED x from CLOCK_START), replay or manual
+    CLOCK_MODE = os.getenv('CLOCK_MODE', 'wall')
+    CLOCK_SPEED = float(os.getenv('CLOCK_SPEED', 1))
+    CLOCK_START = os.getenv('CLOCK_START')
     
     # Security settings
     SESSION_COOKIE_SECURE = True
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
+
+    # Seconds a verified token's user and approved account are served from Redis instead of MySQL
+    AUTH_CACHE_TTL_SECONDS = int(os.getenv('AUTH_CACHE_TTL_SECONDS', 300))
     
     # Rate limiting
     RATELIMIT_ENABLED = True
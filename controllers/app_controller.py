@@ -3,7 +3,11 @@ from flask import jsonify
 from flask import request
 import time
 from services.redis_manager import redis_manager
-from utils.auth_decorators import require_auth
+from services.latency_tracer import latency_tracer
+from services.rate_limiter import rate_limiter
+from services.subscription_manager import subscription_manager
+from services.ingest_queues import ingest_queues
+from utils.auth_decorators import require_auth, require_admin
 from services.moomoo_account import moomoo_accounts
 from services.moomoo_account_service import moomoo_account_service
 from core.db import get_db, MoomooAccount
@@ -37,14 +41,63 @@ def register_app_routes(app):
 
     @app.route('/api/get_stock_data')
     def get_stock_data():
-        stocks_data = []
-        tickers = redis_manager.get_all_tickers()
+        # Rows are materialized by the indicator and detection workers, price, volume, prev close and
+        # strategy writes are folded in here at most once per second; since=<version> returns only changes
+        redis_manager.refresh_dirty_dashboard_rows()
+        since = request.args.get('since', type=int)
+        if since is not None:
+            delta = redis_manager.get_dashboard_delta(since)
+            if delta and since <= delta[0]:
+                version, rows, removed = delta
+                response = jsonify({'version': version, 'rows': rows, 'removed': removed})
+                response.headers['X-Dashboard-Version'] = str(version)
+                return response
 
-        for ticker in tickers:
-            ticker_stocks_data = redis_manager.get_stock_data(ticker)
-            stocks_data.append(ticker_stocks_data)
+        version, rows = redis_manager.get_dashboard_rows()
+        etag = f'"dashboard-{version}"'
+        if etag in request.headers.get('If-None-Match', ''):
+            return '', 304, {'ETag': etag}
+        response = jsonify(rows)
+        response.headers['ETag'] = etag
+        response.headers['X-Dashboard-Version'] = str(version)
+        return response
 
-        return jsonify(stocks_data)
+    @app.route('/api/admin/redis_metrics', methods=['GET'])
+    @require_admin
+    def get_redis_metrics():
+        return jsonify(redis_manager.get_redis_metrics())
+
+    @app.route('/api/admin/redis_metrics/toggle', methods=['POST'])
+    @require_admin
+    def toggle_redis_metrics():
+        enabled = bool(request.json['enabled'])
+        result = redis_manager.set_redis_metrics_enabled(enabled)
+        return jsonify({'success': result, 'enabled': enabled})
+
+    @app.route('/api/admin/latency_stats', methods=['GET'])
+    @require_admin
+    def get_latency_stats():
+        return jsonify(latency_tracer.get_stats())
+
+    @app.route('/api/admin/latency_stats/reset', methods=['POST'])
+    @require_admin
+    def reset_latency_stats():
+        return jsonify({'success': redis_manager.reset_latency_histograms()})
+
+    @app.route('/api/admin/subscriptions', methods=['GET'])
+    @require_admin
+    def get_subscriptions():
+        return jsonify(subscription_manager.get_status())
+
+    @app.route('/api/admin/rate_limits', methods=['GET'])
+    @require_admin
+    def get_rate_limits():
+        return jsonify(rate_limiter.get_metrics())
+
+    @app.route('/api/admin/ingest_queues', methods=['GET'])
+    @require_admin
+    def get_ingest_queues():
+        return jsonify(ingest_queues.get_metrics())
 
     @app.route('/api/get_candles')
     def get_candles():
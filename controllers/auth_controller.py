@@ -211,6 +211,7 @@ def register_auth_routes(app):
                     setattr(user, k, v)
                 user.updatedAt = datetime.utcnow()
                 db.commit()
+                auth_service.invalidate_user(user_id)
                 # Get updated user
                 user_data = auth_service.get_user_by_id(user_id)
                 return jsonify({
@@ -1,11 +1,48 @@
 import logging
+from flask_socketio import join_room, leave_room, rooms
+from services.socket_emitter import ALL_ROOM, COMPACT_PREFIX, all_room, socket_emitter, ticker_room, msgpack
+
+def _is_watch_room(room: str) -> bool:
+    room = room[len(COMPACT_PREFIX):] if room.startswith(COMPACT_PREFIX) else room
+    return room == ALL_ROOM or room.startswith('ticker:')
 
 def register_websocket_handlers(socketio):
     """Register all WebSocket event handlers"""
-    
+
     @socketio.on('connect')
     def handle_connect():
         """Handle client connection"""
         logging.info('Client connected with server')
 
+    @socketio.on('watch')
+    def handle_watch(data):
+        """Set the rooms of a client: 'all' for the candidate table, one per ticker whose details it views.
+        With protocol 'compact' indicators, scores and candles arrive as msgpack encoded field deltas."""
+        data = data or {}
+        compact = data.get('protocol') == 'compact'
+        tickers = list(data.get('tickers') or [])
+        watched = {ticker_room(ticker, compact) for ticker in tickers}
+        if data.get('all'):
+            watched.add(all_room(compact))
+        joined = [room for room in watched if room not in rooms()]
+        for room in rooms():
+            if _is_watch_room(room) and room not in watched:
+                leave_room(room)
+        for room in joined:
+            join_room(room)
+        if compact and joined:
+            # Joining clients have no base to apply deltas to
+            socket_emitter.request_keyframes(None if all_room(compact) in joined else [ticker for ticker in tickers if ticker_room(ticker, compact) in joined])
+        return {
+            'protocol': 'compact' if compact else 'json',
+            'encoding': 'msgpack' if compact and msgpack else 'json',
+        }
+
+    @socketio.on('unwatch')
+    def handle_unwatch():
+        """Leave the summary and all ticker rooms"""
+        for room in rooms():
+            if _is_watch_room(room):
+                leave_room(room)
+
     return socketio
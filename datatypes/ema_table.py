@@ -0,0 +1,105 @@
+import threading
+from typing import Dict, List
+import numpy as np
+from datatypes.snapshot_table import SnapshotTable, BAR_RING_SIZE
+
+EMA_WINDOWS = (5, 240)
+
+# Number of EMA values kept per ticker and window, oldest first
+EMA_HISTORY = 10
+
+def ema_series(closes: np.ndarray, window: int) -> np.ndarray:
+    """EMA of a close series seeded with the first close"""
+    alpha = 2 / (window + 1)
+    values = np.empty(len(closes))
+    value = closes[0]
+    for index, close in enumerate(closes.tolist()):
+        value = alpha * close + (1 - alpha) * value
+        values[index] = value
+    return values
+
+class EmaTable:
+    """Per-ticker minute EMAs seeded from history and rolled forward from snapshot minute bars"""
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.last_bar_ts = np.empty(0)
+        self.values = {window: np.empty((0, EMA_HISTORY)) for window in EMA_WINDOWS}
+        self.lock = threading.Lock()
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.index
+
+    def seed(self, ticker: str, timestamps: np.ndarray, closes: np.ndarray) -> bool:
+        """Start a ticker from closed minute bars (bar end epoch seconds, oldest first)"""
+        if len(closes) == 0:
+            return False
+        history = {}
+        for window in EMA_WINDOWS:
+            series = ema_series(closes, window)[-EMA_HISTORY:]
+            history[window] = np.concatenate((np.full(EMA_HISTORY - len(series), np.nan), series))
+        with self.lock:
+            row = self.index.get(ticker)
+            if row is None:
+                row = len(self.index)
+                self.index[ticker] = row
+                self.last_bar_ts = np.append(self.last_bar_ts, 0.0)
+                for window in EMA_WINDOWS:
+                    self.values[window] = np.vstack((self.values[window], np.empty((1, EMA_HISTORY))))
+            self.last_bar_ts[row] = timestamps[-1]
+            for window in EMA_WINDOWS:
+                self.values[window][row] = history[window]
+        return True
+
+    def _align(self, snapshot: SnapshotTable):
+        """Own rows and snapshot rows of the seeded tickers present in the snapshot"""
+        own_rows = np.array(list(self.index.values()), dtype=np.int64)
+        snapshot_rows = np.array([snapshot.index.get(ticker, -1) for ticker in self.index], dtype=np.int64)
+        known = snapshot_rows >= 0
+        return own_rows[known], snapshot_rows[known]
+
+    def update(self, snapshot: SnapshotTable):
+        """Apply every closed minute bar in the snapshot ring that is newer than the last applied bar"""
+        with self.lock:
+            if not self.index:
+                return
+            own_rows, snapshot_rows = self._align(snapshot)
+            bar_ts = snapshot.bar_ts[snapshot_rows]
+            bar_close = snapshot.bar_close[snapshot_rows]
+            # The last ring slot is the minute still in progress
+            for slot in range(BAR_RING_SIZE - 1):
+                closed = bar_ts[:, slot] > self.last_bar_ts[own_rows]
+                if not closed.any():
+                    continue
+                rows = own_rows[closed]
+                for window in EMA_WINDOWS:
+                    alpha = 2 / (window + 1)
+                    values = self.values[window]
+                    latest = alpha * bar_close[closed, slot] + (1 - alpha) * values[rows, -1]
+                    values[rows, :-1] = values[rows, 1:]
+                    values[rows, -1] = latest
+                self.last_bar_ts[rows] = bar_ts[closed, slot]
+
+    def crossovers(self, snapshot: SnapshotTable, tickers: List[str], now: float, max_age: float = 600) -> np.ndarray:
+        """Snapshot row mask of tickers whose EMA5 rose through EMA240 over the last EMA_HISTORY minutes"""
+        selected = np.zeros(len(snapshot), dtype=bool)
+        with self.lock:
+            wanted = [ticker for ticker in tickers if ticker in self.index and ticker in snapshot.index]
+            if not wanted:
+                return selected
+            own_rows = np.array([self.index[ticker] for ticker in wanted], dtype=np.int64)
+            snapshot_rows = snapshot.rows(wanted)
+            live_close = snapshot.min_close[snapshot_rows]
+            series = {}
+            for window in EMA_WINDOWS:
+                # Like the Polygon indicator endpoint, the newest value includes the minute in progress
+                alpha = 2 / (window + 1)
+                closed = self.values[window][own_rows]
+                live = alpha * live_close + (1 - alpha) * closed[:, -1]
+                series[window] = np.concatenate((closed[:, 1:], live[:, None]), axis=1)
+
+        ema5, ema240 = series[5], series[240]
+        fresh = (now - snapshot.min_ts[snapshot_rows] <= max_age) & ~np.isnan(ema5[:, 0]) & ~np.isnan(ema240[:, 0])
+        crossed = fresh & (ema5[:, 0] < ema5[:, -1]) & (ema5[:, 0] < ema240[:, 0]) & (ema5[:, -1] >= ema240[:, -1])
+        selected[snapshot_rows[crossed]] = True
+        return selected
@@ -0,0 +1,112 @@
+from typing import Dict, List, Optional
+import numpy as np
+from polygon.rest.models import (
+    TickerSnapshot,
+    Agg,
+    MinuteSnapshot,
+    LastQuote,
+    LastTrade
+)
+from utils.util import get_moomoo_ticker
+
+# Number of minute bars kept per ticker
+BAR_RING_SIZE = 10
+
+# Scalar columns, one float64 array each; timestamps are epoch seconds
+COLUMNS = [
+    'min_open', 'min_high', 'min_low', 'min_close', 'min_volume', 'min_vwap', 'accumulated_volume', 'min_ts',
+    'day_open', 'day_high', 'day_low', 'day_close', 'day_volume', 'day_vwap',
+    'prev_open', 'prev_high', 'prev_low', 'prev_close', 'prev_volume', 'prev_vwap',
+    'bid_price', 'bid_size', 'ask_price', 'ask_size',
+    'last_price', 'last_size', 'last_trade_ts',
+]
+
+# Ring columns, (tickers x BAR_RING_SIZE) float64 arrays, oldest bar first
+BAR_COLUMNS = ['bar_ts', 'bar_close', 'bar_volume']
+
+def _is_complete(item) -> bool:
+    return (
+        isinstance(item, TickerSnapshot) and isinstance(item.min, MinuteSnapshot) and isinstance(item.day, Agg) and
+        isinstance(item.prev_day, Agg) and isinstance(item.last_quote, LastQuote) and isinstance(item.last_trade, LastTrade) and
+        len(item.ticker) <= 4
+    )
+
+def _row(item) -> tuple:
+    return (
+        item.min.open, item.min.high, item.min.low, item.min.close, item.min.volume, item.min.vwap,
+        item.min.accumulated_volume, item.min.timestamp,
+        item.day.open, item.day.high, item.day.low, item.day.close, item.day.volume, item.day.vwap,
+        item.prev_day.open, item.prev_day.high, item.prev_day.low, item.prev_day.close, item.prev_day.volume, item.prev_day.vwap,
+        item.last_quote.bid_price, item.last_quote.bid_size, item.last_quote.ask_price, item.last_quote.ask_size,
+        item.last_trade.price, item.last_trade.size, item.last_trade.sip_timestamp,
+    )
+
+class SnapshotTable:
+    """Immutable columnar view of the full-market Polygon snapshot, one row per ticker"""
+
+    def __init__(self, tickers: np.ndarray, columns: Dict[str, np.ndarray], bars: Dict[str, np.ndarray], version: int = 0):
+        self.tickers = tickers
+        self.columns = columns
+        self.bars = bars
+        self.version = version
+        self.index = {ticker: row for row, ticker in enumerate(tickers.tolist())}
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def __getattr__(self, name):
+        columns = self.__dict__.get('columns', {})
+        if name in columns:
+            return columns[name]
+        bars = self.__dict__.get('bars', {})
+        if name in bars:
+            return bars[name]
+        raise AttributeError(name)
+
+    @classmethod
+    def empty(cls) -> 'SnapshotTable':
+        return cls(
+            np.array([], dtype=object),
+            {name: np.array([], dtype=np.float64) for name in COLUMNS},
+            {name: np.empty((0, BAR_RING_SIZE), dtype=np.float64) for name in BAR_COLUMNS},
+        )
+
+    @classmethod
+    def from_snapshot(cls, snapshot, previous: Optional['SnapshotTable'] = None) -> 'SnapshotTable':
+        """Build the next table from a get_snapshot_all response, carrying minute bars over from previous"""
+        items = [item for item in snapshot if _is_complete(item)]
+        tickers = np.array([get_moomoo_ticker(item.ticker) for item in items], dtype=object)
+        values = np.array([_row(item) for item in items], dtype=np.float64).reshape(len(items), len(COLUMNS))
+        columns = {name: values[:, i] for i, name in enumerate(COLUMNS)}
+        # Polygon minute bars are stamped at their start; moomoo and the candles use the bar end
+        columns['min_ts'] = columns['min_ts'] / 1000 + 60
+        columns['last_trade_ts'] = columns['last_trade_ts'] / 1e9
+
+        bars = {name: np.full((len(items), BAR_RING_SIZE), np.nan) for name in BAR_COLUMNS}
+        if previous is not None and len(previous):
+            previous_rows = np.array([previous.index.get(ticker, -1) for ticker in tickers.tolist()], dtype=np.int64)
+            known = previous_rows >= 0
+            for name in BAR_COLUMNS:
+                bars[name][known] = previous.bars[name][previous_rows[known]]
+            # A new minute shifts the ring left; an update of the current minute overwrites the last slot
+            new_minute = known & (bars['bar_ts'][:, -1] != columns['min_ts'])
+            for name in BAR_COLUMNS:
+                bars[name][new_minute, :-1] = bars[name][new_minute, 1:]
+        bars['bar_ts'][:, -1] = columns['min_ts']
+        bars['bar_close'][:, -1] = columns['min_close']
+        bars['bar_volume'][:, -1] = columns['min_volume']
+
+        version = previous.version + 1 if previous is not None else 1
+        return cls(tickers, columns, bars, version)
+
+    def rows(self, tickers: List[str]) -> np.ndarray:
+        """Row indices of the given tickers that are present in the table"""
+        return np.array([self.index[ticker] for ticker in tickers if ticker in self.index], dtype=np.int64)
+
+    def rank(self, mask: np.ndarray, key: np.ndarray, limit: Optional[int] = None) -> List[str]:
+        """Tickers selected by mask, sorted by key descending"""
+        selected = np.flatnonzero(mask)
+        order = selected[np.argsort(-key[selected], kind='stable')]
+        if limit is not None:
+            order = order[:limit]
+        return self.tickers[order].tolist()
@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import Dict, Optional, List
 from dataclasses import dataclass, field
+from utils.clock import clock
 
 class StrategyState:
     ANALYZING = "ANALYZING"
@@ -161,7 +162,7 @@ class Strategy:
         if not strategy.target_history and strategy.target_price > 0:
             strategy.target_history = [TargetLevel(
                 price=strategy.target_price,
-                timestamp=datetime.now().isoformat()
+                timestamp=clock.now().isoformat()
             )]
         
         return strategy
@@ -172,7 +173,7 @@ class Strategy:
             # Initialize with the current target if history is empty
             self.target_history = [TargetLevel(
                 price=self.target_price,
-                timestamp=datetime.now().isoformat()
+                timestamp=clock.now().isoformat()
             )]
             return False
             
@@ -180,13 +181,13 @@ class Strategy:
         current_target = self.target_history[self.current_target_index]
         if not current_target.achieved and new_target > current_target.price:
             current_target.achieved = True
-            current_target.achieved_at = datetime.now().isoformat()
+            current_target.achieved_at = clock.now().isoformat()
             
             # Add new target if we haven't reached the maximum
             if len(self.target_history) < self.max_targets:
                 self.target_history.append(TargetLevel(
                     price=new_target,
-                    timestamp=datetime.now().isoformat()
+                    timestamp=clock.now().isoformat()
                 ))
                 self.current_target_index = len(self.target_history) - 1
                 self.target_price = new_target
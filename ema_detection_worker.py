@@ -1,17 +1,20 @@
 import logging
-import time
 from services.redis_manager import redis_manager
+from services.redis_metrics import redis_metrics
+from services.latency_tracer import latency_tracer
 from services.technical_service import is_choppy_market
 from config.logging import setup_logging
+from utils.clock import clock
 
 def run(ticker):
     setup_logging(file_name=f'{ticker}/ema_detection_worker.log')
+    redis_metrics.set_source('ema_detection_worker', ticker)
 
     detected_timestamp = None
     while True:
         try:
-            if detected_timestamp and time.time() - detected_timestamp < 60:
-                time.sleep(1)
+            if detected_timestamp and clock.time() - detected_timestamp < 60:
+                clock.sleep(1)
                 continue
 
             price = redis_manager.get_stock_price(ticker)
@@ -20,7 +23,7 @@ def run(ticker):
             orderbook = redis_manager.get_last_orderbook_snapshot(ticker)
             if not orderbook:
                 logging.warning(f'No orderbook snapshot')
-                time.sleep(1)
+                clock.sleep(1)
                 continue
 
             # check spread
@@ -28,14 +31,14 @@ def run(ticker):
             ask_price = orderbook.get('best_ask_price', 0)
             if not bid_price >= price * 0.99 or not ask_price <= price * 1.01:
                 logging.warning(f'No 1% bid and ask price spread bid:{bid_price}, ask:{ask_price}')
-                time.sleep(1)
+                clock.sleep(1)
                 continue
 
             # check imbalance
             imbalance = orderbook.get('imbalance', 0)
             if not imbalance > 0.6:
                 logging.warning(f'No imbalance {imbalance}')
-                time.sleep(1)
+                clock.sleep(1)
                 continue
 
             # check tape is green
@@ -44,7 +47,7 @@ def run(ticker):
             sell_ticks = sum(1 for tick in tick_data[-10:] if tick['ticker_direction'] == 'SELL')
             if not buy_ticks > sell_ticks:
                 logging.warning(f'No buy tick({buy_ticks}) > sell tick({sell_ticks})')
-                time.sleep(1)
+                clock.sleep(1)
                 continue
 
             # Adaptive volume gate with tape override
@@ -52,7 +55,7 @@ def run(ticker):
             recent = candles[:-1]
             if len(recent) < 10:
                 logging.warning(f'No 10 candles {len(candles)}')
-                time.sleep(1)
+                clock.sleep(1)
                 continue
 
             avg10_vol = (sum(c['volume'] for c in recent) / len(recent)) if recent else 0
@@ -60,7 +63,7 @@ def run(ticker):
             vol_ok = candles[-1]['volume'] >= min_gate
             if not vol_ok:
                 logging.warning(f'No volume ok last volume: {candles[-1]}')
-                time.sleep(1)
+                clock.sleep(1)
                 continue
 
             VWAPs = redis_manager.get_technical_indicator(ticker, 'VWAP', 6)
@@ -73,23 +76,24 @@ def run(ticker):
                     break
             if not is_cross_up:
                 logging.warning(f'No cross up')
-                time.sleep(1)
+                clock.sleep(1)
                 continue
 
             # if is_choppy_market(ticker):
             #     logging.info(f"🟡 {ticker} detected choppy market")
-            #     time.sleep(0.25)
+            #     clock.sleep(0.25)
             #     continue
 
             logging.info(f"🟢 {ticker} detected EMA strategy")
             redis_manager.publish('trade_signal', {
                 'type': 'ema_cross_up',
-                'ticker': ticker
+                'ticker': ticker,
+                'trace': latency_tracer.new_trace(redis_manager.get_trace_timestamp(ticker, 'indicators'))
             })
-            detected_timestamp = time.time()
+            detected_timestamp = clock.time()
             continue
 
         except Exception as e:
             logging.error(f"Error in ema detection worker: {e}")
 
-        time.sleep(0.25)
+        clock.sleep(0.25)
@@ -1,10 +1,12 @@
 import logging
-import time
 from services.redis_manager import redis_manager
+from services.redis_metrics import redis_metrics
 from config.logging import setup_logging
+from utils.clock import clock
 
 def run(ticker):
     setup_logging(file_name=f'{ticker}/fire_detection_worker.log')
+    redis_metrics.set_source('fire_detection_worker', ticker)
 
     while True:
         try:
@@ -15,7 +17,7 @@ def run(ticker):
             ):
                 logging.info(f"No fire emoji status for {ticker} with technical score: {redis_manager.get_technical_scores(ticker).get('technical_score')} and volume ratio: {redis_manager.get_technical_indicator(ticker, 'Volume_Ratio', 1)} and roc: {redis_manager.get_technical_indicator(ticker, 'ROC', 1)}")
                 redis_manager.set_fire_emoji_status(ticker, False)
-                time.sleep(1)
+                clock.sleep(1)
                 continue
 
             count = 0
@@ -69,4 +71,4 @@ def run(ticker):
 
         except Exception as e:
             logging.error(f"Error in fire detection worker: {e}")
-        time.sleep(1)
+        clock.sleep(1)
@@ -1,25 +1,28 @@
 import logging
-import time
 from services.redis_manager import redis_manager
+from services.redis_metrics import redis_metrics
+from services.latency_tracer import latency_tracer
 from config.logging import setup_logging
 from utils.util import get_current_time
 from services.technical_service import is_choppy_market
+from utils.clock import clock
 
 def run(ticker):
     setup_logging(file_name=f'{ticker}/green_detection_worker.log')
+    redis_metrics.set_source('green_detection_worker', ticker)
 
     detected_timestamp = None
     while True:
         try:
-            if detected_timestamp and time.time() - detected_timestamp < 60:
-                time.sleep(1)
+            if detected_timestamp and clock.time() - detected_timestamp < 60:
+                clock.sleep(1)
                 continue
 
             # Continuous extended-hours window without 30-min gap
             hour = get_current_time().hour
             if not (4 <= hour < 20):
                 logging.info(f"{ticker} Not in trading hours")
-                time.sleep(30)
+                clock.sleep(30)
                 continue
 
             indicators = redis_manager.get_technical_indicators(ticker)
@@ -29,7 +32,7 @@ def run(ticker):
             # Chop veto using technical_service
             # if is_choppy_market(ticker):
             #     logging.info(f"{ticker} choppy market veto")
-            #     time.sleep(0.25)
+            #     clock.sleep(0.25)
             #     continue
 
             is_all_green = False
@@ -54,11 +57,12 @@ def run(ticker):
                 logging.info(f"🟢 {ticker} detected all green")
                 redis_manager.publish('trade_signal', {
                     'type': 'green',
-                    'ticker': ticker
+                    'ticker': ticker,
+                    'trace': latency_tracer.new_trace(redis_manager.get_trace_timestamp(ticker, 'indicators'))
                 })
-                detected_timestamp = time.time()
+                detected_timestamp = clock.time()
                 continue
 
         except Exception as e:
             logging.error(f"Error in green detection worker: {e}")
-        time.sleep(0.25)
+        clock.sleep(0.25)
@@ -1,5 +1,4 @@
 import os
-import time
 import logging
 import threading
 import pytz
@@ -9,19 +8,20 @@ from datetime import datetime, timedelta
 from moomoo import *
 from polygon import RESTClient
 from polygon.websocket.models import WebSocketMessage
-from polygon.rest.models import (
-    TickerSnapshot,
-    Agg,
-    MinuteSnapshot,
-    LastQuote,
-    LastTrade
-)
+import numpy as np
 from config import get_config
 from services.redis_manager import redis_manager
 from services.polygon_manager import PolygonManager
 from utils.util import get_moomoo_ticker, get_short_ticker, get_current_time, get_current_session
 from services.market_context_service import intraday_macro_analysis
+from services.market_breadth_service import compute_market_breadth
+from services.rate_limiter import rate_limiter, PRIORITY_LOW
+from services.fundamentals_service import fundamentals_service
+from services.candle_archive import candle_archive
 from config.logging import setup_logging
+from utils.clock import clock
+from datatypes.snapshot_table import SnapshotTable
+from datatypes.ema_table import EmaTable
 
 class MarketMonitor:
     def __init__(self):
@@ -30,11 +30,19 @@ class MarketMonitor:
         POLYGON_API_KEY = os.getenv('POLYGON_API_KEY')
         self.polygon_client = RESTClient(POLYGON_API_KEY)
         self.quote_ctx = OpenQuoteContext(get_config().MOOMOO_HOST, get_config().MOOMOO_PORT1)
-        self.snapshot_data = {}
+        self.snapshot = SnapshotTable.empty()
+        self.emas = EmaTable()
+        self.market_context = {}
+        self.requested_at = {}
         self.lock = threading.Lock()
 
-    def _process_gainer(self, ticker, mode):
+    def _process_gainer(self, ticker, mode, snapshot: SnapshotTable = None):
         moomoo_ticker = get_moomoo_ticker(ticker)
+        # The subscription manager debounces too; this keeps fast scanners from re-publishing every cycle
+        now = clock.time()
+        if now - self.requested_at.get(moomoo_ticker, 0) < get_config().SUBSCRIBE_DEBOUNCE_SECONDS:
+            return
+        self.requested_at[moomoo_ticker] = now
         if (
             moomoo_ticker in redis_manager.get_all_tickers()
         ):
@@ -42,48 +50,56 @@ class MarketMonitor:
 
         logging.info(f"Processing gainer: {moomoo_ticker} in {mode}")
 
+        candidates = {}
+        if snapshot is not None and moomoo_ticker in snapshot.index:
+            row = snapshot.index[moomoo_ticker]
+            last_price = float(snapshot.last_price[row])
+            prev_close = float(snapshot.prev_close[row])
+            candidates[moomoo_ticker] = {
+                'change_pct': (last_price - prev_close) / prev_close * 100 if prev_close > 0 else None,
+                'dollar_volume': float(snapshot.day_volume[row]) * last_price,
+            }
+
         redis_manager.publish('subscribe', {
             'tickers': [moomoo_ticker],
             'mode': mode,
+            'candidates': candidates,
         })
 
+    def _get_snapshot(self) -> SnapshotTable:
+        with self.lock:
+            return self.snapshot
+
     def _detect_rapid_gainer(self):
+        scanned_version = None
         while True:
             try:
-                with self.lock:
-                    snapshot_data_copy = self.snapshot_data.copy()
-
-                for moomoo_ticker in snapshot_data_copy:
-                    if snapshot_data_copy[moomoo_ticker]['min'][-1]['close'] > 15:
-                        continue
-
-                    change = 0
-                    change_pct = 0
-                    recent_time = None
-                    last_minute_data = snapshot_data_copy[moomoo_ticker]['min'][-1]
-                    current_time = get_current_time()
-                    trade_timestamp = pd.to_datetime(last_minute_data['timestamp']).tz_localize('US/Eastern')
-                    if current_time - trade_timestamp > timedelta(minutes=1):
-                        continue
-                    if last_minute_data['close'] == 0 or last_minute_data['open'] == 0:
-                        continue
-
-                    change = last_minute_data['close'] - last_minute_data['open']
-                    change_pct = (change / last_minute_data['open']) * 100
-                    recent_time = last_minute_data['timestamp']
-
-                    if change_pct > 10:
-                        logging.info(f"🟢 {moomoo_ticker} detected {change_pct}% in 1m at {recent_time}")
-                        self._process_gainer(moomoo_ticker, "rapid_gainer")
-                    elif change_pct > 5:
-                        logging.info(f"{moomoo_ticker} detected {change_pct}% in 1m at {recent_time}")
-                        self._process_gainer(moomoo_ticker, "rapid_gainer")
+                snapshot = self._get_snapshot()
+                if snapshot.version == scanned_version:
+                    clock.sleep(0.1)
+                    continue
+                scanned_version = snapshot.version
+
+                open_price = snapshot.min_open
+                close_price = snapshot.min_close
+                valid = (close_price <= 15) & (clock.time() - snapshot.min_ts <= 60) & (open_price > 0) & (close_price > 0)
+                change_pct = np.zeros(len(snapshot))
+                np.divide((close_price - open_price) * 100, open_price, out=change_pct, where=valid)
+
+                for row in np.flatnonzero(valid & (change_pct > 5)):
+                    moomoo_ticker = snapshot.tickers[row]
+                    recent_time = datetime.fromtimestamp(snapshot.min_ts[row], pytz.timezone('US/Eastern')).strftime('%Y-%m-%d %H:%M:%S')
+                    if change_pct[row] > 10:
+                        logging.info(f"🟢 {moomoo_ticker} detected {change_pct[row]}% in 1m at {recent_time}")
+                    else:
+                        logging.info(f"{moomoo_ticker} detected {change_pct[row]}% in 1m at {recent_time}")
+                    self._process_gainer(moomoo_ticker, "rapid_gainer", snapshot)
 
-                time.sleep(0.1)
+                clock.sleep(0.1)
 
             except Exception as e:
                 logging.error(f"Error in rapid gainer detection: {e}")
-                time.sleep(1)
+                clock.sleep(1)
 
     def _detect_five_minute_gainer(self):
         while True:
@@ -115,56 +131,37 @@ class MarketMonitor:
                     for gainer in gainers:
                         self._process_gainer(gainer['ticker'], 'five_minute_gainer')
 
-                time.sleep(30)
+                clock.sleep(30)
             except Exception as e:
                 logging.error(f"Error in five minute gainer detection: {e}")
-                time.sleep(30)
+                clock.sleep(30)
 
     def _detect_session_gainer(self):
         while True:
             try:
-                with self.lock:
-                    snapshot_data_copy = self.snapshot_data.copy()
-
-                current_session = get_current_session()
-                gainers = []
-
-                for ticker in snapshot_data_copy:
-                    session_change = 0
-                    session_change_pct = 0
-                    session_price = 0
-                    if current_session == 'afterhours':
-                        prev_close_price = snapshot_data_copy[ticker]['day']['close']
-                    else:
-                        prev_close_price = snapshot_data_copy[ticker]['prev_day']['close']
+                snapshot = self._get_snapshot()
+                if get_current_session() == 'afterhours':
+                    prev_close_price = snapshot.day_close
+                else:
+                    prev_close_price = snapshot.prev_close
 
-                    if prev_close_price is None or prev_close_price < 0.01:
-                        continue
+                valid = prev_close_price >= 0.01
+                session_change_pct = np.zeros(len(snapshot))
+                np.divide((snapshot.min_close - prev_close_price) * 100, prev_close_price, out=session_change_pct, where=valid)
 
-                    session_price = snapshot_data_copy[ticker]['min'][-1]['close']
-                    session_change = session_price - prev_close_price
-                    session_change_pct = (session_change / prev_close_price) * 100
-
-                    if session_change_pct > 0:
-                        gainers.append({
-                            'ticker': ticker,
-                            'price': session_price,
-                            'session_change_pct': session_change_pct
-                        })
-                
-                if len(gainers) > 0:
-                    gainers.sort(key=lambda x: x['session_change_pct'], reverse=True)
-                    for gainer in gainers[:5]:
-                        self._process_gainer(gainer['ticker'], "session_gainer")
+                for ticker in snapshot.rank(valid & (session_change_pct > 0), session_change_pct, limit=5):
+                    self._process_gainer(ticker, "session_gainer", snapshot)
 
-                time.sleep(30)
+                clock.sleep(30)
             except Exception as e:
                 logging.error(f"Error in session gainer detection: {e}")
-                time.sleep(30)
+                clock.sleep(30)
 
     def _fetch_polygon_candles(self, ticker):
         current_date = get_current_time().strftime('%Y-%m-%d')
         candles = []
+        if not rate_limiter.acquire('polygon:rest'):
+            return candles
         for a in self.polygon_client.list_aggs(
             get_short_ticker(ticker),
             1,
@@ -201,29 +198,45 @@ class MarketMonitor:
         except Exception as e:
             logging.error(f"Error handling polygon message: {e}")
 
+    def _publish_market_context(self, **fields):
+        with self.lock:
+            self.market_context.update(fields)
+            market_context = dict(self.market_context)
+        redis_manager.set_market_context(market_context)
+        return market_context
+
     def _get_market_context(self):
         while True:
             try:
-                market_context = intraday_macro_analysis()
-                redis_manager.set_market_context(market_context)
+                with self.lock:
+                    breadth = self.market_context.get('breadth')
+                market_context = intraday_macro_analysis(breadth)
+                market_context = self._publish_market_context(**market_context)
                 logging.info(f"Market context: {market_context}")
             except Exception as e:
                 logging.error(f"Error getting market context: {e}")
-            time.sleep(300)
+            clock.sleep(60)
+
+    def _market_breadth(self):
+        scanned_version = None
+        while True:
+            try:
+                snapshot = self._get_snapshot()
+                if len(snapshot) > 0 and snapshot.version != scanned_version:
+                    scanned_version = snapshot.version
+                    self._publish_market_context(breadth=compute_market_breadth(snapshot))
+            except Exception as e:
+                logging.error(f"Error in market breadth: {e}")
+            clock.sleep(5)
 
     def _unsubscribe_stocks(self):
         while True:
             try:
                 tickers_to_unsubscribe = []
-                tickers = redis_manager.get_all_tickers()
-                for ticker in tickers:
-                    candles = redis_manager.get_candles(ticker)
-                    subscribed_time = redis_manager.get_subscribed_time(ticker)
-                    candles_after_subscribed = [candle for candle in candles if candle['timestamp'] >= subscribed_time]
-                    if len(candles_after_subscribed) > 5:
-                        zero_volume_candles_count = sum(1 for candle in candles_after_subscribed if candle['volume'] == 0)
-                        if zero_volume_candles_count > 2:
-                            tickers_to_unsubscribe.append(ticker)
+                activity = redis_manager.get_activity(redis_manager.get_all_tickers())
+                for ticker, counters in activity.items():
+                    if counters['candles'] > 5 and counters['zero_volume'] > 2:
+                        tickers_to_unsubscribe.append(ticker)
 
                 if len(tickers_to_unsubscribe) > 0:
                     redis_manager.publish('unsubscribe', {
@@ -233,260 +246,147 @@ class MarketMonitor:
             except Exception as e:
                 logging.error(f"Error in unsubscribe stocks: {e}")
 
-            time.sleep(2 * 60)
+            clock.sleep(2 * 60)
+
+    def _archive_candles(self):
+        """Archive the candles of every subscribed ticker once the post-market session has ended"""
+        archived_date = None
+        while True:
+            try:
+                date = get_current_time().strftime('%Y-%m-%d')
+                if get_current_session() == 'closed' and get_current_time().hour >= 20 and archived_date != date:
+                    tickers = redis_manager.get_all_tickers()
+                    for ticker in tickers:
+                        candle_archive.archive(ticker, complete=True)
+                    archived_date = date
+                    logging.info(f"Archived end of day candles of {len(tickers)} tickers")
+            except Exception as e:
+                logging.error(f"Error in archive candles: {e}")
+            clock.sleep(60)
 
     def _start_polygon_monitors(self):
         while True:
             try:
                 if get_current_session() == 'closed':
-                    time.sleep(1)
+                    clock.sleep(1)
                     continue
 
                 logging.info("Fetching polygon snapshot")
+                if not rate_limiter.acquire('polygon:rest', timeout=5):
+                    # Keep the previous snapshot until a token frees up
+                    clock.sleep(1)
+                    continue
                 snapshot = self.polygon_client.get_snapshot_all(
                     "stocks",
                 )
+                table = SnapshotTable.from_snapshot(snapshot, self._get_snapshot())
                 with self.lock:
-                    snapshot_data_copy = self.snapshot_data.copy()
-
-                for item in snapshot:
-                    if not isinstance(item, TickerSnapshot) or not isinstance(item.min, MinuteSnapshot) or not isinstance(item.day, Agg) or not isinstance(item.prev_day, Agg) or not isinstance(item.last_quote, LastQuote) or not isinstance(item.last_trade, LastTrade) or len(item.ticker) > 4:
-                        continue
-                    min_utc_dt = datetime.fromtimestamp(item.min.timestamp/1000, tz=pytz.UTC) + timedelta(minutes=1)
-                    min_est_dt = min_utc_dt.astimezone(pytz.timezone('US/Eastern'))
-                    last_trade_utc_dt = datetime.fromtimestamp(item.last_trade.sip_timestamp/1000000000, tz=pytz.UTC)
-                    last_trade_est_dt = last_trade_utc_dt.astimezone(pytz.timezone('US/Eastern'))
-                    if item.ticker not in snapshot_data_copy:
-                        moomoo_ticker = get_moomoo_ticker(item.ticker)
-                        snapshot_data_copy[moomoo_ticker] = {
-                            'ticker': moomoo_ticker,
-                            'min': [{
-                                'timestamp': min_est_dt.strftime('%Y-%m-%d %H:%M:%S'),
-                                'open': item.min.open,
-                                'high': item.min.high,
-                                'low': item.min.low,
-                                'close': item.min.close,
-                                'volume': item.min.volume,
-                                'vwap': item.min.vwap,
-                                'accumulated_volume': item.min.accumulated_volume,
-                            }],
-                            'day': {
-                                'open': item.day.open,
-                                'high': item.day.high,
-                                'low': item.day.low,
-                                'close': item.day.close,
-                                'volume': item.day.volume,
-                                'vwap': item.day.vwap,
-                            },
-                            'prev_day': {
-                                'open': item.prev_day.open,
-                                'high': item.prev_day.high,
-                                'low': item.prev_day.low,
-                                'close': item.prev_day.close,
-                                'volume': item.prev_day.volume,
-                                'vwap': item.prev_day.vwap,
-                            },
-                            'last_quote': {
-                                'bid_price': item.last_quote.bid_price,
-                                'bid_size': item.last_quote.bid_size,
-                                'ask_price': item.last_quote.ask_price,
-                                'ask_size': item.last_quote.ask_size,
-                            },
-                            'last_trade': [{
-                                'price': item.last_trade.price,
-                                'size': item.last_trade.size,
-                                'timestamp': last_trade_est_dt.strftime('%Y-%m-%d %H:%M:%S'),
-                            }]
-                        }
-                    else:
-                        last_min_timestamp = snapshot_data_copy[moomoo_ticker]['min'][-1]['timestamp']
-                        if last_min_timestamp != min_est_dt.strftime('%Y-%m-%d %H:%M:%S'):
-                            snapshot_data_copy[moomoo_ticker]['min'].append({
-                                'timestamp': min_est_dt.strftime('%Y-%m-%d %H:%M:%S'),
-                                'open': item.min.open,
-                                'high': item.min.high,
-                                'low': item.min.low,
-                                'close': item.min.close,
-                                'volume': item.min.volume,
-                                'vwap': item.min.vwap,
-                                'accumulated_volume': item.min.accumulated_volume,
-                            })
-                        else:
-                            snapshot_data_copy[moomoo_ticker]['min'][-1]['close'] = item.min.close
-                            snapshot_data_copy[moomoo_ticker]['min'][-1]['volume'] = item.min.volume
-                            snapshot_data_copy[moomoo_ticker]['min'][-1]['vwap'] = item.min.vwap
-                            snapshot_data_copy[moomoo_ticker]['min'][-1]['accumulated_volume'] = item.min.accumulated_volume
-
-                        if len(snapshot_data_copy[moomoo_ticker]['min']) > 5:
-                            snapshot_data_copy[moomoo_ticker]['min'].pop(0)
-
-                        snapshot_data_copy[moomoo_ticker]['day']['close'] = item.day.close
-                        snapshot_data_copy[moomoo_ticker]['day']['volume'] = item.day.volume
-                        snapshot_data_copy[moomoo_ticker]['day']['vwap'] = item.day.vwap
-                        snapshot_data_copy[moomoo_ticker]['last_quote']['bid_price'] = item.last_quote.bid_price
-                        snapshot_data_copy[moomoo_ticker]['last_quote']['bid_size'] = item.last_quote.bid_size
-                        snapshot_data_copy[moomoo_ticker]['last_quote']['ask_price'] = item.last_quote.ask_price
-                        snapshot_data_copy[moomoo_ticker]['last_quote']['ask_size'] = item.last_quote.ask_size
-                        if snapshot_data_copy[moomoo_ticker]['last_trade'][-1]['timestamp'] != last_trade_est_dt.strftime('%Y-%m-%d %H:%M:%S'):
-                            snapshot_data_copy[moomoo_ticker]['last_trade'].append({
-                                'price': item.last_trade.price,
-                                'size': item.last_trade.size,
-                                'timestamp': last_trade_est_dt.strftime('%Y-%m-%d %H:%M:%S'),
-                            })
-                        if len(snapshot_data_copy[moomoo_ticker]['last_trade']) > 10:
-                            snapshot_data_copy[moomoo_ticker]['last_trade'].pop(0)
-
-                with self.lock:
-                    self.snapshot_data = snapshot_data_copy
+                    self.snapshot = table
+                self.emas.update(table)
 
-                logging.info(f"Polygon snapshot fetched {len(snapshot_data_copy)} tickers")
+                logging.info(f"Polygon snapshot fetched {len(table)} tickers")
 
             except Exception as e:
                 logging.error(f"Error in start polygon monitors: {e}")
-            time.sleep(1)
+            clock.sleep(1)
+
+    def _active_price_mask(self, snapshot: SnapshotTable) -> np.ndarray:
+        """Tickers between $0.5 and $12 that traded within the last minute"""
+        last_price = snapshot.last_price
+        return (last_price >= 0.5) & (last_price <= 12.00) & (clock.time() - snapshot.last_trade_ts <= 60)
+
+    def _filter_float(self, tickers: List[str]) -> List[str]:
+        """Keep tickers with less than 50M outstanding shares"""
+        return fundamentals_service.filter_outstanding_shares(self.quote_ctx, tickers, 50_000_000)
 
     def _vwap_scanner(self):
         while True:
             try:
-                with self.lock:
-                    snapshot_data_copy = self.snapshot_data.copy()
-
-                if len(snapshot_data_copy) == 0:
-                    time.sleep(30)
+                snapshot = self._get_snapshot()
+                if len(snapshot) == 0:
+                    clock.sleep(30)
                     continue
 
-                candidates = []
-                tickers = []
-                for ticker, item in snapshot_data_copy.items():
-                    if not (0.5 <= item['last_trade'][-1]['price'] <= 12.00):
-                        continue
-
-                    if item['min'][-1]['accumulated_volume'] < 50_000:
-                        continue
-
-                    if item['min'][-1]['accumulated_volume'] * item['last_trade'][-1]['price'] < 500_000:
-                        continue
-
-                    current_time = get_current_time()
-                    last_trade_timestamp = pd.to_datetime(item['last_trade'][-1]['timestamp']).tz_localize('US/Eastern')
-                    if current_time - last_trade_timestamp > timedelta(minutes=1):
-                        continue
-
-                    tickers.append(ticker)
-
-                if len(tickers) > 0:
-                    ret, data = self.quote_ctx.get_market_snapshot(tickers)
-                    if ret == RET_OK:
-                        tickers = data[data['outstanding_shares'] < 50_000_000]['code'].tolist()
+                accumulated_volume = snapshot.accumulated_volume
+                mask = (
+                    self._active_price_mask(snapshot) &
+                    (accumulated_volume >= 50_000) &
+                    (accumulated_volume * snapshot.last_price >= 500_000)
+                )
+                tickers = self._filter_float(snapshot.tickers[mask].tolist())
 
+                candidates = []
                 if len(tickers) > 0:
-                    candidates = [item for ticker, item in snapshot_data_copy.items() if ticker in tickers]
-                    candidates.sort(key=lambda x: (
-                        -x['day']['volume'] * x['last_trade'][-1]['price']
-                    ))
+                    selected = np.zeros(len(snapshot), dtype=bool)
+                    selected[snapshot.rows(tickers)] = True
+                    candidates = snapshot.rank(selected, snapshot.day_volume * snapshot.last_price)
 
-                logging.info(f"VWAP candidates {len(candidates)} {[c['ticker'] for c in candidates]}")
+                logging.info(f"VWAP candidates {len(candidates)} {candidates}")
 
                 for candidate in candidates[:10]:
-                    self._process_gainer(candidate['ticker'], "vwap_candidate")
+                    self._process_gainer(candidate, "vwap_candidate", snapshot)
 
             except Exception as e:
                 logging.error(f"Error in vwap scanner: {e}")
-            time.sleep(30)
-
-    def _validate_emas(self, EMA240s, EMA5s):
-        try:
-            if not len(EMA240s.values) == len(EMA5s.values) or not len(EMA240s.values) > 0 or not len(EMA5s.values) > 0:
-                return False
-            last_ema240_timestamp = datetime.fromtimestamp(EMA240s.values[0].timestamp/1000, tz=pytz.timezone('US/Eastern'))
-            last_ema5_timestamp = datetime.fromtimestamp(EMA5s.values[0].timestamp/1000, tz=pytz.timezone('US/Eastern'))
-            current_time = get_current_time()
-            if current_time - last_ema240_timestamp > timedelta(minutes=10) or current_time - last_ema5_timestamp > timedelta(minutes=10):
-                return False
-            return True
-        except Exception as e:
-            logging.error(f"Error in validate emas: {e}")
-            return False
-
-    def _check_crossover(self, EMA240s, EMA5s):
-        try:
-            if EMA5s.values[-1].value < EMA5s.values[0].value and EMA5s.values[-1].value < EMA240s.values[-1].value and EMA5s.values[0].value >= EMA240s.values[0].value:
-                return True
-            return False
-        except Exception as e:
-            logging.error(f"Error in check crossover: {e}")
-            return False
+            clock.sleep(30)
+
+    def _seed_emas(self, tickers: List[str]):
+        """Seed local EMAs of new tickers from their recent closed minute bars"""
+        now = clock.time()
+        start_date = (get_current_time() - timedelta(days=5)).strftime('%Y-%m-%d')
+        end_date = get_current_time().strftime('%Y-%m-%d')
+        for ticker in tickers:
+            if ticker in self.emas:
+                continue
+            try:
+                timestamps = []
+                closes = []
+                if not rate_limiter.acquire('polygon:rest', PRIORITY_LOW, timeout=30):
+                    continue
+                for a in self.polygon_client.list_aggs(
+                    get_short_ticker(ticker),
+                    1,
+                    "minute",
+                    start_date,
+                    end_date,
+                    adjusted="true",
+                    sort="asc",
+                    limit=50000
+                ):
+                    bar_ts = a.timestamp / 1000 + 60
+                    if bar_ts <= now:
+                        timestamps.append(bar_ts)
+                        closes.append(a.close)
+                if not self.emas.seed(ticker, np.array(timestamps), np.array(closes, dtype=np.float64)):
+                    logging.info(f"No minute bars to seed emas for {ticker}")
+            except Exception as e:
+                logging.error(f"Error seeding emas for {ticker}: {e}")
 
     def _dip_scanner(self):
         while True:
             try:
-                with self.lock:
-                    snapshot_data_copy = self.snapshot_data.copy()
-
-                if len(snapshot_data_copy) == 0:
-                    time.sleep(30)
+                snapshot = self._get_snapshot()
+                if len(snapshot) == 0:
+                    clock.sleep(30)
                     continue
 
-                candidates = []
-                tickers = []
-                # Price Filter between $0.5 and $12
-                for ticker, item in snapshot_data_copy.items():
-                    if not (0.5 <= item['last_trade'][-1]['price'] <= 12.00):
-                        continue
-
-                    current_time = get_current_time()
-                    last_trade_timestamp = pd.to_datetime(item['last_trade'][-1]['timestamp']).tz_localize('US/Eastern')
-                    if current_time - last_trade_timestamp > timedelta(minutes=1):
-                        continue
-
-                    tickers.append(ticker)
-
-                # Float Filter less than 50M
-                if len(tickers) > 0:
-                    ret, data = self.quote_ctx.get_market_snapshot(tickers)
-                    if ret == RET_OK:
-                        tickers = data[data['outstanding_shares'] < 50_000_000]['code'].tolist()
+                # Price Filter between $0.5 and $12, Float Filter less than 50M
+                tickers = self._filter_float(snapshot.tickers[self._active_price_mask(snapshot)].tolist())
 
                 # EMA5 & EMA240 Filter for approach each other
                 if len(tickers) > 0:
-                    for ticker in tickers:
-                        EMA240s = self.polygon_client.get_ema(
-                            ticker=get_short_ticker(ticker),
-                            timespan="minute",
-                            adjusted="true",
-                            window="240",
-                            series_type="close",
-                            order="desc",
-                            limit="10",
-                        )
-                        EMA5s = self.polygon_client.get_ema(
-                            ticker=get_short_ticker(ticker),
-                            timespan="minute",
-                            adjusted="true",
-                            window="5",
-                            series_type="close",
-                            order="desc",
-                            limit="10",
-                        )
-                        if not self._validate_emas(EMA240s, EMA5s):
-                            logging.info(f"Invalid emas for {ticker}")
-                            continue
-                        if self._check_crossover(EMA240s, EMA5s):
-                            logging.info(f"Crossover for {ticker}")
-                            candidates.append(snapshot_data_copy[ticker])
-
-                    candidates.sort(key=lambda x: (
-                        -x['day']['volume'] * x['last_trade'][-1]['price']
-                    ))
-
-                    for candidate in candidates[:10]:
-                        self._process_gainer(candidate['ticker'], "dip_candidate")
+                    self._seed_emas(tickers)
+                    selected = self.emas.crossovers(snapshot, tickers, clock.time())
+                    candidates = snapshot.rank(selected, snapshot.day_volume * snapshot.last_price, limit=10)
+                    logging.info(f"Dip candidates {len(candidates)} {candidates}")
+                    for candidate in candidates:
+                        self._process_gainer(candidate, "dip_candidate", snapshot)
                 else:
                     logging.warning(f"No Dip candidates found")
 
             except Exception as e:
                 logging.error(f"Error in dip scanner: {e}")
-            time.sleep(30)
+            clock.sleep(30)
 
     def run(self):
         polygon_monitors_thread = threading.Thread(target=self._start_polygon_monitors)
@@ -516,6 +416,12 @@ class MarketMonitor:
         market_context_thread = threading.Thread(target=self._get_market_context)
         market_context_thread.start()
 
+        market_breadth_thread = threading.Thread(target=self._market_breadth)
+        market_breadth_thread.start()
+
+        archive_candles_thread = threading.Thread(target=self._archive_candles)
+        archive_candles_thread.start()
+
 if __name__ == "__main__":
     setup_logging(file_name=f'market_monitor.log')
     market_monitor = MarketMonitor()
@@ -1,25 +1,28 @@
 import logging
-import time
 from typing import List, Tuple
 import pandas as pd
 from config.logging import setup_logging
 from services.redis_manager import redis_manager
+from services.redis_metrics import redis_metrics
+from services.latency_tracer import latency_tracer
+from utils.clock import clock
 
 def run(ticker):
     setup_logging(file_name=f'{ticker}/orderbook_process_worker.log')
+    redis_metrics.set_source('orderbook_process_worker', ticker)
 
     while True:
         try:
             orderbook_data = redis_manager.pop_orderbook(ticker)
             if not orderbook_data:
-                time.sleep(0.1)
+                clock.sleep(0.1)
                 continue
             
             orderbook = orderbook_data[-1]
             prev_orderbook = orderbook_data[-2] if len(orderbook_data) >= 2 else None
             
             if orderbook is None:
-                time.sleep(0.1)
+                clock.sleep(0.1)
                 continue
             
             bids: List[Tuple[float, float]] = orderbook['Bid']
@@ -27,7 +30,7 @@ def run(ticker):
 
             if not bids or not asks:
                 logging.debug("Empty L2 snapshot; skipping.")
-                time.sleep(0.05)
+                clock.sleep(0.05)
                 continue
 
             bid_volume = bids[0][1]
@@ -89,7 +92,7 @@ def run(ticker):
                     reload_flag = False
 
             data = {
-                'timestamp': time.time(),
+                'timestamp': clock.time(),
                 # bids
                 'bids': [(bid[0], bid[1]) for bid in bids],
                 'best_bid_price': best_bid_price,
@@ -108,12 +111,14 @@ def run(ticker):
                 'uptick_seq': uptick_seq,
                 'sweep_flag': sweep_flag,
                 'reload_flag': reload_flag,
+                'source_ts': orderbook.get('recv_ts'),
             }
 
             redis_manager.append_orderbook(ticker, data)
+            latency_tracer.record_since('orderbook', data['source_ts'])
             # logging.info(f"Orderbook processed: {data}")
                 
         except Exception as e:
             logging.error(f"Error in aggregate worker: {e}", exc_info=True)
         
-        time.sleep(0.05)
\ No newline at end of file
+        clock.sleep(0.05)
\ No newline at end of file
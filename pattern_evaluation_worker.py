@@ -1,12 +1,14 @@
 import logging
-import time
 from services.redis_manager import redis_manager
+from services.redis_metrics import redis_metrics
 from services.trading_coach_service import trading_coach_service
 from services.strategy_service import strategy_service
 from config.logging import setup_logging
+from utils.clock import clock
 
 def run(ticker):
     setup_logging(file_name=f'{ticker}/pattern_evaluation_worker.log')
+    redis_metrics.set_source('pattern_evaluation_worker', ticker)
     
     previous_close = 0
     previous_volume = 0
@@ -16,11 +18,11 @@ def run(ticker):
             volume = redis_manager.get_stock_volume(ticker)
 
             if price is None or volume is None:
-                time.sleep(1)
+                clock.sleep(1)
                 continue
             
             if price == previous_close and volume == previous_volume:
-                time.sleep(1)
+                clock.sleep(1)
                 continue
 
             previous_close = price
@@ -41,4 +43,4 @@ def run(ticker):
         except Exception as e:
             logging.error(f"Fatal error in pattern evaluation worker for {ticker}: {e}")
 
-        time.sleep(1)
\ No newline at end of file
+        clock.sleep(1)
\ No newline at end of file
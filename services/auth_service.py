@@ -1,3 +1,6 @@
+import time
+import uuid
+import hashlib
 import logging
 import jwt
 import bcrypt
@@ -6,6 +9,7 @@ from typing import Optional, Dict, Any
 from core.db import get_db, User
 from config import get_config
 from core.db import MoomooAccount
+from services.redis_manager import redis_manager
 
 config = get_config()
 
@@ -15,6 +19,7 @@ class AuthService:
     def __init__(self):
         self.secret_key = config.SECRET_KEY
         self.token_expiry_hours = 24
+        self.principal_ttl = config.AUTH_CACHE_TTL_SECONDS
         
     def _hash_password(self, password: str) -> str:
         """Hash a password using bcrypt"""
@@ -32,7 +37,8 @@ class AuthService:
             'user_id': str(user_id),
             'email': email,
             'exp': datetime.utcnow() + timedelta(hours=self.token_expiry_hours),
-            'iat': datetime.utcnow()
+            'iat': datetime.utcnow(),
+            'jti': uuid.uuid4().hex
         }
         return jwt.encode(payload, self.secret_key, algorithm='HS256')
     
@@ -151,39 +157,60 @@ class AuthService:
                 'error': 'Login failed'
             }
     
+    def _token_id(self, token: str, payload: Dict[str, Any]) -> str:
+        """Cache key of a token: its jti, or its hash for tokens issued without one"""
+        return payload.get('jti') or hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def _load_principal(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Read an active user and its approved moomoo account from the database"""
+        with get_db() as db:
+            user = db.query(User).filter_by(id=user_id).first()
+            if not user or not user.isActive:
+                return None
+            moomoo_account = db.query(MoomooAccount).filter_by(userId=user.id, status='approved').first()
+            moomoo_account_info = None
+            if moomoo_account:
+                moomoo_account_info = {
+                    'id': str(moomoo_account.id),
+                    'accountId': moomoo_account.accountId,
+                    'host': moomoo_account.host,
+                    'port': moomoo_account.port,
+                    'tradingEnabled': moomoo_account.tradingEnabled,
+                    'tradingAmount': moomoo_account.tradingAmount,
+                    'status': moomoo_account.status
+                }
+            return {
+                'id': str(user.id),
+                'firstName': user.firstName,
+                'lastName': user.lastName,
+                'email': user.email,
+                'isAdmin': user.isAdmin,
+                'moomooAccount': moomoo_account_info
+            }
+
     def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
-        """Verify JWT token and return user data"""
+        """Verify JWT token and return user data, cached in Redis per token"""
         try:
             payload = self._verify_token(token)
             if not payload:
                 return None
-            with get_db() as db:
-                user = db.query(User).filter_by(id=int(payload['user_id'])).first()
-                moomoo_account = db.query(MoomooAccount).filter_by(userId=user.id, status='approved').first()
-                moomoo_account_info = None
-                if moomoo_account:
-                    moomoo_account_info = {
-                        'id': str(moomoo_account.id),
-                        'accountId': moomoo_account.accountId,
-                        'host': moomoo_account.host,
-                        'port': moomoo_account.port,
-                        'tradingEnabled': moomoo_account.tradingEnabled,
-                        'tradingAmount': moomoo_account.tradingAmount,
-                        'status': moomoo_account.status
-                    }
-                if not user or not user.isActive:
-                    return None
-                return {
-                    'id': str(user.id),
-                    'firstName': user.firstName,
-                    'lastName': user.lastName,
-                    'email': user.email,
-                    'isAdmin': user.isAdmin,
-                    'moomooAccount': moomoo_account_info
-                }
+            token_id = self._token_id(token, payload)
+            principal = redis_manager.get_principal(token_id)
+            if principal is not None:
+                return principal
+            generation = redis_manager.get_principal_generation(payload['user_id'])
+            principal = self._load_principal(int(payload['user_id']))
+            ttl = min(self.principal_ttl, int(payload['exp'] - time.time()))
+            if principal and ttl > 0:
+                redis_manager.set_principal(token_id, payload['user_id'], principal, ttl, generation, self.principal_ttl)
+            return principal
         except Exception as e:
             logging.error(f"Error verifying token: {e}")
             return None
+
+    def invalidate_user(self, user_id) -> bool:
+        """Drop the cached principals of a user after its account, settings or password change"""
+        return redis_manager.invalidate_principals(str(user_id))
     
     def forgot_password(self, email: str) -> Dict[str, Any]:
         """Initiate password reset process"""
@@ -248,6 +275,7 @@ class AuthService:
                 # user.resetToken = None
                 # user.resetTokenExpiry = None
                 db.commit()
+                self.invalidate_user(user.id)
                 return {
                     'success': True,
                     'message': 'Password has been reset successfully'
@@ -303,6 +331,7 @@ class AuthService:
                 user.password = hashed_password
                 user.updatedAt = datetime.utcnow()
                 db.commit()
+                self.invalidate_user(user.id)
                 return {'message': 'Password changed successfully'}
         except Exception as e:
             logging.error(f"Error changing password: {e}")
@@ -0,0 +1,90 @@
+import os
+import logging
+from typing import Any, Dict, List
+import numpy as np
+from config import get_config
+from services.redis_manager import redis_manager
+
+CANDLE_DTYPE = np.dtype([
+    ('timestamp', 'U19'),
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('volume', 'f8'),
+])
+
+def archive_path(archive_dir: str, date: str, ticker: str) -> str:
+    return os.path.join(archive_dir, date, f'{ticker}.npy')
+
+def complete_marker_path(archive_dir: str, date: str, ticker: str) -> str:
+    return os.path.join(archive_dir, date, f'{ticker}.complete')
+
+class CandleArchive:
+    """1-minute candles of a ticker-day as a memory-mappable .npy file, so re-subscribing only backfills the tail"""
+
+    def __init__(self):
+        self.archive_dir = get_config().CANDLE_ARCHIVE_DIR
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.archive_dir)
+
+    def _read(self, path: str) -> np.ndarray:
+        try:
+            return np.load(path, mmap_mode='r')
+        except FileNotFoundError:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+
+    def is_complete(self, ticker: str, date: str) -> bool:
+        """A day is complete once it was archived after that day's post-market close, which leaves a marker file"""
+        if not self.enabled:
+            return False
+        return os.path.exists(archive_path(self.archive_dir, date, ticker)) and os.path.exists(complete_marker_path(self.archive_dir, date, ticker))
+
+    def load(self, ticker: str, dates: List[str]) -> List[Dict[str, Any]]:
+        """Archived candles of the given days in timestamp order"""
+        if not self.enabled:
+            return []
+        candles = []
+        for date in sorted(set(dates)):
+            data = self._read(archive_path(self.archive_dir, date, ticker))
+            candles.extend({name: data[name][i].item() for name in CANDLE_DTYPE.names} for i in range(len(data)))
+        return candles
+
+    def save(self, ticker: str, candles: List[Dict[str, Any]], complete: bool = False):
+        """Merge candles into the archive of each day they cover; newer values win on the same timestamp.
+        With complete the days are marked as holding every bar of their sessions"""
+        if not self.enabled or not candles:
+            return False
+        try:
+            by_date = {}
+            for candle in candles:
+                timestamp = str(candle['timestamp'])
+                by_date.setdefault(timestamp[:10], {})[timestamp] = candle
+            for date, day_candles in by_date.items():
+                path = archive_path(self.archive_dir, date, ticker)
+                existing = self._read(path)
+                merged = {str(row['timestamp']): row for row in existing}
+                for timestamp, candle in day_candles.items():
+                    merged[timestamp] = (timestamp, candle['open'], candle['high'], candle['low'], candle['close'], candle['volume'])
+                data = np.array([tuple(merged[timestamp]) for timestamp in sorted(merged)], dtype=CANDLE_DTYPE)
+                del existing
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Write then rename so a concurrent mmap reader never sees a partial file
+                tmp_path = f'{path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, data)
+                os.replace(tmp_path, path)
+                if complete:
+                    open(complete_marker_path(self.archive_dir, date, ticker), 'w').close()
+            return True
+        except Exception as e:
+            logging.error(f"Error archiving candles for {ticker}: {e}")
+            return False
+
+    def archive(self, ticker: str, complete: bool = False):
+        """Archive the candles of a ticker currently held in Redis"""
+        return self.save(ticker, redis_manager.get_candles(ticker), complete=complete)
+
+candle_archive = CandleArchive()
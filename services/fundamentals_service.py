@@ -0,0 +1,86 @@
+import logging
+import threading
+from typing import Any, Dict, List
+from moomoo import RET_OK
+from services.redis_manager import redis_manager
+from services.rate_limiter import rate_limiter, PRIORITY_LOW
+from utils.util import get_current_time
+
+# Fields kept per ticker: float, outstanding_shares, avg_30d_volume, prev_close, exchange, date
+SNAPSHOT_BATCH_SIZE = 400
+
+class FundamentalsService:
+    """Daily fundamentals of the whole universe in one Redis hash, mirrored in memory by each reader"""
+
+    def __init__(self):
+        self.fundamentals: Dict[str, Dict[str, Any]] = {}
+        self.loaded_version = None
+        self.lock = threading.Lock()
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Reload the in-memory copy when the hash has been rewritten since the last load"""
+        version = redis_manager.get_fundamentals_updated()
+        if version is not None and version != self.loaded_version:
+            fundamentals = redis_manager.get_fundamentals()
+            with self.lock:
+                self.fundamentals = fundamentals
+                self.loaded_version = version
+            logging.info(f"Loaded fundamentals of {len(fundamentals)} tickers")
+        return self.fundamentals
+
+    def store(self, fundamentals: Dict[str, Dict[str, Any]]):
+        """Merge records into the hash and the in-memory copy"""
+        date = get_current_time().strftime('%Y-%m-%d')
+        for record in fundamentals.values():
+            record.setdefault('date', date)
+        with self.lock:
+            for ticker, record in fundamentals.items():
+                self.fundamentals[ticker] = {**self.fundamentals.get(ticker, {}), **record}
+            merged = {ticker: self.fundamentals[ticker] for ticker in fundamentals}
+        written = redis_manager.set_fundamentals(merged)
+        if written is None:
+            return False
+        previous, version = written
+        with self.lock:
+            # The in-memory copy already holds this write; reload only if another process wrote since our last load
+            if previous == self.loaded_version:
+                self.loaded_version = version
+        return True
+
+    def fetch_snapshot_fields(self, quote_ctx, tickers: List[str], priority: int = PRIORITY_LOW) -> Dict[str, Dict[str, Any]]:
+        """Outstanding shares and previous close of tickers from moomoo market snapshots"""
+        fundamentals = {}
+        for i in range(0, len(tickers), SNAPSHOT_BATCH_SIZE):
+            batch = tickers[i:i + SNAPSHOT_BATCH_SIZE]
+            if not rate_limiter.acquire('moomoo:market_snapshot', priority, timeout=30):
+                logging.warning(f"Skipping fundamentals snapshot of {len(batch)} tickers: rate limit wait exceeded")
+                continue
+            ret, data = quote_ctx.get_market_snapshot(batch)
+            if ret != RET_OK:
+                logging.error(f"Error getting fundamentals snapshot: {data}")
+                continue
+            for code, outstanding_shares, prev_close_price in zip(data['code'], data['outstanding_shares'], data['prev_close_price']):
+                fundamentals[code] = {
+                    'outstanding_shares': float(outstanding_shares),
+                    'prev_close': float(prev_close_price),
+                }
+        return fundamentals
+
+    def filter_outstanding_shares(self, quote_ctx, tickers: List[str], max_shares: float) -> List[str]:
+        """Keep tickers below max_shares outstanding; tickers not cached yet are fetched once and cached,
+        and kept when the fetch returns nothing for them"""
+        fundamentals = self.load()
+        missing = [ticker for ticker in tickers if 'outstanding_shares' not in fundamentals.get(ticker, {})]
+        if missing:
+            logging.info(f"Fetching fundamentals of {len(missing)} uncached tickers")
+            fetched = self.fetch_snapshot_fields(quote_ctx, missing)
+            if fetched:
+                self.store(fetched)
+                fundamentals = self.fundamentals
+        return [
+            ticker for ticker in tickers
+            if 'outstanding_shares' not in fundamentals.get(ticker, {})
+            or fundamentals[ticker]['outstanding_shares'] < max_shares
+        ]
+
+fundamentals_service = FundamentalsService()
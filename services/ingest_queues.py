@@ -0,0 +1,97 @@
+import json
+import time
+import logging
+from typing import Dict, List
+from config import get_config
+from services.redis_manager import redis_manager
+
+# What happens to a queue over its cap, by stream
+STREAM_POLICIES = {
+    'tick': 'drop_oldest',      # rolling window read by detectors; stale ticks are the least useful
+    'candlestick': 'never_drop',
+    'orderbook': 'conflate',    # only the newest books matter (the consumer diffs the last two)
+}
+ALERT_INTERVAL = 60             # seconds between repeated alerts of one queue
+EXPORT_INTERVAL = 1
+
+def _recv_ts(item: str):
+    try:
+        return json.loads(item)['recv_ts']
+    except (ValueError, KeyError, TypeError):
+        return None
+
+class IngestQueues:
+    """Caps, drop policies and depth/age gauges of the moomoo:{stream}:{ticker} ingest queues"""
+
+    def __init__(self):
+        config = get_config()
+        self.caps = {
+            'tick': config.INGEST_TICK_CAP,
+            'candlestick': None,
+            'orderbook': config.INGEST_ORDERBOOK_CAP,
+        }
+        # Ticks are never consumed, only trimmed to a window before the latest tick's time, so after a lull
+        # their oldest item can be minutes old; tick queues alert on drops only
+        self.max_age = {
+            'tick': None,
+            'candlestick': config.INGEST_MAX_AGE_SECONDS,
+            'orderbook': config.INGEST_MAX_AGE_SECONDS,
+        }
+        self.gauges = {}
+        self.dropped = {}
+        self.alerted_at = {}
+        self.exported_at = 0
+
+    def push(self, queues: Dict[str, List[str]]) -> bool:
+        """Push serialized items, applying each stream's cap, then update the gauges"""
+        caps = {key: self.caps[key.split(':')[1]] for key in queues}
+        pushed = redis_manager.push_ingest(queues, caps)
+        if pushed is None:
+            return False
+
+        now = time.time()
+        for key, (length, oldest) in pushed.items():
+            _, stream, ticker = key.split(':', 2)
+            name = f'{stream}:{ticker}'
+            cap = caps[key]
+            if cap and length > cap:
+                self.dropped[name] = self.dropped.get(name, 0) + length - cap
+            # Tick age is the span of the window, measured against the newest tick pushed
+            reference = (_recv_ts(queues[key][-1]) or now) if stream == 'tick' else now
+            oldest_ts = _recv_ts(oldest) if oldest else None
+            age = reference - oldest_ts if oldest_ts else 0
+            self.gauges[name] = {
+                'ticker': ticker,
+                'stream': stream,
+                'policy': STREAM_POLICIES[stream],
+                'depth': min(length, cap) if cap else length,
+                'age': round(age, 3),
+                'dropped': self.dropped.get(name, 0),
+                'updated': now,
+            }
+            self._check(name, self.gauges[name], stream == 'tick' and cap and length > cap)
+
+        if now - self.exported_at >= EXPORT_INTERVAL:
+            redis_manager.set_ingest_gauges(self.gauges)
+            self.exported_at = now
+        return True
+
+    def _check(self, name: str, gauge: Dict, dropped: bool):
+        """Alert when a consumer falls behind; conflating order books is expected and never alerts"""
+        max_age = self.max_age[gauge['stream']]
+        if (max_age is None or gauge['age'] <= max_age) and not dropped:
+            return
+        now = gauge['updated']
+        if now - self.alerted_at.get(name, 0) < ALERT_INTERVAL:
+            return
+        self.alerted_at[name] = now
+        logging.warning(f"Ingest queue {name} behind: depth {gauge['depth']}, oldest {gauge['age']:.1f}s, dropped {gauge['dropped']}")
+        redis_manager.publish('socket_emit', {
+            'event': 'ingest_alert',
+            'data': gauge,
+        })
+
+    def get_metrics(self):
+        return redis_manager.get_ingest_gauges()
+
+ingest_queues = IngestQueues()
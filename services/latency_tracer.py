@@ -0,0 +1,84 @@
+import time
+import uuid
+import bisect
+import logging
+from typing import Dict, Any, Optional
+from services.redis_manager import redis_manager
+
+# Histogram bucket upper bounds in milliseconds; the last bucket is open-ended
+BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+
+# Pipeline stages, in the order data flows through them
+STAGES = [
+    'subscribe',        # subscribe request -> first tick consumed by the ticker process worker
+    'tick_ingest',      # moomoo tick push -> moomoo:tick queue write
+    'candle',           # moomoo kline push -> stocks:{t}:candles upsert
+    'orderbook',        # moomoo orderbook push -> processed snapshot
+    'indicators',       # kline push -> indicators written
+    'signal',           # kline push -> trade_signal published by a detector
+    'dispatch',         # trade_signal published -> received by redis_subscriber
+    'order',            # received by redis_subscriber -> order accepted by OpenD
+    'end_to_end',       # kline push -> order accepted by OpenD
+]
+
+def _bucket_label(latency_ms: float) -> str:
+    index = bisect.bisect_left(BUCKETS_MS, latency_ms)
+    return str(BUCKETS_MS[index]) if index < len(BUCKETS_MS) else 'inf'
+
+def _percentile(buckets: Dict[str, int], count: int, q: float) -> Optional[float]:
+    """Upper bound of the bucket holding the q-quantile (None past the last bound)"""
+    if count <= 0:
+        return None
+    target = q * count
+    cumulative = 0
+    for bound in BUCKETS_MS:
+        cumulative += buckets.get(str(bound), 0)
+        if cumulative >= target:
+            return float(bound)
+    return None
+
+class LatencyTracer:
+    """Per-stage latency histograms shared by every process through Redis"""
+
+    def new_trace(self, source_ts: Optional[float]) -> Dict[str, Any]:
+        """Start a trace for a trade signal whose input arrived at source_ts"""
+        now = time.time()
+        trace = {
+            'trace_id': uuid.uuid4().hex,
+            'source_ts': source_ts or now,
+            'signal_ts': now,
+        }
+        if source_ts:
+            self.record('signal', now - source_ts)
+        return trace
+
+    def record(self, stage: str, latency_seconds: float):
+        try:
+            latency_ms = max(latency_seconds, 0) * 1000
+            redis_manager.record_latency(stage, _bucket_label(latency_ms), latency_ms)
+        except Exception as e:
+            logging.error(f"Failed to record {stage} latency: {e}")
+
+    def record_since(self, stage: str, start_ts: Optional[float]):
+        if start_ts:
+            self.record(stage, time.time() - start_ts)
+
+    def get_stats(self) -> Dict[str, Any]:
+        histograms = redis_manager.get_latency_histograms()
+        stats = {}
+        for stage in sorted(histograms, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES)):
+            data = histograms[stage]
+            count = int(data.pop('count', 0))
+            total_ms = float(data.pop('sum_ms', 0))
+            buckets = {label: int(value) for label, value in data.items()}
+            stats[stage] = {
+                'count': count,
+                'avg_ms': round(total_ms / count, 2) if count else None,
+                'p50_ms': _percentile(buckets, count, 0.50),
+                'p90_ms': _percentile(buckets, count, 0.90),
+                'p99_ms': _percentile(buckets, count, 0.99),
+                'buckets': buckets,
+            }
+        return stats
+
+latency_tracer = LatencyTracer()
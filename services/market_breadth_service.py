@@ -0,0 +1,88 @@
+from typing import Any, Dict
+import numpy as np
+from datatypes.snapshot_table import SnapshotTable
+from utils.util import get_current_time, get_moomoo_ticker
+
+BENCHMARK = 'SPY'
+SECTOR_ETFS = {
+    'XLB': 'Materials',
+    'XLC': 'Communication Services',
+    'XLE': 'Energy',
+    'XLF': 'Financials',
+    'XLI': 'Industrials',
+    'XLK': 'Technology',
+    'XLP': 'Consumer Staples',
+    'XLRE': 'Real Estate',
+    'XLU': 'Utilities',
+    'XLV': 'Health Care',
+    'XLY': 'Consumer Discretionary',
+    'QQQ': 'Nasdaq 100',
+    'DIA': 'Dow Jones',
+    'IWM': 'Russell 2000',
+}
+
+def _change_pct(snapshot: SnapshotTable) -> np.ndarray:
+    """Change from the previous close in percent, NaN where either price is missing"""
+    price = snapshot.last_price
+    prev_close = snapshot.prev_close
+    change_pct = np.full(len(snapshot), np.nan)
+    np.divide((price - prev_close) * 100, prev_close, out=change_pct, where=(price > 0) & (prev_close > 0))
+    return change_pct
+
+def compute_sector_strength(snapshot: SnapshotTable, change_pct: np.ndarray) -> Dict[str, Any]:
+    """Change, relative strength vs SPY and VWAP position of every sector and index ETF"""
+    benchmark_row = snapshot.index.get(get_moomoo_ticker(BENCHMARK))
+    benchmark_change = float(change_pct[benchmark_row]) if benchmark_row is not None else np.nan
+
+    symbols = [symbol for symbol in SECTOR_ETFS if get_moomoo_ticker(symbol) in snapshot.index]
+    rows = snapshot.rows([get_moomoo_ticker(symbol) for symbol in symbols])
+    changes = change_pct[rows]
+    relative_strength = changes - benchmark_change
+    above_vwap = snapshot.last_price[rows] > snapshot.day_vwap[rows]
+
+    sectors = {}
+    for position, symbol in enumerate(symbols):
+        if np.isnan(changes[position]):
+            continue
+        sectors[symbol] = {
+            'name': SECTOR_ETFS[symbol],
+            'change_pct': round(float(changes[position]), 2),
+            'relative_strength': None if np.isnan(relative_strength[position]) else round(float(relative_strength[position]), 2),
+            'above_vwap': bool(above_vwap[position]),
+        }
+    return {
+        'benchmark_change_pct': None if np.isnan(benchmark_change) else round(benchmark_change, 2),
+        'sectors': sectors,
+    }
+
+def compute_market_breadth(snapshot: SnapshotTable) -> Dict[str, Any]:
+    """Advance/decline, new highs/lows and up/down volume over the full-market snapshot"""
+    change_pct = _change_pct(snapshot)
+    traded = ~np.isnan(change_pct)
+    advancing = traded & (change_pct > 0)
+    declining = traded & (change_pct < 0)
+
+    price = snapshot.last_price
+    new_highs = traded & (price >= snapshot.day_high) & (snapshot.day_high > snapshot.prev_high)
+    new_lows = traded & (price <= snapshot.day_low) & (snapshot.day_low < snapshot.prev_low)
+
+    volume = np.nan_to_num(snapshot.day_volume)
+    up_volume = float(volume[advancing].sum())
+    down_volume = float(volume[declining].sum())
+
+    advancers = int(advancing.sum())
+    decliners = int(declining.sum())
+    return {
+        'timestamp': get_current_time().strftime('%Y-%m-%d %H:%M:%S'),
+        'tickers': int(traded.sum()),
+        'advancers': advancers,
+        'decliners': decliners,
+        'unchanged': int(traded.sum()) - advancers - decliners,
+        'ad_ratio': advancers / decliners if decliners > 0 else 1,
+        'new_highs': int(new_highs.sum()),
+        'new_lows': int(new_lows.sum()),
+        'up_volume': up_volume,
+        'down_volume': down_volume,
+        'up_volume_ratio': up_volume / (up_volume + down_volume) if up_volume + down_volume > 0 else 0.5,
+        'sector_strength': compute_sector_strength(snapshot, change_pct),
+    }
@@ -1,16 +1,19 @@
+import time
 import logging
+import threading
 import pytz
 import finnhub
 import pandas as pd
 from datetime import datetime
-import logging
-from finvizfinance.util import web_scrap
+from concurrent.futures import ThreadPoolExecutor
+from config import get_config
 from utils.util import get_current_time
+from utils.clock import clock
 
 def get_market_time_overview():
     """Get current market time status"""
     est = pytz.timezone('US/Eastern')
-    now_est = datetime.now(est)
+    now_est = clock.now(est)
     pre_market_start = datetime(now_est.year, now_est.month, now_est.day, 4, 0, 0, tzinfo=est)
     market_open = datetime(now_est.year, now_est.month, now_est.day, 9, 30, 0, tzinfo=est)
     market_close = datetime(now_est.year, now_est.month, now_est.day, 16, 0, 0, tzinfo=est)
@@ -18,155 +21,242 @@ def get_market_time_overview():
 
     return now_est, pre_market_start, market_open, market_close, post_market_close
 
+INDICES = ['QQQ', 'DIA']  # Using ETFs instead of indices
+SECTORS = ["XLE", "XLF", "XLK", "XLY", "XLV", "XLI"]  # Scored from the snapshot breadth, see market_breadth_service
+
+# (symbol, resolution, lookback seconds, fresh seconds, stale seconds) of every finnhub candle series
+CANDLE_SERIES = (
+    [('SPY', '15', 5 * 24 * 60 * 60, 60, 900)] +
+    [(index, '15', 5 * 24 * 60 * 60, 60, 900) for index in INDICES] +
+    [('UVXY', '5', 24 * 60 * 60, 60, 300)]  # Using UVXY as VIX proxy
+)
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every outgoing market context request"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, timeout: float = 30) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+class TTLCache:
+    """Cache serving fresh values, stale values while a background refresh runs, and stale values on failure"""
 
-# Initialize Finnhub client
-finnhub_client = finnhub.Client(api_key="cu9nrnhr01qnf5nnh5o0cu9nrnhr01qnf5nnh5og")
+    def __init__(self, executor: ThreadPoolExecutor):
+        self.executor = executor
+        self.entries = {}           # key -> (value, loaded at)
+        self.refreshing = set()
+        self.lock = threading.Lock()
+
+    def _load(self, key, loader):
+        try:
+            value = loader()
+            with self.lock:
+                self.entries[key] = (value, time.monotonic())
+            return value
+        finally:
+            with self.lock:
+                self.refreshing.discard(key)
+
+    def _refresh(self, key, loader):
+        try:
+            self._load(key, loader)
+        except Exception as e:
+            logging.error(f"Error refreshing market context {key}: {e}")
+
+    def get(self, key, loader, fresh: float, stale: float):
+        """Returns (value, is_stale); raises only when nothing usable is cached"""
+        with self.lock:
+            entry = self.entries.get(key)
+            age = time.monotonic() - entry[1] if entry else None
+            if entry and age <= fresh:
+                return entry[0], False
+            revalidate = entry is not None and age <= stale and key not in self.refreshing
+            if revalidate:
+                self.refreshing.add(key)
+        if revalidate:
+            self.executor.submit(self._refresh, key, loader)
+            return entry[0], True
+        try:
+            return self._load(key, loader), False
+        except Exception:
+            if entry:
+                logging.warning(f"Serving expired market context {key} after a failed refresh")
+                return entry[0], True
+            raise
 
 ##################  1. Intraday S&P 500 Trend (15-min EMA 9 vs. EMA 20)  ###########################
-def calculate_intraday_emas(ticker='SPY', interval='15', short_window=9, long_window=20):
-    try:
-        # Get timestamp for last 5 days
-        end_timestamp = int(datetime.now().timestamp())
-        start_timestamp = end_timestamp - (5 * 24 * 60 * 60)
-        
-        # Fetch data from Finnhub
-        data = finnhub_client.stock_candles(ticker, interval, start_timestamp, end_timestamp)
-        
-        if data['s'] != 'ok' or not data['c']:
-            return False
-            
-        # Convert to DataFrame
-        df = pd.DataFrame({'Close': data['c']})
-        df['Short_EMA'] = df['Close'].ewm(span=short_window, adjust=False).mean()
-        df['Long_EMA'] = df['Close'].ewm(span=long_window, adjust=False).mean()
-        
-        return True if df['Short_EMA'].iloc[-1] > df['Long_EMA'].iloc[-1] else False
-    except Exception as e:
-        logging.error(f"Error in calculate_intraday_emas: {e}")
+def calculate_intraday_emas(data, short_window=9, long_window=20):
+    if not data or data['s'] != 'ok' or not data['c']:
         return False
 
+    df = pd.DataFrame({'Close': data['c']})
+    df['Short_EMA'] = df['Close'].ewm(span=short_window, adjust=False).mean()
+    df['Long_EMA'] = df['Close'].ewm(span=long_window, adjust=False).mean()
+
+    return True if df['Short_EMA'].iloc[-1] > df['Long_EMA'].iloc[-1] else False
+
 ##################  2. NASDAQ & Dow Jones Confirmation (15-min SMA 50) ###########################
-def check_intraday_indices_above_moving_average(moving_average_days=50):
-    indices = ['QQQ', 'DIA']  # Using ETFs instead of indices
+def check_intraday_indices_above_moving_average(index_data, moving_average_days=50):
     status = []
-    
-    end_timestamp = int(datetime.now().timestamp())
-    start_timestamp = end_timestamp - (5 * 24 * 60 * 60)
-    
-    for index in indices:
-        try:
-            data = finnhub_client.stock_candles(index, '15', start_timestamp, end_timestamp)
-            if data['s'] == 'ok' and data['c']:
-                df = pd.DataFrame({'Close': data['c']})
-                df['50_SMA'] = df['Close'].rolling(window=moving_average_days).mean()
-                df = df.dropna()
-                
-                if not df.empty:
-                    last_close = float(df['Close'].iloc[-1])
-                    last_sma = float(df['50_SMA'].iloc[-1])
-                    status.append(last_close > last_sma)
-        except Exception as e:
-            logging.error(f"Error fetching data for {index}: {e}")
-            
+    for data in index_data:
+        if data and data['s'] == 'ok' and data['c']:
+            df = pd.DataFrame({'Close': data['c']})
+            df['50_SMA'] = df['Close'].rolling(window=moving_average_days).mean()
+            df = df.dropna()
+
+            if not df.empty:
+                last_close = float(df['Close'].iloc[-1])
+                last_sma = float(df['50_SMA'].iloc[-1])
+                status.append(last_close > last_sma)
+
     return all(status)
 
 ##################  3. Real-Time VIX Monitoring (5-min Updates) ###########################
-def analyze_intraday_vix():
-    try:
-        end_timestamp = int(datetime.now().timestamp())
-        start_timestamp = end_timestamp - (24 * 60 * 60)  # Last 24 hours
-        
-        data = finnhub_client.stock_candles('UVXY', '5', start_timestamp, end_timestamp)  # Using UVXY as VIX proxy
-        
-        if data['s'] != 'ok' or not data['c']:
-            return 10
-            
-        first_close = data['c'][0]
-        last_close = data['c'][-1]
-        current_vix_change = ((last_close - first_close) / first_close) * 100
-        
-        if current_vix_change < -5:
-            return 20
-        elif current_vix_change > 10:
-            return 0
-        else:
-            return 10
-    except Exception as e:
-        logging.error(f"Error in analyze_intraday_vix: {e}")
+def analyze_intraday_vix(data):
+    if not data or data['s'] != 'ok' or not data['c']:
+        return 10
+
+    first_close = data['c'][0]
+    last_close = data['c'][-1]
+    current_vix_change = ((last_close - first_close) / first_close) * 100
+
+    if current_vix_change < -5:
+        return 20
+    elif current_vix_change > 10:
+        return 0
+    else:
         return 10
 
-##################  4. Real-Time Market Breadth (A/D Ratio & Put/Call Ratio) ###########################
-def get_realtime_ad_ratio():
-    try:
-        advancing_stocks = web_scrap("https://finviz.com/screener.ashx?v=111&f=ta_change_u&ft=4")
-        declining_stocks = web_scrap("https://finviz.com/screener.ashx?v=111&f=ta_change_d&ft=4")
-        advancers = int(advancing_stocks.find(id="screener-total").text.split("/")[1].strip())
-        decliners = int(declining_stocks.find(id="screener-total").text.split("/")[1].strip())
-        return advancers / decliners if decliners > 0 else 1
-    except:
+##################  4. Real-Time Market Breadth (A/D Ratio from the full-market snapshot) ###########################
+def get_realtime_ad_ratio(breadth):
+    if not breadth:
         return 1
+    return breadth['ad_ratio']
+
+##################  5. Intraday Sector Strength Analysis (sector ETF above its session VWAP) ###########################
+def analyze_intraday_sector_strength(breadth):
+    if not breadth:
+        return 0
+    sectors = breadth['sector_strength']['sectors']
+    return sum(10 for sector in SECTORS if sector in sectors and sectors[sector]['above_vwap'])
+
+class MarketContextService:
+    """Fetches every market context input concurrently under one rate limit and scores the result"""
+
+    def __init__(self):
+        config = get_config()
+        self.finnhub_client = finnhub.Client(api_key=config.FINNHUB_API_KEY)
+        self.finnhub_client.API_URL = config.FINNHUB_API_URL
+        self.executor = ThreadPoolExecutor(max_workers=config.MARKET_CONTEXT_WORKERS, thread_name_prefix='market_context')
+        self.limiter = TokenBucket(config.MARKET_CONTEXT_RATE, config.MARKET_CONTEXT_BURST)
+        self.cache = TTLCache(self.executor)
 
-##################  5. Intraday Sector Strength Analysis (15-min EMA 9 vs. EMA 20) ###########################
-def analyze_intraday_sector_strength():
-    sectors = ["XLE", "XLF", "XLK", "XLY", "XLV", "XLI"]
-    sector_scores = []
-    
-    end_timestamp = int(datetime.now().timestamp())
-    start_timestamp = end_timestamp - (5 * 24 * 60 * 60)
-    
-    for sector in sectors:
+    def _limited(self, request):
+        if not self.limiter.acquire():
+            raise TimeoutError("Market context rate limit wait exceeded")
+        return request()
+
+    def _fetch_candles(self, symbol, resolution, lookback):
+        end_timestamp = int(clock.time())
+        data = self._limited(lambda: self.finnhub_client.stock_candles(symbol, resolution, end_timestamp - lookback, end_timestamp))
+        if data.get('s') not in ('ok', 'no_data'):
+            raise ValueError(f"Unexpected candle status {data.get('s')} for {symbol}")
+        return data
+
+    def _cached(self, key, loader, fresh, stale):
         try:
-            data = finnhub_client.stock_candles(sector, '15', start_timestamp, end_timestamp)
-            
-            if data['s'] == 'ok' and data['c']:
-                df = pd.DataFrame({'Close': data['c']})
-                df['EMA9'] = df['Close'].ewm(span=9, adjust=False).mean()
-                df['EMA20'] = df['Close'].ewm(span=20, adjust=False).mean()
-                
-                if df['EMA9'].iloc[-1] > df['EMA20'].iloc[-1]:
-                    sector_scores.append(10)
+            return self.cache.get(key, loader, fresh, stale)
         except Exception as e:
-            logging.error(f"Error analyzing sector {sector}: {e}")
-            
-    return sum(sector_scores)
+            logging.error(f"Error fetching market context {key}: {e}")
+            return None, None
 
-##################  6. Intraday Macro Score Calculation ###########################
-def intraday_macro_analysis():
-    score = 0
-    intraday_emas = calculate_intraday_emas()
-    intraday_indices = check_intraday_indices_above_moving_average()
-    intraday_vix = analyze_intraday_vix()
-    intraday_ad_ratio = get_realtime_ad_ratio()
-    intraday_sector_strength = analyze_intraday_sector_strength()
-    
-    if intraday_emas:
-        score += 25
-    if intraday_indices:
-        score += 20
-    score += intraday_vix
-    score += intraday_ad_ratio * 10  # A/D ratio scaled to a score
-    score += intraday_sector_strength
-    
-    if score >= 80:
-        signal = "Best Momentum Conditions (STRONG_BUY)"
-    elif score >= 60:
-        signal = "Good Momentum Conditions (BUY)"
-    elif score >= 41:
-        signal = "Neutral / Mixed Market (HOLD)"
-    elif score >= 21:
-        signal = "Good Bearish Conditions (WEAK_SELL)"
-    else:
-        signal = "Best Bearish Conditions (SELL)"
-    
-    return {
-        'score': score,
-        'signal': signal,
-        'timestamp': get_current_time().strftime('%Y-%m-%d %H:%M:%S'),
-        'components': {
-            'momentum': intraday_emas,
-            'nasdaq_dow': intraday_indices,
-            'vix': intraday_vix,
-            'breadth': intraday_ad_ratio,
-            'sector_strength': intraday_sector_strength
+    def fetch_inputs(self):
+        """Returns (candles keyed by symbol, degraded input names)"""
+        futures = {}
+        for symbol, resolution, lookback, fresh, stale in CANDLE_SERIES:
+            loader = lambda symbol=symbol, resolution=resolution, lookback=lookback: self._fetch_candles(symbol, resolution, lookback)
+            futures[symbol] = self.executor.submit(self._cached, ('candles', symbol, resolution), loader, fresh, stale)
+
+        inputs = {}
+        degraded = []
+        for name, future in futures.items():
+            value, is_stale = future.result()
+            inputs[name] = value
+            if value is None:
+                degraded.append(name)
+            elif is_stale:
+                degraded.append(f"{name} (stale)")
+        return inputs, degraded
+
+    def analyze(self, breadth=None):
+        """Score the market from the remote candles and the locally computed snapshot breadth"""
+        inputs, degraded = self.fetch_inputs()
+        if not breadth:
+            degraded.append('breadth')
+
+        score = 0
+        intraday_emas = calculate_intraday_emas(inputs['SPY'])
+        intraday_indices = check_intraday_indices_above_moving_average([inputs[index] for index in INDICES])
+        intraday_vix = analyze_intraday_vix(inputs['UVXY'])
+        intraday_ad_ratio = get_realtime_ad_ratio(breadth)
+        intraday_sector_strength = analyze_intraday_sector_strength(breadth)
+
+        if intraday_emas:
+            score += 25
+        if intraday_indices:
+            score += 20
+        score += intraday_vix
+        score += intraday_ad_ratio * 10  # A/D ratio scaled to a score
+        score += intraday_sector_strength
+
+        if score >= 80:
+            signal = "Best Momentum Conditions (STRONG_BUY)"
+        elif score >= 60:
+            signal = "Good Momentum Conditions (BUY)"
+        elif score >= 41:
+            signal = "Neutral / Mixed Market (HOLD)"
+        elif score >= 21:
+            signal = "Good Bearish Conditions (WEAK_SELL)"
+        else:
+            signal = "Best Bearish Conditions (SELL)"
+
+        if degraded:
+            logging.warning(f"Market context computed with degraded inputs: {degraded}")
+
+        return {
+            'score': score,
+            'signal': signal,
+            'timestamp': get_current_time().strftime('%Y-%m-%d %H:%M:%S'),
+            'components': {
+                'momentum': intraday_emas,
+                'nasdaq_dow': intraday_indices,
+                'vix': intraday_vix,
+                'breadth': intraday_ad_ratio,
+                'sector_strength': intraday_sector_strength
+            },
+            'degraded': degraded,
         }
-    }
\ No newline at end of file
+
+market_context_service = MarketContextService()
+
+##################  6. Intraday Macro Score Calculation ###########################
+def intraday_macro_analysis(breadth=None):
+    return market_context_service.analyze(breadth)
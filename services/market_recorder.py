@@ -0,0 +1,88 @@
+import os
+import gzip
+import json
+import time
+import atexit
+import logging
+import threading
+from typing import Dict, Any, Iterator, Optional
+from config import get_config
+from utils.util import get_current_time
+
+STREAMS = ['history', 'tick', 'candlestick', 'orderbook']
+
+def _json_default(value):
+    # numpy scalars from moomoo DataFrames
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+def recording_path(record_dir: str, date: str, ticker: str) -> str:
+    return os.path.join(record_dir, date, f'{ticker}.jsonl.gz')
+
+def read_recording(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the {'ts', 'stream', 'data'} records of a recording in write order"""
+    with gzip.open(path, 'rt') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # A truncated last line is expected if the recording process was killed
+                logging.warning(f"Skipping corrupt record in {path}")
+
+class MarketRecorder:
+    """Appends the raw inbound moomoo streams of a ticker to a gzip JSONL file per day"""
+
+    def __init__(self, flush_interval: float = 1.0):
+        self.record_dir = get_config().MARKET_RECORD_DIR
+        self.flush_interval = flush_interval
+        self.files = {}  # {ticker: (date, gzip file)}
+        self.last_flush = time.time()
+        self.lock = threading.Lock()
+        atexit.register(self.close)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.record_dir)
+
+    def _file(self, ticker: str):
+        date = get_current_time().strftime('%Y-%m-%d')
+        current = self.files.get(ticker)
+        if current and current[0] == date:
+            return current[1]
+        if current:
+            current[1].close()
+        path = recording_path(self.record_dir, date, ticker)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Append mode adds a new gzip member, so restarts keep earlier records readable
+        f = gzip.open(path, 'at')
+        self.files[ticker] = (date, f)
+        return f
+
+    def record(self, ticker: str, stream: str, data: Any, ts: Optional[float] = None):
+        if not self.enabled:
+            return
+        try:
+            line = json.dumps({'ts': ts or time.time(), 'stream': stream, 'data': data}, default=_json_default)
+            with self.lock:
+                self._file(ticker).write(line + '\n')
+                if time.time() - self.last_flush >= self.flush_interval:
+                    for _, f in self.files.values():
+                        f.flush()
+                    self.last_flush = time.time()
+        except Exception as e:
+            logging.error(f"Failed to record {stream} for {ticker}: {e}")
+
+    def close(self):
+        with self.lock:
+            for _, f in self.files.values():
+                try:
+                    f.close()
+                except Exception as e:
+                    logging.error(f"Failed to close recording: {e}")
+            self.files = {}
+
+market_recorder = MarketRecorder()
@@ -5,6 +5,8 @@ import pandas as pd
 from moomoo import *
 from core.socketio_instance import socketio
 from services.redis_manager import redis_manager
+from services.latency_tracer import latency_tracer
+from services.rate_limiter import rate_limiter, PRIORITY_HIGH
 
 class TradeOrderHandler(TradeOrderHandlerBase):
     """ order update push"""
@@ -335,6 +337,10 @@ class MoomooAccount:
             else:
                 self.logger.error(f"Failed to get margin orders: {data}")
 
+    def _throttle(self, request):
+        """Wait for the account's OpenD trade quota, at most a second on the live trading path"""
+        rate_limiter.acquire(f'moomoo:{request}', PRIORITY_HIGH, timeout=1, scope=str(self.id))
+
     def place_buy_order(self, ticker, price, quantity=1, with_trailing_stop=True):
         can_buy, reason = self.can_buy(ticker, price)
         if not can_buy:
@@ -343,6 +349,7 @@ class MoomooAccount:
 
         quantity = int(self.trading_amount / price)
 
+        self._throttle('place_order')
         ret, data = self.trade_ctx.place_order(
             price=price,
             qty=quantity,
@@ -371,6 +378,7 @@ class MoomooAccount:
             self.logger.info(f"🔴 {self.id} No place sell order for {ticker}: {reason}")
             return RET_ERROR, reason
 
+        self._throttle('place_order')
         ret, data = self.trade_ctx.place_order(
             price=price,
             qty=quantity,
@@ -408,6 +416,7 @@ class MoomooAccount:
         while True:
             self.logger.info(f"🟡 {self.id} Attempting to sell {ticker} at ${current_price:.2f}")
             
+            self._throttle('place_order')
             ret, data = self.trade_ctx.place_order(
                 price=current_price,
                 qty=quantity,
@@ -501,6 +510,7 @@ class MoomooAccount:
         return False
 
     def modify_sell_price(self, order_id, price):
+        self._throttle('modify_order')
         ret, data = self.trade_ctx.modify_order(
             modify_order_op=ModifyOrderOp.NORMAL,
             order_id=order_id,
@@ -517,6 +527,7 @@ class MoomooAccount:
 
     def cancel_order(self, order_id):
         try:
+            self._throttle('modify_order')
             ret, data = self.trade_ctx.modify_order(
                 price=0,
                 qty=0,
@@ -537,6 +548,7 @@ class MoomooAccount:
             return RET_ERROR, str(e)
 
     def place_trailing_stop_order(self, ticker, quantity):
+        self._throttle('place_order')
         ret2, data2 = self.trade_ctx.place_order(
             price=0,
             qty=quantity,
@@ -577,6 +589,7 @@ class MoomooAccount:
                 continue
 
             trail_value = atr * 1.5
+            self._throttle('modify_order')
             self.trade_ctx.modify_order(
                 modify_order_op=ModifyOrderOp.NORMAL,
                 price=order['price'],
@@ -597,7 +610,7 @@ class MoomooAccount:
         has_hold_position = ticker in positions and positions[ticker]['qty'] > 0
         return has_hold_position
 
-    def buy_with_smart_sell(self, ticker, with_smart_sell = True):
+    def buy_with_smart_sell(self, ticker, with_smart_sell = True, trace = None):
         status, reason = self.can_buy(ticker)
         if not status:
             self.logger.error(f"Failed to buy {ticker}, {reason}")
@@ -612,6 +625,7 @@ class MoomooAccount:
         if qty == 0:
             return False, f"🔴 {self.id} No buy for {ticker}: Qty is 0"
 
+        self._throttle('place_order')
         ret, data = self.trade_ctx.place_order(
             price=ask_price,
             qty=qty,
@@ -632,6 +646,11 @@ class MoomooAccount:
         order = data.iloc[0]
         self.buy_timestamps[ticker] = time.time()
 
+        if trace:
+            latency_tracer.record_since('order', trace.get('received_ts'))
+            latency_tracer.record_since('end_to_end', trace.get('source_ts'))
+            self.logger.info(f"🟢 {self.id} Buy order {order['order_id']} for {ticker} trace {trace.get('trace_id')}: {(time.time() - trace.get('source_ts')) * 1000:.0f}ms since source")
+
         cancel_unfilled_thread = threading.Thread(target=self.cancel_unfilled_order, args=(ticker, order['order_id'], order['price'], order['qty'], with_smart_sell))
         cancel_unfilled_thread.start()
 
@@ -655,6 +674,7 @@ class MoomooAccount:
         if not is_filled:
             while True:
                 self.logger.info(f"🟡 {self.id} Cancelling unfilled order {order_id} for {ticker}")
+                self._throttle('modify_order')
                 ret, data = self.trade_ctx.modify_order(
                     modify_order_op=ModifyOrderOp.CANCEL,
                     order_id=order_id,
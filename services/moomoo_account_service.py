@@ -5,6 +5,7 @@ from core.db import get_db, MoomooAccount, User
 from services.moomoo_account import MoomooAccount as MoomooAccountClass
 from config import get_config
 from services.redis_manager import redis_manager
+from services.auth_service import auth_service
 
 config = get_config()
 
@@ -132,6 +133,7 @@ class MoomooAccountService:
                 
                 account.updatedAt = datetime.utcnow()
                 db.commit()
+                auth_service.invalidate_user(account.userId)
                 
                 return {
                     'success': True,
@@ -199,6 +201,7 @@ class MoomooAccountService:
                 account.marginAccountId = int(moomoo_account.margin_account_id)
                 account.updatedAt = datetime.utcnow()
                 db.commit()
+                auth_service.invalidate_user(account.userId)
                 return {
                     'success': True,
                     'message': 'Open configuration assigned successfully'
@@ -225,6 +228,7 @@ class MoomooAccountService:
                 account.approvedBy = int(admin_user_id)
                 account.updatedAt = datetime.utcnow()
                 db.commit()
+                auth_service.invalidate_user(account.userId)
                 return {
                     'success': True,
                     'message': 'Account connection approved successfully'
@@ -252,6 +256,7 @@ class MoomooAccountService:
                 account.rejectionReason = reason
                 account.updatedAt = datetime.utcnow()
                 db.commit()
+                auth_service.invalidate_user(account.userId)
                 return {
                     'success': True,
                     'message': 'Account connection rejected successfully'
@@ -303,8 +308,10 @@ class MoomooAccountService:
                         'success': False,
                         'error': 'Account not found'
                     }
+                user_id = account.userId
                 db.delete(account)
                 db.commit()
+                auth_service.invalidate_user(user_id)
                 return {
                     'success': True,
                     'message': 'Account connection deleted successfully'
@@ -426,6 +433,7 @@ class MoomooAccountService:
                 
                 account.updatedAt = datetime.utcnow()
                 db.commit()
+                auth_service.invalidate_user(account.userId)
                 
                 # Update live instance if it exists
                 from services.moomoo_account import moomoo_accounts
@@ -474,6 +482,7 @@ class MoomooAccountService:
                 account.tradingAccount = new_account_type
                 account.updatedAt = datetime.utcnow()
                 db.commit()
+                auth_service.invalidate_user(account.userId)
                 
                 # Update live instance if it exists
                 from services.moomoo_account import moomoo_accounts
@@ -515,6 +524,7 @@ class MoomooAccountService:
                 # For now, we'll use existing fields or you can add suspension tracking
                 
                 db.commit()
+                auth_service.invalidate_user(account.userId)
                 
                 return {
                     'success': True,
@@ -549,6 +559,7 @@ class MoomooAccountService:
                 account.updatedAt = datetime.utcnow()
                 
                 db.commit()
+                auth_service.invalidate_user(account.userId)
                 
                 return {
                     'success': True,
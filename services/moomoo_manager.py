@@ -4,13 +4,17 @@ import time
 import pytz
 import pandas as pd
 import subprocess
-import os
 import psutil
 from datetime import datetime, timedelta
 from moomoo import *
 from config import get_config
 from utils.util import get_current_session, get_current_time
+from utils.trading_calendar import trading_calendar
 from services.redis_manager import redis_manager
+from services.rate_limiter import rate_limiter, PRIORITY_LOW, PRIORITY_NORMAL
+from services.fundamentals_service import fundamentals_service
+from services.worker_pool import WarmWorkerPool, SUBSCRIBE_WORKER_PATH
+from services.candle_archive import candle_archive
 
 class MoomooManager:
     def __init__(self, host, port):
@@ -21,18 +25,16 @@ class MoomooManager:
         
         # Process management
         self.subscribe_processes = {}  # {ticker: subprocess.Popen}
+        self.worker_pool = WarmWorkerPool(get_config().WARM_WORKER_POOL_SIZE)
+        threading.Thread(target=self.worker_pool.fill, daemon=True).start()
         
-        self.market_filter_timestamps = []
-        self.market_snapshot_timestamps = []
-        self.MAX_MARKET_FILTER_IN_THIRTY_SECONDS = 10
-        self.MAX_MARKET_SNAPSHOT_IN_THIRTY_SECONDS = 60
-
         self.lock = threading.Lock()
         
         self._init_quote_ctx(host, port)
 
     def _init_quote_ctx(self, host, port):
         self.quote_ctx = OpenQuoteContext(host, port)
+        threading.Thread(target=trading_calendar.refresh, args=(self.quote_ctx,), daemon=True).start()
         back_data_thread = threading.Thread(target=self._init_back_data, daemon=True)
         back_data_thread.start()
 
@@ -44,48 +46,20 @@ class MoomooManager:
             logging.error(f"Failed to get subscription status: {data}")
             return {}
     
-    def _get_market_filter_sleep_time(self):
-        if len(self.market_filter_timestamps) == 0:
-            return 0
-        current_time = time.time()
-        self.market_filter_timestamps = [ts for ts in self.market_filter_timestamps if ts > current_time - 30]
-        if len(self.market_filter_timestamps) < self.MAX_MARKET_FILTER_IN_THIRTY_SECONDS:
-            return 0
-        wait_time = self.market_filter_timestamps[0] + 30 - current_time
-        return wait_time
-    
-    def _record_market_filter_timestamp(self):
-        self.market_filter_timestamps.append(time.time())
-    
-    def _get_market_snapshot_sleep_time(self):
-        if len(self.market_snapshot_timestamps) == 0:
-            return 0
-        current_time = time.time()
-        self.market_snapshot_timestamps = [ts for ts in self.market_snapshot_timestamps if ts > current_time - 30]
-        if len(self.market_snapshot_timestamps) < self.MAX_MARKET_SNAPSHOT_IN_THIRTY_SECONDS:
-            return 0
-        wait_time = self.market_snapshot_timestamps[0] + 30 - current_time
-        return wait_time
-    
-    def _record_market_snapshot_timestamp(self):
-        self.market_snapshot_timestamps.append(time.time())
-
     def market_filter(self, filters):
         all_results = []
         page = 0
         page_size = 200
 
         while True:
-            sleep_time = self._get_market_filter_sleep_time()
-            if sleep_time > 0:
-                time.sleep(sleep_time)
-            
+            if not rate_limiter.acquire('moomoo:stock_filter', PRIORITY_LOW, timeout=60):
+                continue
+
             ret, ls = self.quote_ctx.get_stock_filter(
                 market=Market.US,
                 filter_list=filters,
                 begin=page * page_size
             )
-            self._record_market_filter_timestamp()
 
             if ret != RET_OK:
                 logging.error(f"Failed to get market filter: {ls}")
@@ -100,7 +74,6 @@ class MoomooManager:
                 break
 
             page += 1
-            time.sleep(0.1)
 
         # Get basic info to filter for main exchanges
         stock_ret, stock_data = self.quote_ctx.get_stock_basicinfo(Market.US, SecurityType.STOCK, [item.stock_code for item in all_results])    
@@ -108,13 +81,15 @@ class MoomooManager:
             logging.error(f"Error getting stock basic info: {stock_ret}")
             return []
     
-        main_exchange_stocks = stock_data[stock_data['exchange_type'].isin([ExchType.US_NASDAQ, ExchType.US_NYSE, ExchType.US_AMEX])]['code'].tolist()
+        main_exchange_stocks = stock_data[stock_data['exchange_type'].isin([ExchType.US_NASDAQ, ExchType.US_NYSE, ExchType.US_AMEX])]
+        exchanges = dict(zip(main_exchange_stocks['code'], main_exchange_stocks['exchange_type']))
 
         # Filter for main exchanges
         all_results = [{
             "ticker": item.stock_code,
+            "exchange": exchanges[item.stock_code],
             **{filter.stock_field: item[filter] for filter in filters}
-        } for item in all_results if item.stock_code in main_exchange_stocks]
+        } for item in all_results if item.stock_code in exchanges]
 
         return all_results
 
@@ -124,11 +99,10 @@ class MoomooManager:
 
         for i in range(0, len(tickers), batch_size):
             batch_codes = tickers[i:i + batch_size]
-            sleep_time = self._get_market_snapshot_sleep_time()
-            if sleep_time > 0:
-                time.sleep(sleep_time)
+            if not rate_limiter.acquire('moomoo:market_snapshot', PRIORITY_LOW, timeout=60):
+                logging.error(f"Skipping market snapshot batch {i//batch_size + 1}: rate limit wait exceeded")
+                continue
             ret, snapshot = self.quote_ctx.get_market_snapshot(batch_codes)
-            self._record_market_snapshot_timestamp()
 
             if ret != RET_OK:
                 logging.error(f"Error getting market snapshot for batch {i//batch_size + 1}: {ret}")
@@ -136,7 +110,6 @@ class MoomooManager:
 
             all_snapshots.append(snapshot)
             logging.info(f"Retrieved {len(all_snapshots)} snapshots out of {len(tickers)} total")
-            time.sleep(0.1)
 
         return pd.concat(all_snapshots)
 
@@ -149,6 +122,8 @@ class MoomooManager:
                 est = pytz.timezone('US/Eastern')
                 date = datetime.now(est).strftime('%Y-%m-%d')
 
+            if not rate_limiter.acquire('moomoo:history_kline', PRIORITY_NORMAL, timeout=10):
+                return False, []
             ret, data, _ = self.quote_ctx.request_history_kline(ticker, start=date, end=date, ktype=KLType.K_1M, extended_time=True, max_count=None)
             
             if ret != RET_OK:
@@ -163,13 +138,16 @@ class MoomooManager:
             logging.error(f"Error getting candles for {ticker}: {e}")
             return False, []
 
-    def subscribe_stocks(self, tickers, mode):
-        subscribe_worker_path = os.path.join(os.path.dirname(__file__), "../subscribe_worker.py")
-            
+    def subscribe_stocks(self, tickers, mode, requested_ts=None):
+        requested_ts = requested_ts or time.time()
         for ticker in tickers:
             if ticker not in self.subscribe_processes:
                 try:
-                    process = subprocess.Popen(["python", subscribe_worker_path, ticker, "--mode", str(mode)])
+                    # A warm worker is already connected to OpenD; start a cold one only when the pool is drained
+                    process = self.worker_pool.assign(ticker, str(mode), requested_ts)
+                    if process is None:
+                        logging.warning(f"No warm subscribe worker available for {ticker}, starting a cold one")
+                        process = subprocess.Popen(["python", SUBSCRIBE_WORKER_PATH, ticker, "--mode", str(mode), "--requested-ts", str(requested_ts)])
                     with self.lock:
                         self.subscribe_processes[ticker] = {
                             'process': process,
@@ -219,6 +197,7 @@ class MoomooManager:
                         logging.error(f"Error terminating process tree for {ticker}: {e}")
                     finally:
                         del self.subscribe_processes[ticker]
+                        candle_archive.archive(ticker)
                         redis_manager.remove_all_stock_data(ticker)
 
     def get_subscribe_processes(self):
@@ -269,13 +248,23 @@ class MoomooManager:
                 filtered_stocks = self.market_filter([price_filter, float_filter, avg_volume_filter])
                 logging.info(f"Filtered stocks: {[stock['ticker'] for stock in filtered_stocks]}")
 
-                for stock in filtered_stocks:
-                    moomoo_ticker = stock['ticker']
-                    redis_manager.set_float_share(moomoo_ticker, stock[float_filter.stock_field] * 1000)
-                    redis_manager.set_avg_30d_volume(moomoo_ticker, stock[avg_volume_filter.stock_field])
+                redis_manager.set_float_shares({stock['ticker']: stock[float_filter.stock_field] * 1000 for stock in filtered_stocks})
+                redis_manager.set_avg_30d_volumes({stock['ticker']: stock[avg_volume_filter.stock_field] for stock in filtered_stocks})
+
+                snapshots = self._init_prev_close_prices([stock['ticker'] for stock in filtered_stocks])
+
+                fundamentals = {stock['ticker']: {
+                    'float': stock[float_filter.stock_field] * 1000,
+                    'avg_30d_volume': stock[avg_volume_filter.stock_field],
+                    'exchange': stock['exchange'],
+                } for stock in filtered_stocks}
+                for code, outstanding_shares, prev_close_price in zip(snapshots['code'], snapshots['outstanding_shares'], snapshots['prev_close_price']):
+                    fundamentals.setdefault(code, {}).update({
+                        'outstanding_shares': float(outstanding_shares),
+                        'prev_close': float(prev_close_price),
+                    })
+                fundamentals_service.store(fundamentals)
 
-                self._init_prev_close_prices()
-                
                 logging.info("Initialized back data")
             except Exception as e:
                 logging.error(f"Error initializing back data: {e}")
@@ -293,13 +282,13 @@ class MoomooManager:
             logging.info(f"Sleeping for {sleep_seconds} seconds until {post_market_start_time}")
             time.sleep(sleep_seconds)
 
-    def _init_prev_close_prices(self):
-        snapshots = self.market_snapshot([ticker for ticker in redis_manager.get_tickers_in_float_share()])
+    def _init_prev_close_prices(self, tickers):
+        snapshots = self.market_snapshot(tickers)
         field_name = 'last_price'
         if get_current_session() == 'regular':
             field_name = 'prev_close_price'
 
-        for _, row in snapshots.iterrows():
-            redis_manager.set_prev_close_price(row['code'], row[field_name])
+        redis_manager.set_prev_close_prices(dict(zip(snapshots['code'], snapshots[field_name].astype(float))))
+        return snapshots
 
 moomoo_manager = MoomooManager(get_config().MOOMOO_HOST, get_config().MOOMOO_PORT1)
\ No newline at end of file
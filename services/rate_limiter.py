@@ -0,0 +1,62 @@
+import time
+import logging
+from typing import Dict, Tuple
+from config import get_config
+from services.redis_manager import redis_manager
+
+# Priorities, highest first; lower priorities must leave a share of the bucket untouched
+PRIORITY_HIGH = 0       # live trading paths
+PRIORITY_NORMAL = 1     # subscriptions and backfills
+PRIORITY_LOW = 2        # scanners and background refreshes
+RESERVED_SHARE = {PRIORITY_HIGH: 0.0, PRIORITY_NORMAL: 0.1, PRIORITY_LOW: 0.3}
+
+def _limits() -> Dict[str, Tuple[int, float]]:
+    """Bucket capacity and refill rate per second of every endpoint"""
+    config = get_config()
+    return {
+        # OpenD quote quotas are counted per 30 seconds
+        'moomoo:stock_filter': (10, 10 / 30),
+        'moomoo:market_snapshot': (60, 60 / 30),
+        'moomoo:history_kline': (60, 60 / 30),
+        'moomoo:trading_days': (30, 30 / 30),
+        # OpenD trade quotas are counted per 30 seconds and per account
+        'moomoo:place_order': (15, 15 / 30),
+        'moomoo:modify_order': (20, 20 / 30),
+        'polygon:rest': (config.POLYGON_RATE_BURST, config.POLYGON_RATE_LIMIT),
+    }
+
+class RateLimiter:
+    """Token buckets in Redis keyed by API endpoint, shared by every process using the same quota"""
+
+    def __init__(self):
+        self.limits = _limits()
+
+    def acquire(self, endpoint: str, priority: int = PRIORITY_NORMAL, timeout: float = 30, scope: str = None) -> bool:
+        """Wait up to timeout seconds for a token; scope splits the bucket, e.g. per trading account"""
+        capacity, rate = self.limits[endpoint]
+        key = f'{endpoint}:{scope}' if scope else endpoint
+        reserve = capacity * RESERVED_SHARE[priority]
+        started = time.time()
+        deadline = started + timeout
+        while True:
+            result = redis_manager.take_rate_limit_token(key, capacity, rate, reserve, time.time() - started)
+            if result is None:
+                # Never stall API calls on a Redis outage; OpenD still enforces its own limits
+                return True
+            allowed, wait = result
+            if allowed:
+                if time.time() - started > 1:
+                    logging.info(f"Rate limited {key} for {time.time() - started:.2f}s")
+                return True
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                logging.warning(f"Gave up waiting for {key} rate limit after {timeout}s")
+                redis_manager.record_rate_limit_timeout(key)
+                return False
+            # Higher priorities poll more often so they take freed tokens first
+            time.sleep(min(wait, remaining, 0.05 * (priority + 1)))
+
+    def get_metrics(self):
+        return redis_manager.get_rate_limit_metrics()
+
+rate_limiter = RateLimiter()
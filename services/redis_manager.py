@@ -1,16 +1,163 @@
-import redis
 import json
+import time
 import logging
 import pandas as pd
 from datetime import datetime, timedelta
 from config import get_config
 from typing import Dict, Any, List
-from utils.util import get_moomoo_ticker, get_current_time
+from utils.util import get_moomoo_ticker, get_current_time, apply_offset_est
+from services.redis_metrics import InstrumentedRedis, redis_metrics, track_methods, ENABLED_KEY, SOURCES_KEY
 
+# Token bucket shared by every process: refills from Redis TIME, keeps `reserve` tokens for higher
+# priorities and counts grants and throttled attempts per endpoint
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local reserve = tonumber(ARGV[3])
+local waited = tonumber(ARGV[4])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - updated, 0) * rate)
+local allowed = 0
+local wait = 0
+if tokens - 1 >= reserve then
+    tokens = tokens - 1
+    allowed = 1
+    redis.call('HINCRBY', KEYS[2], 'granted', 1)
+    if waited > 0 then
+        redis.call('HINCRBY', KEYS[2], 'delayed', 1)
+        redis.call('HINCRBYFLOAT', KEYS[2], 'wait_seconds', waited)
+    end
+else
+    wait = (1 + reserve - tokens) / rate
+    redis.call('HINCRBY', KEYS[2], 'throttled', 1)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+redis.call('SADD', KEYS[3], ARGV[5])
+return {allowed, tostring(wait)}
+"""
+
+# Per-ticker activity since subscribe, maintained on candle upsert: closed candle count, zero-volume
+# candle count and streak, the candle still open and the last time volume was seen. KEYS = activity hash,
+# state hash: tickers subscribed before the activity hash existed start counting from their subscribed_time
+CANDLE_ACTIVITY_SCRIPT = """
+local subscribed = redis.call('HGET', KEYS[1], 'subscribed')
+if not subscribed then
+    subscribed = redis.call('HGET', KEYS[2], 'subscribed_time')
+    if subscribed then
+        redis.call('HSET', KEYS[1], 'subscribed', subscribed, 'candles', 0, 'zero_volume', 0, 'zero_streak', 0)
+    end
+end
+local timestamp = ARGV[1]
+local volume = tonumber(ARGV[2])
+if not subscribed or timestamp < subscribed then
+    return 0
+end
+local open_ts = redis.call('HGET', KEYS[1], 'open_ts')
+if open_ts and timestamp < open_ts then
+    return 0
+end
+if open_ts ~= timestamp then
+    if open_ts then
+        redis.call('HINCRBY', KEYS[1], 'candles', 1)
+        if tonumber(redis.call('HGET', KEYS[1], 'open_volume')) == 0 then
+            redis.call('HINCRBY', KEYS[1], 'zero_volume', 1)
+            redis.call('HINCRBY', KEYS[1], 'zero_streak', 1)
+        else
+            redis.call('HSET', KEYS[1], 'zero_streak', 0)
+        end
+    end
+    redis.call('HSET', KEYS[1], 'open_ts', timestamp)
+end
+redis.call('HSET', KEYS[1], 'open_volume', volume)
+if volume > 0 then
+    redis.call('HSET', KEYS[1], 'last_trade_ts', ARGV[3])
+end
+return 1
+"""
+
+# Materialized dashboard rows: KEYS = rows hash (with a __version__ counter), row versions zset, removed
+# tickers zset, the ticker's state hash; ARGV = ticker, row json ('' removes the row). Returns the new
+# dashboard version, or nil when the ticker is no longer subscribed so a late write cannot re-add its row
+DASHBOARD_ROW_SCRIPT = """
+if ARGV[2] ~= '' and redis.call('HEXISTS', KEYS[4], 'subscribed_time') == 0 then
+    return false
+end
+local version = redis.call('HINCRBY', KEYS[1], '__version__', 1)
+if ARGV[2] == '' then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+    redis.call('ZREM', KEYS[2], ARGV[1])
+    redis.call('ZADD', KEYS[3], version, ARGV[1])
+else
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+    redis.call('ZADD', KEYS[2], version, ARGV[1])
+    redis.call('ZREM', KEYS[3], ARGV[1])
+end
+return version
+"""
+
+# Dashboard rows changed and tickers removed after version ARGV[1], with the current version
+DASHBOARD_DELTA_SCRIPT = """
+local version = redis.call('HGET', KEYS[1], '__version__') or '0'
+local changed = redis.call('ZRANGEBYSCORE', KEYS[2], '(' .. ARGV[1], '+inf')
+local rows = {}
+if #changed > 0 then
+    rows = redis.call('HMGET', KEYS[1], unpack(changed))
+end
+local removed = redis.call('ZRANGEBYSCORE', KEYS[3], '(' .. ARGV[1], '+inf')
+return {version, rows, removed}
+"""
+DASHBOARD_KEYS = ['dashboard:rows', 'dashboard:versions', 'dashboard:removed']
+# Tickers whose price, volume, prev close or strategy changed since their row was last materialized
+DASHBOARD_DIRTY_KEY = 'dashboard:dirty'
+DASHBOARD_FLUSH_SECONDS = 1
+
+# Cache a verified principal unless its user was invalidated after the generation was read:
+# KEYS = principal, user's principal set, user generation; ARGV = principal json, ttl, generation, set ttl
+AUTH_PRINCIPAL_SCRIPT = """
+if (redis.call('GET', KEYS[3]) or '0') ~= ARGV[3] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('SADD', KEYS[2], KEYS[1])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+return 1
+"""
+
+# Latest-value state of a subscribed ticker lives in one hash, stocks:{ticker}:state; list-typed history
+# (candles, indicator series, orderbook, strategy history) keeps its own keys
+INDICATORS = [
+    'VWAP', 'RSI', 'StochRSI_K', 'StochRSI_D', 'MACD', 'MACD_signal', 'MACD_hist', 'ADX', 'DMP', 'DMN',
+    'Supertrend', 'Trend', 'PSAR_L', 'PSAR_S', 'PSAR_R', 'EMA200', 'EMA21', 'EMA9', 'EMA4', 'EMA5',
+    'VWAP_Slope', 'Volume_Ratio', 'ROC', 'Williams_R', 'ATR', 'HOD', 'ATR_to_HOD', 'ATR_to_VWAP', 'ZenP',
+    'RVol', 'BB_lower', 'BB_mid', 'BB_upper',
+]
+SCORES = ['technical_score', 'confirmation_score', 'volume_score', 'momentum_score', 'trend_score', 'volatility_score']
+
+def _state_key(ticker: str) -> str:
+    return f'stocks:{ticker}:state'
+
+def _float(value, default=0.0):
+    try:
+        return float(value) if value not in (None, '') else default
+    except (TypeError, ValueError):
+        return default
+
+@track_methods
 class RedisManager:
     def __init__(self):
         config = get_config()
-        self.redis_client = redis.from_url(config.REDIS_URL, decode_responses=True)
+        self.redis_client = InstrumentedRedis.from_url(config.REDIS_URL, decode_responses=True)
+        redis_metrics.attach(self.redis_client)
+        self.token_bucket = self.redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+        self.candle_activity = self.redis_client.register_script(CANDLE_ACTIVITY_SCRIPT)
+        self.dashboard_row = self.redis_client.register_script(DASHBOARD_ROW_SCRIPT)
+        self.dashboard_delta = self.redis_client.register_script(DASHBOARD_DELTA_SCRIPT)
+        self.auth_principal = self.redis_client.register_script(AUTH_PRINCIPAL_SCRIPT)
 
     def publish(self, channel: str, message: Dict[str, Any]):
         """Publish a message to a channel"""
@@ -149,6 +296,14 @@ class RedisManager:
             logging.error(f"Failed to get account margin settled balance from Redis: {e}")
             return None
 
+    def _mset_chunked(self, prefix: str, values: Dict[str, Any], chunk_size: int = 1000):
+        """Write {prefix}:{ticker} keys with one MSET per chunk in a single pipeline round trip"""
+        items = [(f'{prefix}:{ticker}', value) for ticker, value in values.items()]
+        pipe = self.redis_client.pipeline(transaction=False)
+        for i in range(0, len(items), chunk_size):
+            pipe.mset(dict(items[i:i + chunk_size]))
+        pipe.execute()
+
     def set_float_share(self, ticker: str, float_share: int):
         """Set the float share in Redis"""
         try:
@@ -156,6 +311,14 @@ class RedisManager:
             return True
         except Exception as e:
             logging.error(f"Failed to set float share in Redis: {e}")
+    def set_float_shares(self, float_shares: Dict[str, float]):
+        """Set the float share of many tickers in pipelined chunks"""
+        try:
+            self._mset_chunked('float_share', float_shares)
+            return True
+        except Exception as e:
+            logging.error(f"Failed to set float shares in Redis: {e}")
+            return False
     def get_float_share(self, ticker: str):
         """Get the float share from Redis"""
         try:
@@ -189,6 +352,14 @@ class RedisManager:
             return True
         except Exception as e:
             logging.error(f"Failed to set avg 30d volume in Redis: {e}")
+    def set_avg_30d_volumes(self, avg_30d_volumes: Dict[str, float]):
+        """Set the avg 30d volume of many tickers in pipelined chunks"""
+        try:
+            self._mset_chunked('avg_30d_volume', avg_30d_volumes)
+            return True
+        except Exception as e:
+            logging.error(f"Failed to set avg 30d volumes in Redis: {e}")
+            return False
     def get_avg_30d_volume(self, ticker: str) -> float:
         """Get the avg 30d volume from Redis"""
         try:
@@ -217,7 +388,10 @@ class RedisManager:
     def set_prev_close_price(self, ticker: str, prev_close_price: float):
         """Set the prev close price in Redis"""
         try:
-            self.redis_client.set(f'prev_close_price:{ticker}', prev_close_price)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.set(f'prev_close_price:{ticker}', prev_close_price)
+            pipe.sadd(DASHBOARD_DIRTY_KEY, ticker)
+            pipe.execute()
             self.publish('socket_emit', {
                 'event': 'prev_close_price',
                 'data': {
@@ -228,6 +402,22 @@ class RedisManager:
             return True
         except Exception as e:
             logging.error(f"Failed to set prev close price in Redis: {e}")
+    def set_prev_close_prices(self, prev_close_prices: Dict[str, float]):
+        """Set the prev close price of many tickers in pipelined chunks and emit them as one event"""
+        try:
+            self._mset_chunked('prev_close_price', prev_close_prices)
+            if prev_close_prices:
+                self.redis_client.sadd(DASHBOARD_DIRTY_KEY, *prev_close_prices)
+            self.publish('socket_emit', {
+                'event': 'prev_close_prices',
+                'data': {
+                    'prices': prev_close_prices
+                }
+            })
+            return True
+        except Exception as e:
+            logging.error(f"Failed to set prev close prices in Redis: {e}")
+            return False
     def get_prev_close_price(self, ticker: str):
         """Get the prev close price from Redis"""
         try:
@@ -254,6 +444,103 @@ class RedisManager:
             logging.error(f"Failed to get tickers in prev close price in Redis: {e}")
             return []
 
+    def set_fundamentals(self, fundamentals: Dict[str, Dict[str, Any]], chunk_size: int = 1000):
+        """Merge per-ticker fundamentals into the fundamentals hash in pipelined chunks.
+        Returns the previous and new update times, None on failure"""
+        try:
+            items = [(ticker, json.dumps(record, separators=(',', ':'))) for ticker, record in fundamentals.items()]
+            version = time.time()
+            pipe = self.redis_client.pipeline(transaction=False)
+            for i in range(0, len(items), chunk_size):
+                pipe.hset('fundamentals', mapping=dict(items[i:i + chunk_size]))
+            pipe.getset('fundamentals:updated', version)
+            previous = pipe.execute()[-1]
+            return (float(previous) if previous else None), version
+        except Exception as e:
+            logging.error(f"Failed to set fundamentals in Redis: {e}")
+            return None
+    def get_fundamentals(self):
+        """Get the fundamentals of every cached ticker"""
+        try:
+            return {ticker: json.loads(record) for ticker, record in self.redis_client.hgetall('fundamentals').items()}
+        except Exception as e:
+            logging.error(f"Failed to get fundamentals from Redis: {e}")
+            return {}
+    def get_fundamentals_updated(self):
+        """Get the time the fundamentals hash was last written"""
+        try:
+            data = self.redis_client.get('fundamentals:updated')
+            return float(data) if data else None
+        except Exception as e:
+            logging.error(f"Failed to get fundamentals update time from Redis: {e}")
+            return None
+
+    def set_trading_days(self, trading_days: Dict[str, str], date: str):
+        """Replace the trading calendar ({date: trade date type}) fetched on date"""
+        try:
+            pipe = self.redis_client.pipeline()
+            pipe.delete('calendar:trading_days')
+            if trading_days:
+                pipe.hset('calendar:trading_days', mapping=trading_days)
+            pipe.set('calendar:updated', date)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logging.error(f"Failed to set trading days in Redis: {e}")
+            return False
+    def get_trading_days(self):
+        """Get the trading calendar and the date it was fetched"""
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.hgetall('calendar:trading_days')
+            pipe.get('calendar:updated')
+            trading_days, updated = pipe.execute()
+            return trading_days or {}, updated
+        except Exception as e:
+            logging.error(f"Failed to get trading days from Redis: {e}")
+            return {}, None
+    def get_principal(self, token_id: str):
+        """Get the cached principal of a verified token"""
+        try:
+            principal = self.redis_client.get(f'auth:principal:{token_id}')
+            return json.loads(principal) if principal else None
+        except Exception as e:
+            logging.error(f"Failed to get principal from Redis: {e}")
+            return None
+    def get_principal_generation(self, user_id: str) -> str:
+        """Invalidation counter of a user, read before loading its principal from the database"""
+        try:
+            return self.redis_client.get(f'auth:user:{user_id}:generation') or '0'
+        except Exception as e:
+            logging.error(f"Failed to get principal generation from Redis: {e}")
+            return None
+    def set_principal(self, token_id: str, user_id: str, principal: Dict[str, Any], ttl: int, generation: str, max_ttl: int):
+        """Cache the principal of a verified token unless the user was invalidated since generation"""
+        if generation is None:
+            return False
+        try:
+            return bool(self.auth_principal(
+                keys=[f'auth:principal:{token_id}', f'auth:user:{user_id}:principals', f'auth:user:{user_id}:generation'],
+                args=[json.dumps(principal), ttl, generation, max_ttl],
+            ))
+        except Exception as e:
+            logging.error(f"Failed to set principal in Redis: {e}")
+            return False
+    def invalidate_principals(self, user_id: str):
+        """Drop the cached principals of every token of a user"""
+        try:
+            pipe = self.redis_client.pipeline()
+            pipe.incr(f'auth:user:{user_id}:generation')
+            pipe.smembers(f'auth:user:{user_id}:principals')
+            pipe.delete(f'auth:user:{user_id}:principals')
+            _, principals, _ = pipe.execute()
+            if principals:
+                self.redis_client.delete(*principals)
+            return True
+        except Exception as e:
+            logging.error(f"Failed to invalidate principals in Redis: {e}")
+            return False
+
     def add_polygon_data(self, ticker: str, close: float, volume: int, timestamp: str):
         """Add a polygon message to Redis"""
         try:
@@ -287,6 +574,53 @@ class RedisManager:
             logging.error(f"Failed to get polygon tickers from Redis: {e}")
             return []
 
+    def push_ingest(self, queues: Dict[str, List[str]], caps: Dict[str, int] = None):
+        """Append serialized items to several moomoo:* queues in one pipelined round trip, trimming capped queues
+        to their newest items; returns {key: (length after push, oldest item left)}"""
+        try:
+            caps = caps or {}
+            keys = [key for key, items in queues.items() if items]
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key in keys:
+                pipe.rpush(key, *queues[key])
+                if caps.get(key):
+                    pipe.ltrim(key, -caps[key], -1)
+                pipe.lindex(key, 0)
+            results = iter(pipe.execute())
+            pushed = {}
+            for key in keys:
+                length = next(results)
+                if caps.get(key):
+                    next(results)
+                pushed[key] = (length, next(results))
+            return pushed
+        except Exception as e:
+            logging.error(f"Failed to push ingest batch to Redis: {e}")
+            return None
+    def set_ingest_gauges(self, gauges: Dict[str, Dict[str, Any]]):
+        """Set the depth and age gauges of ingest queues, keyed by stream:ticker"""
+        try:
+            if gauges:
+                self.redis_client.hset('ingest:queues', mapping={name: json.dumps(gauge) for name, gauge in gauges.items()})
+            return True
+        except Exception as e:
+            logging.error(f"Failed to set ingest gauges in Redis: {e}")
+            return False
+    def get_ingest_gauges(self):
+        """Get the depth and age gauges of every ingest queue"""
+        try:
+            return {name: json.loads(gauge) for name, gauge in self.redis_client.hgetall('ingest:queues').items()}
+        except Exception as e:
+            logging.error(f"Failed to get ingest gauges from Redis: {e}")
+            return {}
+    def _pop_all(self, key: str):
+        """Read and clear a queue atomically so items pushed in between are not lost"""
+        pipe = self.redis_client.pipeline()
+        pipe.lrange(key, 0, -1)
+        pipe.delete(key)
+        data, _ = pipe.execute()
+        return data
+
     # moomoo tick data queue
     def push_tick(self, ticker: str, data: Dict[str, Any]):
         """Push tick data to Redis"""
@@ -306,12 +640,22 @@ class RedisManager:
         except Exception as e:
             logging.error(f"Failed to get tick data from Redis: {e}")
             return []
+    def get_last_tick(self, ticker: str):
+        """Get the most recent tick without reading the whole tick list"""
+        try:
+            data = self.redis_client.lindex(f'moomoo:tick:{ticker}', -1)
+            if data is None:
+                return None
+            return json.loads(data)
+        except Exception as e:
+            logging.error(f"Failed to get last tick from Redis: {e}")
+            return None
     def remove_old_tick(self, ticker: str):
         """Remove tick which is older than 60 seconds"""
         try:
             data = self.redis_client.lrange(f'moomoo:tick:{ticker}', 0, -1)
-            if data is None:
-                return False, None
+            if not data:
+                return True, None
             tick_data = [json.loads(item) for item in data]
             for index, item in enumerate(tick_data):
                 if pd.to_datetime(item['time']) >= pd.to_datetime(tick_data[-1]['time']) - timedelta(seconds=60):
@@ -334,8 +678,7 @@ class RedisManager:
     def pop_realtime(self, ticker: str):
         """Pop data from Redis"""
         try:
-            data = self.redis_client.lrange(f'moomoo:realtime:{ticker}', 0, -1)
-            self.redis_client.delete(f'moomoo:realtime:{ticker}')
+            data = self._pop_all(f'moomoo:realtime:{ticker}')
             if data is None:
                 return []
             return [json.loads(item) for item in data]
@@ -355,8 +698,7 @@ class RedisManager:
     def pop_candlestick(self, ticker: str):
         """Pop candlestick data from Redis"""
         try:
-            data = self.redis_client.lrange(f'moomoo:candlestick:{ticker}', 0, -1)
-            self.redis_client.delete(f'moomoo:candlestick:{ticker}')
+            data = self._pop_all(f'moomoo:candlestick:{ticker}')
             if data is None:
                 return []
             return [json.loads(item) for item in data]
@@ -376,8 +718,7 @@ class RedisManager:
     def pop_orderbook(self, ticker: str):
         """Pop orderbook data from Redis"""
         try:
-            data = self.redis_client.lrange(f'moomoo:orderbook:{ticker}', 0, -1)
-            self.redis_client.delete(f'moomoo:orderbook:{ticker}')
+            data = self._pop_all(f'moomoo:orderbook:{ticker}')
             if data is None:
                 return []
             return [json.loads(item) for item in data]
@@ -450,48 +791,26 @@ class RedisManager:
     def get_fast_snapshot(self, ticker: str) -> Dict[str, Any]:
         """Batch-fetch critical indicators and last orderbook snapshot via a single pipeline."""
         try:
-            p = self.redis_client.pipeline()
-            # Scalars (lindex -1), except ATR_Spread which uses get
             scalar_keys = ['VWAP','ATR','ADX','VWAP_Slope','EMA5','EMA4','EMA9','RVol','Volume_Ratio','ATR_to_VWAP','ATR_to_HOD','ZenP','HOD']
-            for k in scalar_keys:
-                p.lindex(f'stocks:{ticker}:{k}', -1)
-            p.get(f'stocks:{ticker}:ATR_Spread')
+            p = self.redis_client.pipeline(transaction=False)
+            p.hmget(_state_key(ticker), [f'ind:{k}' for k in scalar_keys] + ['ATR_Spread', 'price'])
             # ROC last two
             p.lrange(f'stocks:{ticker}:ROC', -2, -1)
             # Last orderbook snapshot
             p.lindex(f'stocks:{ticker}:orderbook', -1)
-            results = p.execute()
+            state, roc_vals, ob_raw = p.execute()
 
-            out: Dict[str, Any] = {}
-            idx = 0
-            for k in scalar_keys:
-                val = results[idx]
-                idx += 1
-                try:
-                    out[k] = float(val) if val is not None else 0.0
-                except Exception:
-                    out[k] = 0.0
-            # ATR_Spread
+            out: Dict[str, Any] = {k: _float(value) for k, value in zip(scalar_keys, state)}
+            out['ATR_Spread'] = _float(state[len(scalar_keys)])
             try:
-                out['ATR_Spread'] = float(results[idx]) if results[idx] is not None else 0.0
-            except Exception:
-                out['ATR_Spread'] = 0.0
-            idx += 1
-            # ROC2
-            try:
-                roc_vals = results[idx] or []
-                out['ROC2'] = [float(x) for x in roc_vals]
+                out['ROC2'] = [float(x) for x in roc_vals or []]
             except Exception:
                 out['ROC2'] = []
-            idx += 1
-            # Orderbook
             try:
-                ob_raw = results[idx]
                 out['orderbook'] = json.loads(ob_raw) if ob_raw else None
             except Exception:
                 out['orderbook'] = None
-            # Current price
-            out['price'] = self.get_stock_price(ticker)
+            out['price'] = _float(state[len(scalar_keys) + 1])
             return out
         except Exception as e:
             logging.error(f"Failed to get fast snapshot for {ticker}: {e}")
@@ -504,14 +823,20 @@ class RedisManager:
     def get_subscribed_time(self, ticker: str):
         """Get the subscribed time of a ticker"""
         try:
-            return self.redis_client.get(f'stocks:{ticker}:subscribed_time')
+            return self.redis_client.hget(_state_key(ticker), 'subscribed_time')
         except Exception as e:
             logging.error(f"Failed to get subscribed time of a ticker in Redis: {e}")
             return None
     def set_subscribed_time(self, ticker: str):
         """Add a ticker to subscribed"""
         try:
-            self.redis_client.set(f'stocks:{ticker}:subscribed_time', get_current_time().strftime('%Y-%m-%d %H:%M:%S'))
+            subscribed_time = get_current_time().strftime('%Y-%m-%d %H:%M:%S')
+            pipe = self.redis_client.pipeline()
+            pipe.hset(_state_key(ticker), 'subscribed_time', subscribed_time)
+            pipe.delete(f'stocks:{ticker}:activity')
+            pipe.hset(f'stocks:{ticker}:activity', mapping={'subscribed': subscribed_time, 'candles': 0, 'zero_volume': 0, 'zero_streak': 0})
+            pipe.execute()
+            self.refresh_dashboard_row(ticker)
             self.publish('socket_emit', {
                 'event': 'stock_update',
                 'data': self.get_stock_data(ticker)
@@ -521,9 +846,84 @@ class RedisManager:
             logging.error(f"Failed to add ticker to subscribed in Redis: {e}")
 
 
+    def record_candle_activity(self, ticker: str, timestamp: str, volume: float):
+        """Update the activity counters of a ticker with an upserted candle"""
+        try:
+            self.candle_activity(keys=[f'stocks:{ticker}:activity', _state_key(ticker)], args=[timestamp, volume, time.time()])
+            return True
+        except Exception as e:
+            logging.error(f"Failed to record candle activity in Redis: {e}")
+            return False
+    def rebuild_candle_activity(self, ticker: str, candles: List[Dict[str, Any]]):
+        """Recount the activity counters of a ticker from its whole candle list, so candles merged by backfill
+        count like upserted ones; the last candle since subscribe stays the open one"""
+        try:
+            activity_key = f'stocks:{ticker}:activity'
+            subscribed = self.redis_client.hget(activity_key, 'subscribed') or self.redis_client.hget(_state_key(ticker), 'subscribed_time')
+            if not subscribed:
+                return False
+            recent = sorted((str(candle['timestamp']), float(candle['volume'])) for candle in candles if str(candle['timestamp']) >= subscribed)
+            if not recent:
+                return False
+            closed = [volume for _, volume in recent[:-1]]
+            zero_streak = 0
+            for volume in reversed(closed):
+                if volume != 0:
+                    break
+                zero_streak += 1
+            activity = {
+                'subscribed': subscribed,
+                'candles': len(closed),
+                'zero_volume': closed.count(0),
+                'zero_streak': zero_streak,
+                'open_ts': recent[-1][0],
+                'open_volume': recent[-1][1],
+            }
+            traded = [timestamp for timestamp, volume in recent if volume > 0]
+            if traded:
+                last_trade_ts = apply_offset_est(datetime.strptime(traded[-1], '%Y-%m-%d %H:%M:%S')).timestamp()
+                activity['last_trade_ts'] = max(last_trade_ts, float(self.redis_client.hget(activity_key, 'last_trade_ts') or 0))
+            self.redis_client.hset(activity_key, mapping=activity)
+            return True
+        except Exception as e:
+            logging.error(f"Failed to rebuild candle activity in Redis: {e}")
+            return False
+    def get_activity(self, tickers: List[str]):
+        """Get the activity counters of many tickers in one round trip, counting the open candle.
+        Tickers without an activity hash count as subscribed at their subscribed_time with no candles yet"""
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for ticker in tickers:
+                pipe.hgetall(f'stocks:{ticker}:activity')
+                pipe.hget(_state_key(ticker), 'subscribed_time')
+            results = pipe.execute()
+            activity = {}
+            for ticker, data, subscribed_time in zip(tickers, results[0::2], results[1::2]):
+                if not data:
+                    if subscribed_time:
+                        activity[ticker] = {'subscribed': subscribed_time, 'candles': 0, 'zero_volume': 0, 'zero_streak': 0, 'last_trade_ts': None}
+                    continue
+                is_open = 'open_ts' in data
+                open_is_zero = is_open and float(data['open_volume']) == 0
+                activity[ticker] = {
+                    'subscribed': data['subscribed'],
+                    'candles': int(data['candles']) + int(is_open),
+                    'zero_volume': int(data['zero_volume']) + int(open_is_zero),
+                    'zero_streak': int(data['zero_streak']) + 1 if open_is_zero else (0 if is_open else int(data['zero_streak'])),
+                    'last_trade_ts': float(data['last_trade_ts']) if 'last_trade_ts' in data else None,
+                }
+            return activity
+        except Exception as e:
+            logging.error(f"Failed to get activity from Redis: {e}")
+            return {}
+
     def set_mode(self, ticker, mode):
         try:
-            return self.redis_client.sadd(f'stocks:{ticker}:mode', mode)
+            added = self.redis_client.sadd(f'stocks:{ticker}:mode', mode)
+            # A mode added to an already subscribed ticker changes its materialized dashboard row
+            if added and self.redis_client.hexists(_state_key(ticker), 'subscribed_time'):
+                self.refresh_dashboard_row(ticker)
+            return added
         except Exception as e:
             logging.error(f"Failed to set mode of stocks in Redis: {e}")
     def get_mode(self, ticker):
@@ -545,6 +945,8 @@ class RedisManager:
             keys = self.redis_client.keys(f'stocks:{ticker}:*')
             if keys:
                 self.redis_client.delete(*keys)
+            self.redis_client.hdel('ingest:queues', *[f'{stream}:{ticker}' for stream in ['tick', 'candlestick', 'orderbook']])
+            self.remove_dashboard_row(ticker)
 
             self.publish('socket_emit', {
                 'event': 'unsubscribe',
@@ -634,6 +1036,7 @@ class RedisManager:
                     candles.append(original_candle)
             self.redis_client.delete(f'stocks:{ticker}:candles')
             self.redis_client.rpush(f'stocks:{ticker}:candles', *[json.dumps(candle) for candle in candles])
+            self.rebuild_candle_activity(ticker, candles)
             self.set_stock_price(ticker, candles[-1]['close'])
             self.set_stock_volume(ticker, sum([candle['volume'] for candle in candles]))
             return True
@@ -718,7 +1121,7 @@ class RedisManager:
     def get_last_candle_time(self, ticker:str):
         """Get the last candle time from Redis"""
         try:
-            data = self.redis_client.get(f'stocks:{ticker}:last_candle_time')
+            data = self.redis_client.hget(_state_key(ticker), 'last_candle_time')
             if data is None:
                 return None
             return data if isinstance(data, bytes) else str(data)
@@ -728,7 +1131,7 @@ class RedisManager:
     def set_last_candle_time(self, ticker: str, timestamp: str):
         """Set the last candle time in Redis"""
         try:
-            self.redis_client.set(f'stocks:{ticker}:last_candle_time', timestamp)
+            self.redis_client.hset(_state_key(ticker), 'last_candle_time', timestamp)
             return True
         except Exception as e:
             logging.error(f"Failed to set last candle time in Redis: {e}")
@@ -737,7 +1140,7 @@ class RedisManager:
     def get_stock_price(self, ticker: str):
         """Get the current stock price from Redis"""
         try:
-            price = self.redis_client.get(f'stocks:{ticker}:price')
+            price = self.redis_client.hget(_state_key(ticker), 'price')
             if price is None:
                 return 0.0
             # Convert bytes to string, then to float
@@ -748,7 +1151,10 @@ class RedisManager:
     def set_stock_price(self, ticker: str, price: float):
         """Set the current stock price in Redis"""
         try:
-            self.redis_client.set(f'stocks:{ticker}:price', price)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.hset(_state_key(ticker), 'price', price)
+            pipe.sadd(DASHBOARD_DIRTY_KEY, ticker)
+            pipe.execute()
             self.publish('socket_emit', {
                 'event': 'stock_price',
                 'data': {
@@ -764,7 +1170,7 @@ class RedisManager:
     def get_stock_volume(self, ticker: str):
         """Get the current stock volume from Redis"""
         try:
-            volume = self.redis_client.get(f'stocks:{ticker}:volume')
+            volume = self.redis_client.hget(_state_key(ticker), 'volume')
             if volume is None:
                 return 0
             # Convert bytes to string, then to int
@@ -775,7 +1181,10 @@ class RedisManager:
     def set_stock_volume(self, ticker: str, volume: int):
         """Set the current stock volume in Redis"""
         try:
-            self.redis_client.set(f'stocks:{ticker}:volume', volume)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.hset(_state_key(ticker), 'volume', volume)
+            pipe.sadd(DASHBOARD_DIRTY_KEY, ticker)
+            pipe.execute()
             self.publish('socket_emit', {
                 'event': 'stock_volume',
                 'data': {
@@ -808,36 +1217,139 @@ class RedisManager:
         except Exception as e:
             logging.error(f"Failed to get all stocks data from Redis: {e}")
             return []
+    def _queue_stock_data(self, pipe, ticker: str):
+        pipe.hgetall(_state_key(ticker))
+        pipe.smembers(f'stocks:{ticker}:mode')
+        pipe.mget(f'float_share:{ticker}', f'avg_30d_volume:{ticker}', f'prev_close_price:{ticker}')
+    def _build_stock_data(self, ticker: str, state, mode, values):
+        float_share, avg_30d_volume, prev_close_price = values
+        return {
+            'mode': [str(item) for item in mode],
+            'ticker': ticker,
+            'price': _float(state.get('price')),
+            'volume': int(_float(state.get('volume'), 0)),
+            'float_share': _float(float_share, None),
+            'avg_30d_volume': _float(avg_30d_volume),
+            'prev_close_price': _float(prev_close_price, None),
+            'indicators': self._state_indicators(state),
+            'scores': {score: _float(state.get(score)) for score in SCORES},
+            'fire_emoji_status': json.loads(state.get('fire_emoji_status', 'false')),
+            'explosion_emoji_status': json.loads(state.get('explosion_emoji_status', 'false')),
+        }
     def get_stock_data(self, ticker: str):
-        """Get all stock data from Redis"""
-        try:
-            mode = self.get_mode(ticker)
-            price = self.get_stock_price(ticker)
-            volume = self.get_stock_volume(ticker)
-            float_share = self.get_float_share(ticker)
-            avg_30d_volume = self.get_avg_30d_volume(ticker)
-            prev_close_price = self.get_prev_close_price(ticker)
-            indicators = self.get_technical_indicators(ticker)
-            scores = self.get_technical_scores(ticker)
-            fire_emoji_status = self.get_fire_emoji_status(ticker)
-            explosion_emoji_status = self.get_explosion_emoji_status(ticker)
-            stock_data = {
-                'mode': mode,
-                'ticker': ticker,
-                'price': price,
-                'volume': volume,
-                'float_share': float_share,
-                'avg_30d_volume': avg_30d_volume,
-                'prev_close_price': prev_close_price,
-                'indicators': indicators,
-                'scores': scores,
-                'fire_emoji_status': fire_emoji_status,
-                'explosion_emoji_status': explosion_emoji_status,
-            }
-            return stock_data
+        """Get all stock data from Redis in one round trip"""
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            self._queue_stock_data(pipe, ticker)
+            return self._build_stock_data(ticker, *pipe.execute())
         except Exception as e:
             logging.error(f"Failed to get stock data from Redis: {e}")
             return {}
+    def get_stocks_data(self, tickers: List[str]):
+        """Get all stock data of many tickers from Redis in one round trip, keyed by ticker"""
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for ticker in tickers:
+                self._queue_stock_data(pipe, ticker)
+            results = pipe.execute()
+            return {ticker: self._build_stock_data(ticker, *results[i * 3:i * 3 + 3]) for i, ticker in enumerate(tickers)}
+        except Exception as e:
+            logging.error(f"Failed to get stocks data from Redis: {e}")
+            return {}
+    def refresh_dashboard_row(self, ticker: str):
+        """Rebuild the materialized dashboard row of a ticker from its state"""
+        try:
+            stock_data = self.get_stock_data(ticker)
+            if not stock_data:
+                return None
+            return self.dashboard_row(keys=DASHBOARD_KEYS + [_state_key(ticker)], args=[ticker, json.dumps(stock_data)])
+        except Exception as e:
+            logging.error(f"Failed to refresh dashboard row of {ticker} in Redis: {e}")
+            return None
+    def remove_dashboard_row(self, ticker: str):
+        try:
+            return self.dashboard_row(keys=DASHBOARD_KEYS + [_state_key(ticker)], args=[ticker, ''])
+        except Exception as e:
+            logging.error(f"Failed to remove dashboard row of {ticker} in Redis: {e}")
+            return None
+    def refresh_dirty_dashboard_rows(self):
+        """Re-materialize the rows of subscribed tickers marked dirty, at most once per DASHBOARD_FLUSH_SECONDS
+        across all processes. Returns the number of rows refreshed"""
+        try:
+            if not self.redis_client.set('dashboard:flush', 1, nx=True, ex=DASHBOARD_FLUSH_SECONDS):
+                return 0
+            pipe = self.redis_client.pipeline()
+            pipe.smembers(DASHBOARD_DIRTY_KEY)
+            pipe.delete(DASHBOARD_DIRTY_KEY)
+            tickers = list(pipe.execute()[0])
+            if not tickers:
+                return 0
+            # Bulk prev close updates mark every known ticker; only subscribed ones have a row
+            pipe = self.redis_client.pipeline(transaction=False)
+            for ticker in tickers:
+                pipe.hexists(_state_key(ticker), 'subscribed_time')
+            subscribed = [ticker for ticker, exists in zip(tickers, pipe.execute()) if exists]
+            for ticker in subscribed:
+                self.refresh_dashboard_row(ticker)
+            return len(subscribed)
+        except Exception as e:
+            logging.error(f"Failed to refresh dirty dashboard rows in Redis: {e}")
+            return 0
+    def get_dashboard_rows(self):
+        """Get every dashboard row and the dashboard version with one HGETALL"""
+        try:
+            data = self.redis_client.hgetall('dashboard:rows')
+            version = int(data.pop('__version__', 0))
+            return version, [json.loads(row) for _, row in sorted(data.items())]
+        except Exception as e:
+            logging.error(f"Failed to get dashboard rows from Redis: {e}")
+            return 0, []
+    def get_dashboard_delta(self, since: int):
+        """Get the dashboard rows changed and tickers removed after a version"""
+        try:
+            version, rows, removed = self.dashboard_delta(keys=DASHBOARD_KEYS, args=[since])
+            return int(version), [json.loads(row) for row in rows if row], list(removed)
+        except Exception as e:
+            logging.error(f"Failed to get dashboard delta from Redis: {e}")
+            return None
+
+    def get_state(self, ticker: str, fields: List[str] = None):
+        """Get the latest-value state hash of a ticker, or only the given fields"""
+        try:
+            if fields is None:
+                return self.redis_client.hgetall(_state_key(ticker))
+            return dict(zip(fields, self.redis_client.hmget(_state_key(ticker), fields)))
+        except Exception as e:
+            logging.error(f"Failed to get state of {ticker} from Redis: {e}")
+            return {}
+    def _state_indicators(self, state: Dict[str, Any]):
+        indicators = {name: _float(state.get(f'ind:{name}'), None) for name in INDICATORS}
+        indicators['ATR_Spread'] = _float(state.get('ATR_Spread'), None)
+        return indicators
+    def set_technical_analysis(self, ticker: str, series: Dict[str, List[float]], ATR_Spread: float, key_levels, support_resistance):
+        """Replace the indicator series and write their latest values into the state hash in one transaction"""
+        try:
+            pipe = self.redis_client.pipeline()
+            state = {'ATR_Spread': ATR_Spread, 'key_levels': json.dumps(key_levels), 'support_resistance': json.dumps(support_resistance)}
+            for name, values in series.items():
+                pipe.delete(f'stocks:{ticker}:{name}')
+                if values:
+                    pipe.rpush(f'stocks:{ticker}:{name}', *values)
+                    state[f'ind:{name}'] = values[-1]
+            pipe.hset(_state_key(ticker), mapping=state)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logging.error(f"Failed to set technical analysis of {ticker} in Redis: {e}")
+            return False
+    def set_technical_scores(self, ticker: str, scores: Dict[str, float]):
+        """Set the technical scores in the state hash"""
+        try:
+            self.redis_client.hset(_state_key(ticker), mapping=scores)
+            return True
+        except Exception as e:
+            logging.error(f"Failed to set technical scores of {ticker} in Redis: {e}")
+            return False
 
     def get_technical_indicator(self, ticker: str, key: str, period: int):
         if period == 1:
@@ -860,7 +1372,7 @@ class RedisManager:
                 return []
     def get_atr_spread(self, ticker: str):
         try:
-            data = self.redis_client.get(f'stocks:{ticker}:ATR_Spread')
+            data = self.redis_client.hget(_state_key(ticker), 'ATR_Spread')
             if not data:
                 return None
             return float(data)
@@ -869,7 +1381,7 @@ class RedisManager:
             return None
     def get_key_levels(self, ticker: str):
         try:
-            data = self.redis_client.get(f'stocks:{ticker}:key_levels')
+            data = self.redis_client.hget(_state_key(ticker), 'key_levels')
             if not data:
                 return []
             return json.loads(data)
@@ -878,7 +1390,7 @@ class RedisManager:
             return []
     def get_support_resistance(self, ticker: str):
         try:
-            data = self.redis_client.get(f'stocks:{ticker}:support_resistance')
+            data = self.redis_client.hget(_state_key(ticker), 'support_resistance')
             if not data:
                 return []
             return json.loads(data)
@@ -895,20 +1407,8 @@ class RedisManager:
             'volatility_score': 0
         }
         try:
-            technical_score = self.redis_client.get(f'stocks:{ticker}:technical_score')
-            confirmation_score = self.redis_client.get(f'stocks:{ticker}:confirmation_score')
-            volume_score = self.redis_client.get(f'stocks:{ticker}:volume_score')
-            momentum_score = self.redis_client.get(f'stocks:{ticker}:momentum_score')
-            trend_score = self.redis_client.get(f'stocks:{ticker}:trend_score')
-            volatility_score = self.redis_client.get(f'stocks:{ticker}:volatility_score')
-            return {
-                'technical_score': float(technical_score) if technical_score else 0,
-                'confirmation_score': float(confirmation_score) if confirmation_score else 0,
-                'volume_score': float(volume_score) if volume_score else 0,
-                'momentum_score': float(momentum_score) if momentum_score else 0,
-                'trend_score': float(trend_score) if trend_score else 0,
-                'volatility_score': float(volatility_score) if volatility_score else 0,
-            }
+            values = self.redis_client.hmget(_state_key(ticker), SCORES)
+            return {score: _float(value) for score, value in zip(SCORES, values)}
         except Exception as e:
             logging.error(f"Failed to get technical scores from Redis {ticker}: {e}")
             return default_scores
@@ -950,42 +1450,8 @@ class RedisManager:
             'ATR_Spread': 0,
         }
         try:
-            return {
-                'VWAP': self.get_technical_indicator(ticker, 'VWAP', 1),
-                'RSI': self.get_technical_indicator(ticker, 'RSI', 1),
-                'StochRSI_K': self.get_technical_indicator(ticker, 'StochRSI_K', 1),
-                'StochRSI_D': self.get_technical_indicator(ticker, 'StochRSI_D', 1),
-                'MACD': self.get_technical_indicator(ticker, 'MACD', 1),
-                'MACD_signal': self.get_technical_indicator(ticker, 'MACD_signal', 1),
-                'MACD_hist': self.get_technical_indicator(ticker, 'MACD_hist', 1),
-                'ADX': self.get_technical_indicator(ticker, 'ADX', 1),
-                'DMP': self.get_technical_indicator(ticker, 'DMP', 1),
-                'DMN': self.get_technical_indicator(ticker, 'DMN', 1),
-                'Supertrend': self.get_technical_indicator(ticker, 'Supertrend', 1),
-                'Trend': self.get_technical_indicator(ticker, 'Trend', 1),
-                'PSAR_L': self.get_technical_indicator(ticker, 'PSAR_L', 1),
-                'PSAR_S': self.get_technical_indicator(ticker, 'PSAR_S', 1),
-                'PSAR_R': self.get_technical_indicator(ticker, 'PSAR_R', 1),
-                'EMA200': self.get_technical_indicator(ticker, 'EMA200', 1),
-                'EMA21': self.get_technical_indicator(ticker, 'EMA21', 1),
-                'EMA9': self.get_technical_indicator(ticker, 'EMA9', 1),
-                'EMA4': self.get_technical_indicator(ticker, 'EMA4', 1),
-                'EMA5': self.get_technical_indicator(ticker, 'EMA5', 1),
-                'VWAP_Slope': self.get_technical_indicator(ticker, 'VWAP_Slope', 1),
-                'Volume_Ratio': self.get_technical_indicator(ticker, 'Volume_Ratio', 1),
-                'ROC': self.get_technical_indicator(ticker, 'ROC', 1),
-                'Williams_R': self.get_technical_indicator(ticker, 'Williams_R', 1),
-                'ATR': self.get_technical_indicator(ticker, 'ATR', 1),
-                'HOD': self.get_technical_indicator(ticker, 'HOD', 1),
-                'ATR_to_HOD': self.get_technical_indicator(ticker, 'ATR_to_HOD', 1),
-                'ATR_to_VWAP': self.get_technical_indicator(ticker, 'ATR_to_VWAP', 1),
-                'ZenP': self.get_technical_indicator(ticker, 'ZenP', 1),
-                'RVol': self.get_technical_indicator(ticker, 'RVol', 1),
-                'BB_lower': self.get_technical_indicator(ticker, 'BB_lower', 1),
-                'BB_mid': self.get_technical_indicator(ticker, 'BB_mid', 1),
-                'BB_upper': self.get_technical_indicator(ticker, 'BB_upper', 1),
-                'ATR_Spread': self.get_atr_spread(ticker),
-            }
+            fields = [f'ind:{name}' for name in INDICATORS] + ['ATR_Spread']
+            return self._state_indicators(dict(zip(fields, self.redis_client.hmget(_state_key(ticker), fields))))
         except Exception as e:
             logging.error(f"Failed to get technical indicators from Redis {ticker}, {e}")
             return default_indicators
@@ -993,7 +1459,7 @@ class RedisManager:
     def set_last_order_time(self, ticker: str, timestamp: str):
         """Set the last order time in Redis"""
         try:
-            self.redis_client.set(f'stocks:{ticker}:last_order_time', timestamp)
+            self.redis_client.hset(_state_key(ticker), 'last_order_time', timestamp)
             return True
         except Exception as e:
             logging.error(f"Failed to set last order time in Redis: {e}")
@@ -1001,20 +1467,20 @@ class RedisManager:
     def get_last_order_time(self, ticker: str):
         """Get the last order time from Redis"""
         try:
-            return self.redis_client.get(f'stocks:{ticker}:last_order_time')
+            return self.redis_client.hget(_state_key(ticker), 'last_order_time')
         except Exception as e:
             logging.error(f"Failed to get last order time from Redis: {e}")
     def set_last_order_price(self, ticker: str, price: float):
         """Set the last order price in Redis"""
         try:
-            self.redis_client.set(f'stocks:{ticker}:last_order_price', price)
+            self.redis_client.hset(_state_key(ticker), 'last_order_price', price)
             return True
         except Exception as e:
             logging.error(f"Failed to set last order price in Redis: {e}")
     def get_last_order_price(self, ticker: str):
         """Get the last order price from Redis"""
         try:
-            return self.redis_client.get(f'stocks:{ticker}:last_order_price')
+            return self.redis_client.hget(_state_key(ticker), 'last_order_price')
         except Exception as e:
             logging.error(f"Failed to get last order price from Redis: {e}")
             return None
@@ -1122,8 +1588,9 @@ class RedisManager:
         """Set the fire emoji in Redis"""
         try:
             original_fire_emoji_status = self.get_fire_emoji_status(ticker)
-            self.redis_client.set(f'stocks:{ticker}:fire_emoji_status', json.dumps(fire_emoji_status))
+            self.redis_client.hset(_state_key(ticker), 'fire_emoji_status', json.dumps(fire_emoji_status))
             if original_fire_emoji_status != fire_emoji_status:
+                self.refresh_dashboard_row(ticker)
                 self.publish('socket_emit', {
                     'event': 'fire_emoji_status',
                     'data': {
@@ -1137,7 +1604,7 @@ class RedisManager:
     def get_fire_emoji_status(self, ticker: str):
         """Get the fire emoji from Redis"""
         try:
-            data = self.redis_client.get(f'stocks:{ticker}:fire_emoji_status')
+            data = self.redis_client.hget(_state_key(ticker), 'fire_emoji_status')
             if data is None:
                 return False
             return json.loads(data)
@@ -1149,8 +1616,9 @@ class RedisManager:
         """Set the explosion emoji status in Redis"""
         try:
             original_explosion_emoji_status = self.get_explosion_emoji_status(ticker)
-            self.redis_client.set(f'stocks:{ticker}:explosion_emoji_status', json.dumps(explosion_emoji_status))
+            self.redis_client.hset(_state_key(ticker), 'explosion_emoji_status', json.dumps(explosion_emoji_status))
             if original_explosion_emoji_status != explosion_emoji_status:
+                self.refresh_dashboard_row(ticker)
                 self.publish('socket_emit', {
                     'event': 'explosion_emoji_status',
                     'data': {
@@ -1164,7 +1632,7 @@ class RedisManager:
     def get_explosion_emoji_status(self, ticker: str):
         """Get the explosion emoji status from Redis"""
         try:
-            data = self.redis_client.get(f'stocks:{ticker}:explosion_emoji_status')
+            data = self.redis_client.hget(_state_key(ticker), 'explosion_emoji_status')
             if data is None:
                 return False
             return json.loads(data)
@@ -1175,7 +1643,7 @@ class RedisManager:
     def get_current_strategy(self, ticker: str):
         """Get the current strategy from Redis"""
         try:
-            data = self.redis_client.get(f'stocks:{ticker}:strategy')
+            data = self.redis_client.hget(_state_key(ticker), 'strategy')
             if data is None:
                 return None
             return json.loads(data)
@@ -1185,7 +1653,10 @@ class RedisManager:
     def set_current_strategy(self, ticker: str, strategy: Dict[str, Any]):
         """Set the current strategy in Redis"""
         try:
-            self.redis_client.set(f'stocks:{ticker}:strategy', json.dumps(strategy))
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.hset(_state_key(ticker), 'strategy', json.dumps(strategy))
+            pipe.sadd(DASHBOARD_DIRTY_KEY, ticker)
+            pipe.execute()
             self.publish('socket_emit', {
                 'event': 'strategy',
                 'data': {
@@ -1216,6 +1687,200 @@ class RedisManager:
             logging.error(f"Failed to add strategy to history in Redis: {e}")
             return False
 
+    def set_replay_clock(self, virtual_ts: float, speed: float):
+        """Publish the replay virtual clock anchor (speed 0 = as fast as possible)"""
+        try:
+            self.redis_client.hset('replay:clock', mapping={'virtual_ts': virtual_ts, 'wall_ts': time.time(), 'speed': speed})
+            return True
+        except Exception as e:
+            logging.error(f"Failed to set replay clock in Redis: {e}")
+            return False
+    def get_replay_clock(self):
+        """Get the replay virtual clock anchor"""
+        try:
+            data = self.redis_client.hgetall('replay:clock')
+            if not data:
+                return None
+            return {key: float(value) for key, value in data.items()}
+        except Exception as e:
+            logging.error(f"Failed to get replay clock from Redis: {e}")
+            return None
+    def clear_replay_clock(self):
+        try:
+            self.redis_client.delete('replay:clock')
+            return True
+        except Exception as e:
+            logging.error(f"Failed to clear replay clock in Redis: {e}")
+            return False
+
+    def set_trace_timestamp(self, ticker: str, stage: str, timestamp: float):
+        """Set the source timestamp of the data last processed by a pipeline stage"""
+        try:
+            self.redis_client.hset(f'stocks:{ticker}:trace', stage, timestamp)
+            return True
+        except Exception as e:
+            logging.error(f"Failed to set trace timestamp in Redis: {e}")
+            return False
+    def get_trace_timestamp(self, ticker: str, stage: str):
+        """Get the source timestamp of the data last processed by a pipeline stage"""
+        try:
+            data = self.redis_client.hget(f'stocks:{ticker}:trace', stage)
+            if data is None:
+                return None
+            return float(data)
+        except Exception as e:
+            logging.error(f"Failed to get trace timestamp from Redis: {e}")
+            return None
+
+    def record_latency(self, stage: str, bucket: str, latency_ms: float):
+        """Add a latency sample to the histogram of a pipeline stage"""
+        try:
+            key = f'latency:{stage}'
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.hincrby(key, bucket, 1)
+            pipe.hincrby(key, 'count', 1)
+            pipe.hincrbyfloat(key, 'sum_ms', round(latency_ms, 3))
+            pipe.sadd('latency:stages', stage)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logging.error(f"Failed to record latency in Redis: {e}")
+            return False
+    def get_latency_histograms(self):
+        """Get the latency histograms of all pipeline stages"""
+        try:
+            stages = list(self.redis_client.smembers('latency:stages'))
+            pipe = self.redis_client.pipeline(transaction=False)
+            for stage in stages:
+                pipe.hgetall(f'latency:{stage}')
+            return dict(zip(stages, pipe.execute()))
+        except Exception as e:
+            logging.error(f"Failed to get latency histograms from Redis: {e}")
+            return {}
+    def reset_latency_histograms(self):
+        """Clear the latency histograms of all pipeline stages"""
+        try:
+            stages = self.redis_client.smembers('latency:stages')
+            self.redis_client.delete('latency:stages', *[f'latency:{stage}' for stage in stages])
+            return True
+        except Exception as e:
+            logging.error(f"Failed to reset latency histograms in Redis: {e}")
+            return False
+
+    def get_ingest_queue_depths(self, tickers: List[str]):
+        """Get the length of the moomoo tick, candlestick and orderbook queues of each ticker"""
+        try:
+            streams = ['tick', 'candlestick', 'orderbook']
+            pipe = self.redis_client.pipeline(transaction=False)
+            for ticker in tickers:
+                for stream in streams:
+                    pipe.llen(f'moomoo:{stream}:{ticker}')
+            lengths = pipe.execute()
+            return {
+                ticker: dict(zip(streams, lengths[index * len(streams):(index + 1) * len(streams)]))
+                for index, ticker in enumerate(tickers)
+            }
+        except Exception as e:
+            logging.error(f"Failed to get ingest queue depths from Redis: {e}")
+            return {}
+    def clear_ingest_queues(self, tickers: List[str]):
+        try:
+            keys = [f'moomoo:{stream}:{ticker}' for ticker in tickers for stream in ['tick', 'candlestick', 'orderbook']]
+            if keys:
+                self.redis_client.delete(*keys)
+            return True
+        except Exception as e:
+            logging.error(f"Failed to clear ingest queues in Redis: {e}")
+            return False
+    def get_server_stats(self):
+        """Get the Redis server counters used by load tests"""
+        try:
+            info = self.redis_client.info()
+            return {
+                'total_commands_processed': info.get('total_commands_processed', 0),
+                'instantaneous_ops_per_sec': info.get('instantaneous_ops_per_sec', 0),
+                'used_memory': info.get('used_memory', 0),
+                'connected_clients': info.get('connected_clients', 0),
+            }
+        except Exception as e:
+            logging.error(f"Failed to get server stats from Redis: {e}")
+            return {}
+
+    def set_redis_metrics_enabled(self, enabled: bool):
+        """Switch redis command accounting on or off for every process"""
+        try:
+            self.redis_client.set(ENABLED_KEY, '1' if enabled else '0')
+            redis_metrics.enabled = enabled
+            return True
+        except Exception as e:
+            logging.error(f"Failed to set redis metrics enabled in Redis: {e}")
+            return False
+
+    def get_redis_metrics(self):
+        """Get exported redis command accounting grouped by worker, method and ticker"""
+        try:
+            workers = self.redis_client.smembers(SOURCES_KEY)
+            metrics = {}
+            for worker in workers:
+                data = self.redis_client.hgetall(f'redis_metrics:{worker}')
+                if not data:
+                    # The worker stopped exporting and its hash expired
+                    self.redis_client.srem(SOURCES_KEY, worker)
+                    continue
+                rows = {}
+                for field, value in data.items():
+                    if field == 'last_export':
+                        continue
+                    method, ticker, name = field.split('|')
+                    row = rows.setdefault(f'{method}|{ticker}', {'method': method, 'ticker': ticker})
+                    row[name] = float(value)
+                metrics[worker] = {
+                    'last_export': float(data.get('last_export', 0)),
+                    'rows': sorted(rows.values(), key=lambda x: -x.get('commands', 0))
+                }
+            return metrics
+        except Exception as e:
+            logging.error(f"Failed to get redis metrics from Redis: {e}")
+            return {}
+
+    def take_rate_limit_token(self, endpoint: str, capacity: int, rate: float, reserve: float, waited: float):
+        """Try to take one token of an endpoint bucket; returns (allowed, seconds to wait) or None on error"""
+        try:
+            allowed, wait = self.token_bucket(
+                keys=[f'rate_limit:{endpoint}', f'rate_limit:metrics:{endpoint}', 'rate_limit:endpoints'],
+                args=[capacity, rate, reserve, round(waited, 3), endpoint],
+            )
+            return bool(allowed), float(wait)
+        except Exception as e:
+            logging.error(f"Failed to take rate limit token in Redis: {e}")
+            return None
+
+    def record_rate_limit_timeout(self, endpoint: str):
+        """Count a request that gave up waiting for a token"""
+        try:
+            self.redis_client.hincrby(f'rate_limit:metrics:{endpoint}', 'timed_out', 1)
+            return True
+        except Exception as e:
+            logging.error(f"Failed to record rate limit timeout in Redis: {e}")
+            return False
+
+    def get_rate_limit_metrics(self):
+        """Get the token bucket counters and current fill of every rate limited endpoint"""
+        try:
+            endpoints = sorted(self.redis_client.smembers('rate_limit:endpoints'))
+            pipe = self.redis_client.pipeline(transaction=False)
+            for endpoint in endpoints:
+                pipe.hgetall(f'rate_limit:metrics:{endpoint}')
+                pipe.hget(f'rate_limit:{endpoint}', 'tokens')
+            results = pipe.execute()
+            return {
+                endpoint: dict(results[index * 2], tokens=results[index * 2 + 1])
+                for index, endpoint in enumerate(endpoints)
+            }
+        except Exception as e:
+            logging.error(f"Failed to get rate limit metrics from Redis: {e}")
+            return {}
+
     def check_choppy_market(self, ticker: str):
         """Check if the market is choppy"""
         try:
@@ -0,0 +1,190 @@
+import os
+import sys
+import time
+import inspect
+import logging
+import threading
+import functools
+from typing import Dict, Any, List
+import redis
+from redis.client import Pipeline
+from config import get_config
+
+METRIC_FIELDS = ['commands', 'round_trips', 'bytes_out', 'bytes_in', 'latency_ms']
+ENABLED_KEY = 'redis_metrics:enabled'
+SOURCES_KEY = 'redis_metrics:sources'
+EXPORT_TTL = 60 * 60    # a worker's hash expires this long after its last export, e.g. once its ticker is unsubscribed
+
+def _payload_size(value) -> int:
+    """Cheap approximation of the wire size of a command argument or reply"""
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, (int, float)):
+        return 8
+    if isinstance(value, (list, tuple, set)):
+        return sum(_payload_size(item) for item in value)
+    if isinstance(value, dict):
+        return sum(_payload_size(k) + _payload_size(v) for k, v in value.items())
+    return len(str(value))
+
+class RedisMetrics:
+    """Per-process Redis command accounting, keyed by RedisManager method and ticker"""
+
+    def __init__(self):
+        config = get_config()
+        self.enabled = config.REDIS_METRICS_ENABLED
+        self.export_interval = config.REDIS_METRICS_EXPORT_INTERVAL
+        self.worker = os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0] or 'python'
+        self.ticker = None
+        self.counters = {}  # {(method, ticker): [commands, round_trips, bytes_out, bytes_in, latency_ms]}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.client = None
+        self.exporter_thread = None
+        self.pid = os.getpid()
+
+    def attach(self, client):
+        """Attach the instrumented client used for exports and start the exporter"""
+        self.client = client
+        self.start()
+
+    def set_source(self, worker: str, ticker: str = None):
+        """Tag every command of this process with a worker name and ticker"""
+        if self.pid != os.getpid():
+            # Forked child: drop the parent's unexported counters and exporter state
+            self.pid = os.getpid()
+            self.counters = {}
+            self.lock = threading.Lock()
+            self.local = threading.local()
+            self.exporter_thread = None
+        self.worker = worker
+        self.ticker = ticker
+        self.start()
+
+    def start(self):
+        if self.client is None:
+            return
+        if self.exporter_thread is not None and self.exporter_thread.is_alive():
+            return
+        self.exporter_thread = threading.Thread(target=self._export_loop, daemon=True)
+        self.exporter_thread.start()
+
+    def _caller(self):
+        """Resolve the first frame outside redis-py for commands issued on the raw client"""
+        frame = sys._getframe(3)
+        while frame is not None:
+            module = frame.f_globals.get('__name__', '')
+            if not module.startswith('redis') and module != __name__:
+                return f"{module}.{frame.f_code.co_name}"
+            frame = frame.f_back
+        return 'unknown'
+
+    def record(self, commands: int, bytes_out: int, bytes_in: int, latency: float):
+        if getattr(self.local, 'suspended', False):
+            return
+        method = getattr(self.local, 'method', None) or self._caller()
+        ticker = getattr(self.local, 'ticker', None) or self.ticker or '-'
+        key = (method, ticker)
+        with self.lock:
+            counter = self.counters.get(key)
+            if counter is None:
+                counter = self.counters[key] = [0, 0, 0, 0, 0.0]
+            counter[0] += commands
+            counter[1] += 1
+            counter[2] += bytes_out
+            counter[3] += bytes_in
+            counter[4] += latency * 1000
+
+    def drain(self) -> Dict[Any, List[float]]:
+        with self.lock:
+            counters = self.counters
+            self.counters = {}
+        return counters
+
+    def _refresh_enabled(self):
+        value = self.client.get(ENABLED_KEY)
+        if value is not None:
+            self.enabled = value == '1'
+
+    def _export_loop(self):
+        self.local.suspended = True
+        while True:
+            time.sleep(self.export_interval)
+            try:
+                self._refresh_enabled()
+                self.export()
+            except Exception as e:
+                logging.error(f"Failed to export redis metrics: {e}")
+
+    def export(self):
+        counters = self.drain()
+        if not counters:
+            return
+        key = f'redis_metrics:{self.worker}'
+        pipe = self.client.pipeline(transaction=False)
+        for (method, ticker), values in counters.items():
+            for name, value in zip(METRIC_FIELDS, values):
+                field = f'{method}|{ticker}|{name}'
+                if name == 'latency_ms':
+                    pipe.hincrbyfloat(key, field, round(value, 3))
+                else:
+                    pipe.hincrby(key, field, int(value))
+        pipe.hset(key, 'last_export', time.time())
+        pipe.expire(key, EXPORT_TTL)
+        pipe.sadd(SOURCES_KEY, self.worker)
+        pipe.execute()
+
+redis_metrics = RedisMetrics()
+
+class InstrumentedPipeline(Pipeline):
+    def execute(self, raise_on_error=True):
+        if not redis_metrics.enabled or not self.command_stack:
+            return super().execute(raise_on_error)
+        commands = len(self.command_stack)
+        bytes_out = sum(_payload_size(args) for args, _ in self.command_stack)
+        start = time.perf_counter()
+        response = super().execute(raise_on_error)
+        redis_metrics.record(commands, bytes_out, _payload_size(response), time.perf_counter() - start)
+        return response
+
+class InstrumentedRedis(redis.Redis):
+    """redis.Redis client that reports commands, round-trips, bytes and latency to redis_metrics"""
+
+    def execute_command(self, *args, **options):
+        if not redis_metrics.enabled:
+            return super().execute_command(*args, **options)
+        start = time.perf_counter()
+        response = super().execute_command(*args, **options)
+        redis_metrics.record(1, _payload_size(args), _payload_size(response), time.perf_counter() - start)
+        return response
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+def track_methods(cls):
+    """Class decorator attributing Redis commands to the outermost public method (and its ticker)"""
+    for name, func in list(vars(cls).items()):
+        if name.startswith('_') or not callable(func):
+            continue
+        params = list(inspect.signature(func).parameters)
+        takes_ticker = len(params) > 1 and params[1] == 'ticker'
+        setattr(cls, name, _tracked(func, name, takes_ticker))
+    return cls
+
+def _tracked(func, name, takes_ticker):
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        local = redis_metrics.local
+        if not redis_metrics.enabled or getattr(local, 'method', None) is not None:
+            return func(self, *args, **kwargs)
+        local.method = name
+        if takes_ticker:
+            local.ticker = args[0] if args else kwargs.get('ticker')
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            local.method = None
+            local.ticker = None
+    return wrapper
@@ -3,6 +3,7 @@ import threading
 import logging
 import json
 from moomoo import OrderType
+from services.socket_emitter import socket_emitter
 
 class RedisSubscriber:
     def __init__(self):
@@ -13,6 +14,7 @@ class RedisSubscriber:
         """Start the redis subscriber thread"""
         if not self.running:
             self.running = True
+            socket_emitter.start()
             self.thread = threading.Thread(target=self.subscribe, daemon=True)
             self.thread.start()
             logging.info("Redis subscriber started")
@@ -23,12 +25,14 @@ class RedisSubscriber:
         if self.thread:
             self.thread.join()
             logging.info("Redis subscriber stopped")
+        socket_emitter.stop()
 
     def subscribe(self):
-        from core.socketio_instance import socketio
         from services.redis_manager import redis_manager
         from services.moomoo_manager import moomoo_manager
         from services.moomoo_account import moomoo_accounts
+        from services.latency_tracer import latency_tracer
+        from services.subscription_manager import subscription_manager
         
         pubsub = redis_manager.redis_client.pubsub()
         pubsub.subscribe('socket_emit', 'subscribe', 'unsubscribe', 'trade_signal')
@@ -39,6 +43,14 @@ class RedisSubscriber:
                         if message['channel'] == 'trade_signal':
                             logging.info(f"Received redis message: {message['channel']}, {message['data']}")
                             data = json.loads(message['data'])
+                            trace = data.get('trace')
+                            if trace:
+                                trace['received_ts'] = time.time()
+                                latency_tracer.record_since('dispatch', trace.get('signal_ts'))
+                            if {'replay', 'load'} & set(redis_manager.get_mode(data['ticker'])):
+                                # Replayed or generated market data must never reach a real account
+                                logging.info(f"Ignoring trade signal for simulated ticker {data['ticker']}")
+                                continue
                             if data['type'] == 'rapid_10_percent':
                                 ticker = data['ticker']
                                 price = redis_manager.get_stock_price(ticker)
@@ -47,15 +59,15 @@ class RedisSubscriber:
                             elif data['type'] == 'ema_cross_up':
                                 ticker = data['ticker']
                                 for _, moomoo_account in moomoo_accounts.items():
-                                    moomoo_account.buy_with_smart_sell(ticker)
+                                    moomoo_account.buy_with_smart_sell(ticker, trace=trace)
                             elif data['type'] == 'vwap_approach':
                                 ticker = data['ticker']
                                 for _, moomoo_account in moomoo_accounts.items():
-                                    moomoo_account.buy_with_smart_sell(ticker)
+                                    moomoo_account.buy_with_smart_sell(ticker, trace=trace)
                             elif data['type'] == 'green':
                                 ticker = data['ticker']
                                 for _, moomoo_account in moomoo_accounts.items():
-                                    moomoo_account.buy_with_smart_sell(ticker)
+                                    moomoo_account.buy_with_smart_sell(ticker, trace=trace)
                             # elif data['type'] == 'trading_coach':
                             #     ticker = data['ticker']
                             #     status = data['status']
@@ -76,12 +88,12 @@ class RedisSubscriber:
                             #                 moomoo_account.place_sell_order_with_retry(ticker, None, remaining_quantity)
                         elif message['channel'] == 'socket_emit':
                             data = json.loads(message['data'])
-                            socketio.emit(data['event'], data['data'])
+                            socket_emitter.emit(data['event'], data['data'])
                         elif message['channel'] == 'subscribe':
                             data = json.loads(message['data'])
                             tickers = data['tickers']
                             mode = data['mode']
-                            moomoo_manager.subscribe_stocks(tickers, mode)
+                            subscription_manager.request(tickers, mode, data.get('candidates'))
                         elif message['channel'] == 'unsubscribe':
                             data = json.loads(message['data'])
                             tickers = data['tickers']
@@ -0,0 +1,155 @@
+import time
+import logging
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+from config import get_config
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+FRAME_SECONDS = 0.1
+ALL_ROOM = 'all'
+COMPACT_PREFIX = 'compact:'
+
+# Latest-value events: within a frame only the newest payload per (event, ticker) is sent
+COALESCED_EVENTS = {
+    'stock_update', 'stock_price', 'stock_volume', 'indicators', 'scores', 'strategy',
+    'fire_emoji_status', 'explosion_emoji_status', 'prev_close_price', 'orderbook',
+    'coaching_narrative', 'market_context',
+}
+# Events only the expanded chart and description of a ticker use; everything else feeds the candidate table
+DETAIL_EVENTS = {'candle', 'orderbook', 'coaching_narrative'}
+# Events sent to compact protocol clients as field-level deltas of their payload field
+DELTA_FIELDS = {'indicators': 'indicators', 'scores': 'scores', 'candle': 'candle'}
+# Payload fields left out of deltas: the receive time changes on every candle update and clients do not use it
+DELTA_EXCLUDED = {'recv_ts'}
+
+def ticker_room(ticker: str, compact: bool = False) -> str:
+    return f'{COMPACT_PREFIX if compact else ""}ticker:{ticker}'
+
+def all_room(compact: bool = False) -> str:
+    return f'{COMPACT_PREFIX if compact else ""}{ALL_ROOM}'
+
+def _same(a: Any, b: Any) -> bool:
+    # NaN indicators never compare equal to themselves
+    return a == b or (isinstance(a, float) and isinstance(b, float) and a != a and b != b)
+
+class SocketEmitter:
+    """Coalesces socket_emit messages into ~100 ms frames and routes ticker events to the rooms watching them"""
+
+    def __init__(self):
+        self.keyframe_seconds = get_config().SOCKET_KEYFRAME_SECONDS
+        self.bases: Dict[tuple, Dict[str, Any]] = {}
+        self.pending = OrderedDict()
+        self.sequence = itertools.count()
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        """Start the frame flush thread"""
+        if not self.running:
+            self.running = True
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+            logging.info("Socket emitter started")
+
+    def stop(self):
+        """Stop the frame flush thread, sending what is still pending"""
+        self.running = False
+        if self.thread:
+            self.thread.join()
+            logging.info("Socket emitter stopped")
+
+    def emit(self, event: str, data: Any):
+        """Queue an event for the next frame"""
+        ticker = data.get('ticker') if isinstance(data, dict) else None
+        if event in COALESCED_EVENTS:
+            key = (event, ticker)
+        elif event == 'candle':
+            # One update per bar; a new bar must not replace the close of the previous one
+            key = (event, ticker, (data.get('candle') or {}).get('timestamp'))
+        else:
+            key = (event, ticker, next(self.sequence))
+        with self.lock:
+            if event == 'unsubscribe' and ticker:
+                # Updates queued before the unsubscribe would re-add the ticker on the client
+                for pending_key in [pending_key for pending_key in self.pending if pending_key[1] == ticker]:
+                    del self.pending[pending_key]
+                # A re-subscribed ticker starts its delta streams over
+                self.request_keyframes([ticker])
+            self.pending[key] = data
+            # Frames keep the order of the last update of each key
+            self.pending.move_to_end(key)
+
+    def request_keyframes(self, tickers: Optional[Iterable[str]] = None):
+        """Send the next frame of the given tickers' (all by default) delta streams in full"""
+        if tickers is None:
+            self.bases = {}
+            return
+        tickers = set(tickers)
+        for key in list(self.bases):
+            if key[1] in tickers:
+                self.bases.pop(key, None)
+
+    def _compact(self, event: str, ticker: str, data: Dict[str, Any]):
+        """Changes of a payload since the last frame of its stream, msgpack encoded; None when nothing changed"""
+        field = DELTA_FIELDS[event]
+        values = {name: value for name, value in (data.get(field) or {}).items() if name not in DELTA_EXCLUDED}
+        now = time.time()
+        base = self.bases.get((event, ticker))
+        keyframe = (
+            base is None
+            or now - base['keyframe_at'] >= self.keyframe_seconds
+            # A new bar is sent whole; updates of the same bar only carry the changed prices
+            or (event == 'candle' and base['values'].get('timestamp') != values.get('timestamp'))
+        )
+        if keyframe:
+            delta = dict(values)
+            self.bases[(event, ticker)] = {'values': dict(values), 'keyframe_at': now}
+        else:
+            delta = {name: value for name, value in values.items() if name not in base['values'] or not _same(base['values'][name], value)}
+            if not delta:
+                return None
+            if event == 'candle':
+                delta['timestamp'] = values.get('timestamp')
+            base['values'] = dict(values)
+        payload = {'ticker': ticker, field: delta, 'keyframe': keyframe}
+        return msgpack.packb(payload, use_bin_type=True) if msgpack else payload
+
+    def _rooms(self, event: str, ticker: str, compact: bool) -> List[str]:
+        if event in DETAIL_EVENTS:
+            return [ticker_room(ticker, compact)]
+        return [all_room(compact), ticker_room(ticker, compact)]
+
+    def _flush(self):
+        from core.socketio_instance import socketio
+        with self.lock:
+            frame, self.pending = self.pending, OrderedDict()
+        for key, data in frame.items():
+            event, ticker = key[0], key[1]
+            try:
+                if ticker is None:
+                    socketio.emit(event, data)
+                elif event in DELTA_FIELDS:
+                    socketio.emit(event, data, to=self._rooms(event, ticker, compact=False))
+                    compact = self._compact(event, ticker, data)
+                    if compact is not None:
+                        socketio.emit(event, compact, to=self._rooms(event, ticker, compact=True))
+                else:
+                    socketio.emit(event, data, to=self._rooms(event, ticker, compact=False) + self._rooms(event, ticker, compact=True))
+            except Exception as e:
+                logging.error(f"Error emitting {event} for {ticker}: {e}")
+
+    def run(self):
+        while self.running:
+            started = time.time()
+            self._flush()
+            time.sleep(max(FRAME_SECONDS - (time.time() - started), 0))
+        self._flush()
+
+socket_emitter = SocketEmitter()
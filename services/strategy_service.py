@@ -8,6 +8,7 @@ from patterns.ai_pattern_evaluator import ai_pattern_evaluator
 from services.redis_manager import redis_manager
 from core.db import get_db, StrategyHistory
 from utils.util import get_current_session
+from utils.clock import clock
 
 class StrategyService:
     def __init__(self):
@@ -108,8 +109,8 @@ class StrategyService:
             entry_price=price,
             target_price=pattern['target_price'],
             stop_price=pattern['stop_price'],
-            lock_time=datetime.now().isoformat(),
-            buy_time=datetime.now().isoformat(),
+            lock_time=clock.now().isoformat(),
+            buy_time=clock.now().isoformat(),
             probability=pattern.get('probability', 0),
             match_score=pattern['match_score'],
             pattern_type=pattern.get('pattern_type', ''),
@@ -154,7 +155,7 @@ class StrategyService:
         if strategy.target_price:
             strategy.target_history = [TargetLevel(
                 price=strategy.target_price,
-                timestamp=datetime.now().isoformat()
+                timestamp=clock.now().isoformat()
             )]
 
         strategy_dict = strategy.to_dict()
@@ -173,7 +174,7 @@ class StrategyService:
         strategy_obj = Strategy.from_dict(strategy)
         strategy_obj.state = StrategyState.COMPLETED
         strategy_obj.completion_type = completion_type
-        strategy_obj.completion_time = datetime.now().isoformat()
+        strategy_obj.completion_time = clock.now().isoformat()
 
         # Get current stock price for final calculations
         final_price = redis_manager.get_stock_price(ticker)
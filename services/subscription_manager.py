@@ -0,0 +1,194 @@
+import math
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List
+import psutil
+from config import get_config
+from services.redis_manager import redis_manager
+from utils.trading_calendar import EST
+
+# Base value of a subscription by the scanner that found it
+MODE_WEIGHTS = {
+    'rapid_gainer': 40,
+    'five_minute_gainer': 30,
+    'session_gainer': 30,
+    'vwap_candidate': 20,
+    'dip_candidate': 20,
+}
+QUOTA_PER_TICKER = 3            # TICKER, K_1M and ORDER_BOOK subscriptions
+MIN_HOLD_SECONDS = 5 * 60       # never evict a ticker admitted less than this ago (OpenD requires >= 1 minute)
+IDLE_SECONDS = 2 * 60           # no volume for this long makes a ticker idle
+EVICTION_MARGIN = 10            # a candidate must beat the evicted ticker by this much
+
+def score(modes: List[str], change_pct: float = None, dollar_volume: float = None) -> float:
+    """Value of a ticker from its scanner modes, momentum and dollar volume"""
+    value = max([MODE_WEIGHTS.get(mode, 10) for mode in modes] or [10])
+    value += min(max(change_pct or 0, 0), 50)
+    value += 5 * math.log10(max(dollar_volume or 0, 1))
+    return value
+
+class SubscriptionManager:
+    """Admits scanner candidates by value within the OpenD quota and CPU budget, evicting idle low-value tickers"""
+
+    def __init__(self):
+        config = get_config()
+        self.max_tickers = min(config.MOOMOO_SUBSCRIPTION_QUOTA // QUOTA_PER_TICKER, config.MAX_SUBSCRIBED_TICKERS)
+        self.cpu_budget = config.SUBSCRIPTION_CPU_BUDGET
+        self.debounce_seconds = config.SUBSCRIBE_DEBOUNCE_SECONDS
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.requested_at: Dict[str, float] = {}
+        self.admitted_at: Dict[str, float] = {}
+        self.cpu_times = psutil.cpu_times()
+        self.cpu_percent = 0.0
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        """Start the admission thread"""
+        if not self.running:
+            self.running = True
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+            logging.info("Subscription manager started")
+
+    def stop(self):
+        """Stop the admission thread"""
+        self.running = False
+        if self.thread:
+            self.thread.join()
+            logging.info("Subscription manager stopped")
+
+    def request(self, tickers: List[str], mode: str, candidates: Dict[str, Dict[str, Any]] = None):
+        """Queue tickers for the next admission round, dropping repeats within the debounce window"""
+        now = time.time()
+        with self.lock:
+            # Entries past the debounce window no longer suppress anything
+            for ticker in [ticker for ticker, requested_at in self.requested_at.items() if now - requested_at >= self.debounce_seconds]:
+                del self.requested_at[ticker]
+            for ticker in tickers:
+                if now - self.requested_at.get(ticker, 0) < self.debounce_seconds:
+                    continue
+                self.requested_at[ticker] = now
+                metrics = (candidates or {}).get(ticker, {})
+                self.pending[ticker] = {
+                    'mode': mode,
+                    'requested_ts': now,
+                    'score': score([mode], metrics.get('change_pct'), metrics.get('dollar_volume')),
+                }
+
+    def _run(self):
+        while self.running:
+            try:
+                with self.lock:
+                    pending, self.pending = self.pending, {}
+                if pending:
+                    self._admit(pending)
+            except Exception as e:
+                logging.error(f"Error in subscription manager: {e}")
+            time.sleep(1)
+
+    def _sample_cpu(self) -> float:
+        """Host CPU use since the previous admission, from cpu_times deltas so other cpu_percent callers do not reset the window"""
+        times = psutil.cpu_times()
+        idle = times.idle + getattr(times, 'iowait', 0) - self.cpu_times.idle - getattr(self.cpu_times, 'iowait', 0)
+        total = sum(times) - sum(self.cpu_times)
+        self.cpu_times = times
+        if total > 0:
+            self.cpu_percent = round(max(total - idle, 0) / total * 100, 1)
+        return self.cpu_percent
+
+    def _admission_time(self, ticker: str, now: float) -> float:
+        """When a ticker was admitted; tickers subscribed before a restart or outside the manager use their subscribed_time"""
+        if ticker not in self.admitted_at:
+            subscribed_time = redis_manager.get_subscribed_time(ticker)
+            try:
+                self.admitted_at[ticker] = EST.localize(datetime.strptime(subscribed_time, '%Y-%m-%d %H:%M:%S')).timestamp()
+            except (TypeError, ValueError):
+                self.admitted_at[ticker] = now
+        return self.admitted_at[ticker]
+
+    def _open_position_tickers(self):
+        from services.moomoo_account import moomoo_accounts
+        return {ticker for account in moomoo_accounts.values() for ticker, quantity in account.quantity.items() if quantity > 0}
+
+    def _eviction_order(self, subscribed: List[str]) -> List[Dict[str, Any]]:
+        """Evictable tickers, idle before active, then least valuable, then least recently traded"""
+        now = time.time()
+        protected = self._open_position_tickers()
+        activity = redis_manager.get_activity(subscribed)
+        stocks_data = redis_manager.get_stocks_data(subscribed)
+        evictable = []
+        for ticker in subscribed:
+            if ticker in protected or now - self._admission_time(ticker, now) < MIN_HOLD_SECONDS:
+                continue
+            counters = activity.get(ticker, {})
+            last_trade_ts = counters.get('last_trade_ts') or 0
+            stock_data = stocks_data.get(ticker, {})
+            price = stock_data.get('price') or 0.0
+            prev_close = stock_data.get('prev_close_price')
+            change_pct = (price - prev_close) / prev_close * 100 if price and prev_close else 0
+            value = score(stock_data.get('mode', []), change_pct, price * stock_data.get('volume', 0))
+            evictable.append({
+                'ticker': ticker,
+                'idle': now - last_trade_ts > IDLE_SECONDS,
+                'value': value - 5 * counters.get('zero_streak', 0),
+                'last_trade_ts': last_trade_ts,
+            })
+        evictable.sort(key=lambda item: (not item['idle'], item['value'], item['last_trade_ts']))
+        return evictable
+
+    def _admit(self, pending: Dict[str, Dict[str, Any]]):
+        from services.moomoo_manager import moomoo_manager
+
+        subscribed = list(moomoo_manager.subscribe_processes)
+        candidates = sorted(
+            [(request['score'], ticker, request['mode'], request['requested_ts']) for ticker, request in pending.items() if ticker not in subscribed],
+            reverse=True,
+        )
+        if not candidates:
+            return
+
+        free = self.max_tickers - len(subscribed)
+        cpu_percent = self._sample_cpu()
+        if cpu_percent > self.cpu_budget:
+            logging.warning(f"CPU at {cpu_percent}% over the {self.cpu_budget}% budget, admitting only by eviction")
+            free = min(free, 0)
+
+        admitted = candidates[:max(free, 0)]
+        evicted = []
+        rejected = candidates[max(free, 0):]
+        if rejected:
+            evictable = self._eviction_order(subscribed)
+            for candidate in list(rejected):
+                if not evictable or evictable[0]['value'] + EVICTION_MARGIN > candidate[0]:
+                    break
+                victim = evictable.pop(0)
+                evicted.append(victim['ticker'])
+                admitted.append(candidate)
+                rejected.remove(candidate)
+                logging.info(f"Evicting {victim['ticker']} (value {victim['value']:.1f}, idle {victim['idle']}) for {candidate[1]} ({candidate[0]:.1f})")
+
+        if rejected:
+            logging.info(f"Subscription capacity full ({self.max_tickers}), rejected {[candidate[1] for candidate in rejected]}")
+        if evicted:
+            moomoo_manager.unsubscribe_stocks(evicted)
+            for ticker in evicted:
+                self.admitted_at.pop(ticker, None)
+        for value, ticker, mode, requested_ts in admitted:
+            logging.info(f"Admitting {ticker} in {mode} with value {value:.1f}")
+            moomoo_manager.subscribe_stocks([ticker], mode, requested_ts)
+            self.admitted_at[ticker] = time.time()
+
+    def get_status(self):
+        from services.moomoo_manager import moomoo_manager
+        return {
+            'max_tickers': self.max_tickers,
+            'subscribed': len(moomoo_manager.subscribe_processes),
+            'cpu_budget': self.cpu_budget,
+            'cpu_percent': self.cpu_percent,
+        }
+
+subscription_manager = SubscriptionManager()
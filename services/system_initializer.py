@@ -35,6 +35,9 @@ class SystemInitializer:
 
                 # Step 5: Initialize Redis subscriber
                 self._init_redis_subscriber()
+
+                # Step 6: Initialize subscription manager
+                self._init_subscription_manager()
                 
                 self.initialization_complete = True
                 logging.info("System initialization completed successfully")
@@ -96,6 +99,16 @@ class SystemInitializer:
             logging.error(f"Redis subscriber initialization failed: {e}")
             raise
 
+    def _init_subscription_manager(self):
+        """Initialize subscription manager"""
+        try:
+            from services.subscription_manager import subscription_manager
+            subscription_manager.start()
+            logging.info("Subscription manager initialized")
+        except Exception as e:
+            logging.error(f"Subscription manager initialization failed: {e}")
+            raise
+
     def shutdown_system(self):
         """Gracefully shutdown the system"""
         try:
@@ -105,6 +118,10 @@ class SystemInitializer:
             from services.moomoo_account import shutdown_all_accounts
             shutdown_all_accounts()
 
+            # Release warm subscribe workers that never got a ticker
+            from services.moomoo_manager import moomoo_manager
+            moomoo_manager.worker_pool.shutdown()
+
             # Close Redis connection
             from services.redis_manager import redis_manager
             redis_manager.redis_client.close()
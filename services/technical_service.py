@@ -1,13 +1,13 @@
 import pandas as pd
 import pandas_ta as ta
 import numpy as np
-import time
-import json
 from typing import Dict, Any, List
 import logging
 
-from services.redis_manager import redis_manager
-from utils.util import get_current_session, get_today_session_point_time, get_session_from_time
+from services.redis_manager import redis_manager, INDICATORS
+from utils.util import get_current_session, get_today_session_point_time
+from utils.trading_calendar import trading_calendar, EST
+from utils.clock import clock
 
 def convert_candles_to_dataframe(candles):
     try:
@@ -23,8 +23,10 @@ def convert_candles_to_dataframe(candles):
         # Sort by index to ensure chronological order
         df.sort_index(inplace=True)
 
-        # Classify each row into trading session
-        df['Session'] = df.index.map(get_session_from_time)
+        # Classify each row into trading session (NaT on DST transitions falls through to 'closed')
+        epochs = df.index.tz_localize(EST, ambiguous='NaT', nonexistent='NaT').asi8 / 1e9
+        epochs[epochs < 0] = np.nan
+        df['Session'] = trading_calendar.sessions(epochs)
 
         return df
     except Exception as e:
@@ -437,156 +439,51 @@ def update_technical_indicators(ticker: str):
         key_levels = levels_data.get('key_levels', [])
         support_resistance = levels_data.get('support_resistance', [])
 
-        # Create Redis pipeline
-        pipe = redis_manager.redis_client.pipeline()
-
-        pipe.delete(f'stocks:{ticker}:VWAP')
-        pipe.rpush(f"stocks:{ticker}:VWAP", *df['VWAP'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:RSI')
-        pipe.rpush(f"stocks:{ticker}:RSI", *df['RSI'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:StochRSI_K')
-        pipe.rpush(f"stocks:{ticker}:StochRSI_K", *df['StochRSI_K'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:StochRSI_D')
-        pipe.rpush(f"stocks:{ticker}:StochRSI_D", *df['StochRSI_D'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:MACD')
-        pipe.rpush(f"stocks:{ticker}:MACD", *df['MACD'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:MACD_signal')
-        pipe.rpush(f"stocks:{ticker}:MACD_signal", *df['MACD_signal'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:MACD_hist')
-        pipe.rpush(f"stocks:{ticker}:MACD_hist", *df['MACD_hist'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:ADX')
-        pipe.rpush(f"stocks:{ticker}:ADX", *df['ADX'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:DMP')
-        pipe.rpush(f"stocks:{ticker}:DMP", *df['DMP'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:DMN')
-        pipe.rpush(f"stocks:{ticker}:DMN", *df['DMN'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:Supertrend')
-        pipe.rpush(f"stocks:{ticker}:Supertrend", *df['Supertrend'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:Trend')
-        pipe.rpush(f"stocks:{ticker}:Trend", *df['Trend'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:PSAR_L')
-        pipe.rpush(f"stocks:{ticker}:PSAR_L", *df['PSAR_L'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:PSAR_S')
-        pipe.rpush(f"stocks:{ticker}:PSAR_S", *df['PSAR_S'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:PSAR_R')
-        pipe.rpush(f"stocks:{ticker}:PSAR_R", *df['PSAR_R'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:EMA200')
-        pipe.rpush(f"stocks:{ticker}:EMA200", *df['EMA200'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:EMA21')
-        pipe.rpush(f"stocks:{ticker}:EMA21", *df['EMA21'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:EMA9')
-        pipe.rpush(f"stocks:{ticker}:EMA9", *df['EMA9'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:EMA4')
-        pipe.rpush(f"stocks:{ticker}:EMA4", *df['EMA4'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:EMA5')
-        pipe.rpush(f"stocks:{ticker}:EMA5", *df['EMA5'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:VWAP_Slope')
-        pipe.rpush(f"stocks:{ticker}:VWAP_Slope", *df['VWAP_Slope'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:Volume_Ratio')
-        pipe.rpush(f"stocks:{ticker}:Volume_Ratio", *df['Volume_Ratio'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:ROC')
-        pipe.rpush(f"stocks:{ticker}:ROC", *df['ROC'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:Williams_R')
-        pipe.rpush(f"stocks:{ticker}:Williams_R", *df['Williams_R'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:ATR')
-        pipe.rpush(f"stocks:{ticker}:ATR", *df['ATR'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:HOD')
-        pipe.rpush(f"stocks:{ticker}:HOD", *df['HOD'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:ATR_to_HOD')
-        pipe.rpush(f"stocks:{ticker}:ATR_to_HOD", *df['ATR_to_HOD'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:ATR_to_VWAP')
-        pipe.rpush(f"stocks:{ticker}:ATR_to_VWAP", *df['ATR_to_VWAP'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:ZenP')
-        pipe.rpush(f"stocks:{ticker}:ZenP", *df['ZenP'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:RVol')
-        pipe.rpush(f"stocks:{ticker}:RVol", *df['RVol'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:BB_lower')
-        pipe.rpush(f"stocks:{ticker}:BB_lower", *df['BB_lower'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:BB_mid')
-        pipe.rpush(f"stocks:{ticker}:BB_mid", *df['BB_mid'].tolist())
-
-        pipe.delete(f'stocks:{ticker}:BB_upper')
-        pipe.rpush(f"stocks:{ticker}:BB_upper", *df['BB_upper'].tolist())
-
-        pipe.set(f"stocks:{ticker}:ATR_Spread", ATR_Spread)
-
-        pipe.set(f"stocks:{ticker}:key_levels", json.dumps(key_levels))
-
-        pipe.set(f"stocks:{ticker}:support_resistance", json.dumps(support_resistance))
-
-        # Execute pipeline
-        pipe.execute()
+        # Indicator series and their latest values in one transaction
+        redis_manager.set_technical_analysis(
+            ticker,
+            {name: df[name].tolist() for name in INDICATORS},
+            ATR_Spread,
+            key_levels,
+            support_resistance,
+        )
 
         update_technical_scores(ticker)
 
     except Exception as e:
         logging.error(f"Error getting technical analysis: {e}")
-        # If pipeline exists but wasn't executed due to error
-        if 'pipe' in locals():
-            pipe.reset()
 
 def update_technical_scores(ticker: str):
     try:
-        pipe = redis_manager.redis_client.pipeline()
-
         # Volume Score
         volume_score = calculate_volume_score(ticker)
-        pipe.set(f"stocks:{ticker}:volume_score", volume_score)
         
         # Momentum Score
         momentum_score = calculate_momentum_score(ticker)
-        pipe.set(f"stocks:{ticker}:momentum_score", momentum_score)
         
         # Trend Score
         trend_score = calculate_trend_score(ticker)
-        pipe.set(f"stocks:{ticker}:trend_score", trend_score)
 
         # Volatility Score
         volatility_score = calculate_volatility_score(ticker)
-        pipe.set(f"stocks:{ticker}:volatility_score", volatility_score)
         
         # Calculate technical score
         total_score = volume_score * 3.0 + momentum_score * 2.0 + trend_score * 1.5
         total_weight = 6.5
         technical_score = total_score / total_weight if total_weight > 0 else 0
-        pipe.set(f"stocks:{ticker}:technical_score", round(technical_score, 2))
 
         # Calculate confirmation score
         confirmation_score = trend_score * 0.3 + momentum_score * 0.3 + volume_score * 0.2 + volatility_score * 0.2
-        pipe.set(f"stocks:{ticker}:confirmation_score", round(confirmation_score, 2))
 
-        pipe.execute()
+        redis_manager.set_technical_scores(ticker, {
+            'volume_score': volume_score,
+            'momentum_score': momentum_score,
+            'trend_score': trend_score,
+            'volatility_score': volatility_score,
+            'technical_score': round(technical_score, 2),
+            'confirmation_score': round(confirmation_score, 2),
+        })
+        redis_manager.refresh_dashboard_row(ticker)
 
     except Exception as e:
         logging.error(f"Error calculating scores: {e}")
@@ -627,7 +524,7 @@ def calculate_liquidity_absorption(ticker):
         # Large Print Threshold
         lpt = int(avg_30d_volume) / 5000
 
-        current_window = [item for item in orderbooks if item['timestamp'] >= time.time() - 30]
+        current_window = [item for item in orderbooks if item['timestamp'] >= clock.time() - 30]
 
         if len(current_window) < 2:
             return 0.0
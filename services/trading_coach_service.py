@@ -1,10 +1,10 @@
 import logging
-import time
 import random
 from typing import Dict, List, Optional, Tuple
 from datatypes.coaching_narrative import CoachingNarrative, NarrativeState
 from datatypes.strategy import StrategyState
 from services.redis_manager import redis_manager
+from utils.clock import clock
 
 class TradingCoachingService:
     def __init__(self):
@@ -188,7 +188,7 @@ class TradingCoachingService:
                 state=narrative_state,
                 message=message,
                 context=context,
-                timestamp=time.time(),
+                timestamp=clock.time(),
                 confidence=confidence,
                 warning_reason=self._get_warning_reason(ticker),
                 probability=probability
@@ -202,7 +202,7 @@ class TradingCoachingService:
                 state=NarrativeState.ANALYZING,
                 message="Analyzing market conditions...",
                 context={},
-                timestamp=time.time()
+                timestamp=clock.time()
             )
     
     def _dict_to_narrative(self, narrative_dict: Dict) -> CoachingNarrative:
@@ -221,7 +221,7 @@ class TradingCoachingService:
                 state=state,
                 message=narrative_dict.get('message', ''),
                 context=narrative_dict.get('context', {}),
-                timestamp=narrative_dict.get('timestamp', time.time()),
+                timestamp=narrative_dict.get('timestamp', clock.time()),
                 confidence=narrative_dict.get('confidence', 0.0),
                 warning_reason=narrative_dict.get('warning_reason'),
                 order_flow_insights=narrative_dict.get('order_flow_insights'),
@@ -236,7 +236,7 @@ class TradingCoachingService:
                 state=NarrativeState.ANALYZING,
                 message="Analyzing market conditions...",
                 context={},
-                timestamp=time.time()
+                timestamp=clock.time()
             )
 
     def _determine_narrative_state(self, ticker: str) -> NarrativeState:
@@ -771,7 +771,7 @@ class TradingCoachingService:
                     
                 # Check if the target was achieved recently (within the last hour)
                 from datetime import datetime, timedelta
-                if datetime.now() - achieved_time < timedelta(hours=1):
+                if clock.now() - achieved_time < timedelta(hours=1):
                     price_diff = current_target.get('price', 0) - previous_target.get('price', 0)
                     price_diff_percent = price_diff / previous_target.get('price', 1) * 100
                     
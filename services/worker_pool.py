@@ -0,0 +1,61 @@
+import os
+import logging
+import threading
+import subprocess
+from typing import List, Optional
+
+SUBSCRIBE_WORKER_PATH = os.path.join(os.path.dirname(__file__), "../subscribe_worker.py")
+
+class WarmWorkerPool:
+    """Subscribe workers started ahead of time: imports done and OpenD connected, waiting for a ticker on stdin"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.workers: List[subprocess.Popen] = []
+        self.lock = threading.Lock()
+
+    def _spawn(self) -> subprocess.Popen:
+        process = subprocess.Popen(["python", SUBSCRIBE_WORKER_PATH, "--warm"], stdin=subprocess.PIPE, text=True)
+        logging.info(f"Started warm subscribe worker with PID {process.pid}")
+        return process
+
+    def fill(self):
+        """Replace exited warm workers and top the pool up to its size"""
+        with self.lock:
+            for process in self.workers:
+                if process.poll() is not None:
+                    logging.warning(f"Warm subscribe worker {process.pid} exited with return code {process.returncode}")
+            self.workers = [process for process in self.workers if process.poll() is None]
+            while len(self.workers) < self.size:
+                try:
+                    self.workers.append(self._spawn())
+                except Exception as e:
+                    logging.error(f"Error starting warm subscribe worker: {e}")
+                    break
+
+    def assign(self, ticker: str, mode: str, requested_ts: float) -> Optional[subprocess.Popen]:
+        """Hand a ticker to the oldest live warm worker; None when the pool is empty"""
+        process = None
+        with self.lock:
+            while self.workers and process is None:
+                candidate = self.workers.pop(0)
+                if candidate.poll() is None:
+                    process = candidate
+        if process is None:
+            return None
+        try:
+            process.stdin.write(f"{ticker} {mode} {requested_ts}\n")
+            process.stdin.close()
+        except Exception as e:
+            logging.error(f"Error assigning {ticker} to warm subscribe worker {process.pid}: {e}")
+            process.kill()
+            process = None
+        threading.Thread(target=self.fill, daemon=True).start()
+        return process
+
+    def shutdown(self):
+        """Terminate warm workers that were never assigned"""
+        with self.lock:
+            for process in self.workers:
+                process.terminate()
+            self.workers = []
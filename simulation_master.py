@@ -9,11 +9,16 @@ import argparse
 import time
 import signal
 import sys
+import json
+import psutil
 from multiprocessing import Process
 from config.logging import setup_logging
 from simulators.simulation_tick_worker import run as run_tick_simulation
 from simulators.simulation_candlestick_worker import run as run_candlestick_simulation
 from simulators.simulation_orderbook_worker import run as run_orderbook_simulation
+from simulators.simulation_replay_worker import MarketReplayer
+from simulators.simulation_load_worker import run as run_load_generation
+from utils.clock import clock, ReplayClock
 
 class SimulationMaster:
     def __init__(self, ticker: str, base_price: float = 100.0, volatility: float = 0.02):
@@ -191,6 +196,164 @@ class SimulationMaster:
         
         return status
 
+class LoadSimulationMaster:
+    """Sweeps the number of simulated tickers and reports how the pipeline scales"""
+
+    def __init__(self, sweep, step_duration: float = 120, tick_rate: float = 5.0, orderbook_rate: float = 2.0,
+                 candle_rate: float = 1.0, gainer_ratio: float = 0.1, tickers_per_generator: int = 100,
+                 latency_budget_ms: float = 1000, report_path: str = 'logs/load_report.json'):
+        self.sweep = sweep
+        self.step_duration = step_duration
+        self.tick_rate = tick_rate
+        self.orderbook_rate = orderbook_rate
+        self.candle_rate = candle_rate
+        self.gainer_ratio = gainer_ratio
+        self.tickers_per_generator = tickers_per_generator
+        self.latency_budget_ms = latency_budget_ms
+        self.report_path = report_path
+        self.sample_interval = 5
+        self.processes = []
+
+    def _start_step(self, tickers):
+        from subscribe_worker import start_processing_workers
+        from services.redis_manager import redis_manager
+
+        redis_manager.reset_latency_histograms()
+        for ticker in tickers:
+            redis_manager.set_mode(ticker, 'load')
+            self.processes.extend(start_processing_workers(ticker))
+        for index in range(0, len(tickers), self.tickers_per_generator):
+            group = tickers[index:index + self.tickers_per_generator]
+            generator = Process(
+                target=run_load_generation,
+                args=(group, self.step_duration, self.tick_rate, self.orderbook_rate, self.candle_rate, self.gainer_ratio),
+                name=f"LoadGen-{group[0]}"
+            )
+            generator.start()
+            self.processes.append(generator)
+
+    def _stop_step(self, tickers):
+        from services.redis_manager import redis_manager
+
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.kill()
+                process.join()
+        self.processes = []
+        redis_manager.clear_ingest_queues(tickers)
+        for ticker in tickers:
+            redis_manager.remove_all_stock_data(ticker)
+
+    def _sample(self, monitored, tickers):
+        from services.redis_manager import redis_manager
+
+        cpu_percent = 0.0
+        rss = 0
+        for process in self.processes:
+            try:
+                if process.pid not in monitored:
+                    monitored[process.pid] = psutil.Process(process.pid)
+                    monitored[process.pid].cpu_percent(None)
+                    continue
+                cpu_percent += monitored[process.pid].cpu_percent(None)
+                rss += monitored[process.pid].memory_info().rss
+            except psutil.NoSuchProcess:
+                continue
+        depths = redis_manager.get_ingest_queue_depths(tickers)
+        return {
+            'cpu_percent': cpu_percent,
+            'rss_mb': rss / 1024 / 1024,
+            'system_cpu_percent': psutil.cpu_percent(None),
+            'max_depth': {
+                stream: max((depth[stream] for depth in depths.values()), default=0)
+                for stream in ['tick', 'candlestick', 'orderbook']
+            },
+            'redis': redis_manager.get_server_stats(),
+        }
+
+    def run_step(self, ticker_count: int):
+        from services.redis_manager import redis_manager
+        from services.latency_tracer import latency_tracer
+
+        tickers = [f'US.SIM{index:04d}' for index in range(ticker_count)]
+        logging.info(f"Load step: {ticker_count} tickers for {self.step_duration}s")
+        monitored = {}
+        samples = []
+        start_stats = redis_manager.get_server_stats()
+        started = time.time()
+        self._start_step(tickers)
+        try:
+            psutil.cpu_percent(None)
+            while time.time() - started < self.step_duration:
+                time.sleep(self.sample_interval)
+                samples.append(self._sample(monitored, tickers))
+            end_stats = redis_manager.get_server_stats()
+            latency = latency_tracer.get_stats()
+        finally:
+            self._stop_step(tickers)
+
+        elapsed = time.time() - started
+        measured = samples[1:] or samples  # the first sample only primes cpu_percent
+        ops_per_sec = (end_stats.get('total_commands_processed', 0) - start_stats.get('total_commands_processed', 0)) / elapsed
+        final_depth = samples[-1]['max_depth'] if samples else {}
+        p90 = {stage: latency.get(stage, {}).get('p90_ms') for stage in ['candle', 'orderbook', 'indicators', 'signal', 'end_to_end']}
+        keeps_up = (
+            all(value is not None and value <= self.latency_budget_ms for value in [p90['candle'], p90['orderbook']]) and
+            final_depth.get('candlestick', 0) <= 10 * self.candle_rate and
+            final_depth.get('orderbook', 0) <= 10 * self.orderbook_rate
+        )
+        row = {
+            'tickers': ticker_count,
+            'worker_processes': ticker_count * 9,
+            'redis_ops_per_sec': round(ops_per_sec, 1),
+            'redis_used_memory_mb': round(end_stats.get('used_memory', 0) / 1024 / 1024, 1),
+            'cpu_percent_avg': round(sum(s['cpu_percent'] for s in measured) / len(measured), 1) if measured else None,
+            'system_cpu_percent_avg': round(sum(s['system_cpu_percent'] for s in measured) / len(measured), 1) if measured else None,
+            'rss_mb_max': round(max((s['rss_mb'] for s in measured), default=0), 1),
+            'queue_depth_final': final_depth,
+            'latency_p90_ms': p90,
+            'latency': latency,
+            'keeps_up': keeps_up,
+        }
+        logging.info(f"Load step result: {ticker_count} tickers, {row['redis_ops_per_sec']} ops/s, "
+                     f"cpu {row['cpu_percent_avg']}%, rss {row['rss_mb_max']}MB, p90 {p90}, keeps up: {keeps_up}")
+        return row
+
+    def run_sweep(self):
+        rows = []
+        for ticker_count in self.sweep:
+            rows.append(self.run_step(ticker_count))
+            with open(self.report_path, 'w') as f:
+                json.dump(self._report(rows), f, indent=2)
+        report = self._report(rows)
+        logging.info(f"{'tickers':>8} {'ops/s':>10} {'cpu%':>8} {'rss MB':>8} {'candle p90':>11} {'book p90':>9} {'signal p90':>11}  keeps up")
+        for row in rows:
+            p90 = row['latency_p90_ms']
+            logging.info(f"{row['tickers']:>8} {row['redis_ops_per_sec']:>10} {str(row['cpu_percent_avg']):>8} {row['rss_mb_max']:>8} "
+                         f"{str(p90['candle']):>11} {str(p90['orderbook']):>9} {str(p90['signal']):>11}  {row['keeps_up']}")
+        logging.info(f"Max tickers keeping up: {report['max_tickers_keeping_up']} (report: {self.report_path})")
+        return report
+
+    def _report(self, rows):
+        return {
+            'config': {
+                'step_duration': self.step_duration,
+                'tick_rate': self.tick_rate,
+                'orderbook_rate': self.orderbook_rate,
+                'candle_rate': self.candle_rate,
+                'gainer_ratio': self.gainer_ratio,
+                'latency_budget_ms': self.latency_budget_ms,
+                'cpu_count': psutil.cpu_count(),
+                'memory_total_mb': round(psutil.virtual_memory().total / 1024 / 1024),
+            },
+            'steps': rows,
+            'max_tickers_keeping_up': max((row['tickers'] for row in rows if row['keeps_up']), default=0),
+        }
+
 def run_master_simulation(ticker: str, base_price: float = 100.0, volatility: float = 0.02, 
                          duration_hours: float = 8):
     """Main function to run master simulation"""
@@ -221,18 +384,75 @@ def run_individual_simulation(simulation_type: str, ticker: str, base_price: flo
     else:
         logging.error(f"Unknown simulation type: {simulation_type}")
 
+def run_replay_simulation(ticker: str, date: str, speed: float = 1.0, record_dir: str = None):
+    """Replay a recorded ticker-day through the real processing and detection workers"""
+    from subscribe_worker import start_processing_workers
+    from services.redis_manager import redis_manager
+
+    setup_logging(file_name=f'{ticker}/simulation_replay.log')
+
+    replayer = MarketReplayer(ticker, date, speed, record_dir)
+    replayer.load()
+    redis_manager.remove_all_stock_data(ticker)
+    redis_manager.set_mode(ticker, 'replay')
+    redis_manager.set_subscribed_time(ticker)
+
+    # Forked workers follow the virtual time published by the replayer
+    clock.source = ReplayClock()
+    processes = start_processing_workers(ticker)
+    try:
+        summary = replayer.run_replay()
+        logging.info(f"Replay summary: {summary}")
+        # Let the workers drain the queues before shutting them down
+        time.sleep(5)
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=5)
+        redis_manager.clear_replay_clock()
+
+def run_load_simulation(sweep, step_duration: float = 120, tick_rate: float = 5.0, orderbook_rate: float = 2.0,
+                        candle_rate: float = 1.0, gainer_ratio: float = 0.1, latency_budget_ms: float = 1000,
+                        report_path: str = 'logs/load_report.json'):
+    """Run the load sweep and write the scaling report"""
+    setup_logging(file_name='load/simulation_load.log')
+
+    master = LoadSimulationMaster(sweep, step_duration, tick_rate, orderbook_rate, candle_rate, gainer_ratio,
+                                  latency_budget_ms=latency_budget_ms, report_path=report_path)
+    return master.run_sweep()
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Master controller for Doppler Bot simulation")
-    parser.add_argument("ticker", type=str, help="Ticker symbol to simulate")
-    parser.add_argument("--mode", type=str, choices=['master', 'tick', 'candlestick', 'orderbook'], 
+    parser.add_argument("ticker", type=str, nargs='?', default='US.SIM', help="Ticker symbol to simulate")
+    parser.add_argument("--mode", type=str, choices=['master', 'tick', 'candlestick', 'orderbook', 'replay', 'load'], 
                        default='master', help="Simulation mode")
     parser.add_argument("--base-price", type=float, default=100.0, help="Base price for simulation")
     parser.add_argument("--volatility", type=float, default=0.02, help="Price volatility (0.01 = 1%)")
     parser.add_argument("--duration", type=float, default=8.0, help="Simulation duration in hours")
+    parser.add_argument("--date", type=str, help="Recorded trading day to replay (YYYY-MM-DD)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier (0 = as fast as possible)")
+    parser.add_argument("--record-dir", type=str, default=None, help="Recording directory (defaults to MARKET_RECORD_DIR)")
+    parser.add_argument("--sweep", type=str, default="10,50,100,200", help="Comma-separated ticker counts for load mode")
+    parser.add_argument("--step-duration", type=float, default=120, help="Seconds per load step")
+    parser.add_argument("--tick-rate", type=float, default=5.0, help="Ticks per second per ticker in load mode")
+    parser.add_argument("--orderbook-rate", type=float, default=2.0, help="Orderbook updates per second per ticker in load mode")
+    parser.add_argument("--candle-rate", type=float, default=1.0, help="Candle updates per second per ticker in load mode")
+    parser.add_argument("--gainer-ratio", type=float, default=0.1, help="Share of bursty gainer tickers in load mode")
+    parser.add_argument("--latency-budget", type=float, default=1000, help="p90 candle/orderbook latency budget in ms")
+    parser.add_argument("--report", type=str, default="logs/load_report.json", help="Scaling report path")
     
     args = parser.parse_args()
     
     if args.mode == 'master':
         run_master_simulation(args.ticker, args.base_price, args.volatility, args.duration)
+    elif args.mode == 'load':
+        sweep = [int(count) for count in args.sweep.split(',') if count]
+        run_load_simulation(sweep, args.step_duration, args.tick_rate, args.orderbook_rate, args.candle_rate,
+                            args.gainer_ratio, args.latency_budget, args.report)
+    elif args.mode == 'replay':
+        if not args.date:
+            parser.error("--date is required for replay mode")
+        run_replay_simulation(args.ticker, args.date, args.speed, args.record_dir)
     else:
         run_individual_simulation(args.mode, args.ticker, args.base_price, args.volatility, args.duration)
@@ -0,0 +1,73 @@
+"""
+Vectorized market model shared by the simulators
+Generates price paths, tick volumes and depth updates in NumPy blocks instead of per-tick draws
+"""
+
+from typing import Tuple
+import numpy as np
+from scipy.signal import lfilter
+
+rng = np.random.default_rng()
+
+def ar1(n: int, phi: float, sigma: float, x0: float) -> np.ndarray:
+    """AR(1) path x_t = phi * x_{t-1} + e_t continuing from x0"""
+    shocks = rng.normal(0, sigma, n)
+    path, _ = lfilter([1.0], [1.0, -phi], shocks, zi=[phi * x0])
+    return path
+
+class PathState:
+    """Carry-over state between blocks: price, log-volatility and latent order-flow imbalance"""
+
+    def __init__(self, price: float):
+        self.price = price
+        self.log_vol = 0.0
+        self.flow = 0.0
+
+def price_block(state: PathState, n: int, step_sigma: float, drift: float = 0.0,
+                min_tick: float = 0.01) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    GBM with clustered volatility and order-flow driven drift
+    Returns (prices rounded to min_tick, order-flow imbalance in [-1, 1]) and advances state
+    """
+    log_vol = ar1(n, 0.98, 0.08, state.log_vol)      # stochastic volatility -> clustering
+    flow = ar1(n, 0.95, 0.35, state.flow)            # persistent buy/sell pressure
+    imbalance = np.tanh(flow)
+    sigma = step_sigma * np.exp(log_vol)
+    returns = drift + 0.3 * sigma * imbalance + sigma * rng.standard_normal(n)
+    prices = state.price * np.exp(np.cumsum(returns))
+    prices = np.maximum(np.round(prices / min_tick) * min_tick, min_tick)
+
+    state.price = float(prices[-1])
+    state.log_vol = float(log_vol[-1])
+    state.flow = float(flow[-1])
+    return prices, imbalance
+
+def tick_directions(prices: np.ndarray, previous_price: float, imbalance: np.ndarray) -> np.ndarray:
+    """BUY on upticks, SELL on downticks, flow-weighted coin flip on unchanged prices"""
+    changes = np.diff(prices, prepend=previous_price)
+    buy_on_flat = rng.random(len(prices)) < (1 + imbalance) / 2
+    return np.where(changes > 0, 'BUY', np.where(changes < 0, 'SELL', np.where(buy_on_flat, 'BUY', 'SELL')))
+
+def tick_volumes(prices: np.ndarray, base_price: float, imbalance: np.ndarray,
+                 volume_range: Tuple[int, int], multiplier: float = 1.0) -> np.ndarray:
+    """Volumes growing with distance from base price and with order-flow pressure"""
+    base = rng.integers(volume_range[0], volume_range[1] + 1, len(prices))
+    scale = (1 + np.abs(prices - base_price) / base_price * 10) * (1 + np.abs(imbalance)) * multiplier
+    return (base * scale).astype(np.int64)
+
+def depth_block(n: int, levels: int, decay: float, imbalance: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bid and ask size ladders for n snapshots (n x levels each)
+    Sizes decay away from the touch; positive imbalance thickens bids and thins asks
+    """
+    profile = decay ** np.arange(levels)
+    bids = rng.integers(100, 1001, (n, levels)) * profile
+    asks = rng.integers(100, 1001, (n, levels)) * profile
+    skew = imbalance.reshape(-1, 1)
+    bids = np.maximum(bids * (1 + 0.5 * skew), 1).astype(np.int64)
+    asks = np.maximum(asks * (1 - 0.5 * skew), 1).astype(np.int64)
+    return bids, asks
+
+def spread_block(n: int, base_spread: float, spread_volatility: float, min_tick: float = 0.01) -> np.ndarray:
+    spreads = base_spread + rng.normal(0, spread_volatility, n)
+    return np.maximum(np.round(spreads / min_tick) * min_tick, min_tick)
@@ -5,15 +5,15 @@ Aggregates tick data into 1-minute candlesticks and updates current candle in re
 """
 
 import logging
-import time
 import json
 import random
 import argparse
-from datetime import datetime, timedelta
+from datetime import timedelta
 from typing import Dict, Any, List
 import pandas as pd
 from config.logging import setup_logging
 from services.redis_manager import redis_manager
+from utils.clock import clock
 
 class CandlestickAggregator:
     def __init__(self, ticker: str):
@@ -66,7 +66,7 @@ class CandlestickAggregator:
             if not tick_data:
                 return []
             
-            current_time = datetime.now()
+            current_time = clock.now()
             current_minute = current_time.replace(second=0, microsecond=0)
             next_minute = current_minute + timedelta(minutes=1)
             
@@ -92,7 +92,7 @@ class CandlestickAggregator:
     
     def run_aggregation(self, duration_hours: float = 8):
         """Run the candlestick aggregation for specified duration"""
-        start_time = datetime.now()
+        start_time = clock.now()
         end_time = start_time + timedelta(hours=duration_hours)
         
         logging.info(f"Starting candlestick aggregation for {self.ticker}")
@@ -102,13 +102,13 @@ class CandlestickAggregator:
         logging.info(f"Waiting for tick data to aggregate...")
         
         try:
-            while datetime.now() < end_time:
+            while clock.now() < end_time:
                 current_minute_ticks = self._get_current_minute_ticks()
                 if current_minute_ticks:
                     self.current_candle = self._aggregate_ticks_to_candle(current_minute_ticks)
                     redis_manager.push_candlestick(self.ticker, self.current_candle)
                 
-                time.sleep(1)  # Check every 100ms for real-time updates
+                clock.sleep(1)  # Check every 100ms for real-time updates
                 
         except KeyboardInterrupt:
             logging.info("Aggregation interrupted by user")
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Simulation Load Worker
+Generates tick, 1m candle and orderbook streams for many tickers from one process for load testing
+"""
+
+import json
+import time
+import logging
+import argparse
+from datetime import timedelta
+from typing import List
+import numpy as np
+from config.logging import setup_logging
+from services.redis_manager import redis_manager
+from services.ingest_queues import ingest_queues
+from utils.clock import clock
+from utils.util import get_current_time
+from simulators import market_model
+
+class LoadGenerator:
+    """Vectorized across tickers: one set of NumPy draws per step covers every simulated ticker"""
+
+    def __init__(self, tickers: List[str], tick_rate: float = 5.0, orderbook_rate: float = 2.0,
+                 candle_rate: float = 1.0, gainer_ratio: float = 0.1, volatility: float = 0.02,
+                 interval: float = 0.1):
+        self.tickers = tickers
+        self.tick_rate = tick_rate                  # ticks per second per ticker (quiet phase)
+        self.orderbook_rate = orderbook_rate        # orderbook pushes per second per ticker
+        self.candle_rate = candle_rate              # candle updates per second per ticker
+        self.volatility = volatility                # daily volatility of the random walk
+        self.interval = interval
+        self.burst_multiplier = 10                  # rate and volume multiplier while a gainer bursts
+        self.burst_drift = 0.002                    # upward drift per second while a gainer bursts
+        self.burst_probability = 0.02 * interval    # ~one burst every 50 seconds per gainer
+        self.burst_seconds = 30
+        self.depth_levels = 10
+
+        count = len(tickers)
+        self.prices = market_model.rng.uniform(2, 50, count)
+        self.log_vol = np.zeros(count)
+        self.flow = np.zeros(count)
+        self.gainer = np.arange(count) < int(round(count * gainer_ratio))
+        self.burst_until = np.zeros(count)
+        self.last_orderbook = np.zeros(count)
+        self.last_candle = np.zeros(count)
+        self.candles = [None] * count
+        self.level_offsets = np.arange(1, self.depth_levels + 1) * 0.01
+        self.counts = {'tick': 0, 'candlestick': 0, 'orderbook': 0}
+
+    def seed_history(self, minutes: int = 30):
+        """Seed past candles so the candle upsert and indicator workers have history to extend"""
+        now = get_current_time().replace(second=0, microsecond=0)
+        closes = self.prices[:, None] * np.exp(np.cumsum(market_model.rng.normal(0, 0.002, (len(self.tickers), minutes)), axis=1))
+        volumes = market_model.rng.integers(1000, 20000, (len(self.tickers), minutes))
+        timestamps = [(now - timedelta(minutes=minutes - index - 1)).strftime('%Y-%m-%d %H:%M:%S') for index in range(minutes)]
+        for index, ticker in enumerate(self.tickers):
+            candles = [{
+                'timestamp': timestamp,
+                'open': round(close, 2),
+                'high': round(close * 1.002, 2),
+                'low': round(close * 0.998, 2),
+                'close': round(close, 2),
+                'volume': volume,
+            } for timestamp, close, volume in zip(timestamps, closes[index].tolist(), volumes[index].tolist())]
+            redis_manager.merge_candles(ticker, candles)
+        self.prices = np.round(closes[:, -1], 2)
+
+    def _advance(self, now: float):
+        """Advance burst state, clustered volatility and order flow of every ticker by one interval"""
+        count = len(self.tickers)
+        start_burst = self.gainer & (self.burst_until <= now) & (market_model.rng.random(count) < self.burst_probability)
+        self.burst_until = np.where(start_burst, now + market_model.rng.exponential(self.burst_seconds, count), self.burst_until)
+        bursting = self.burst_until > now
+        self.log_vol = 0.98 * self.log_vol + market_model.rng.normal(0, 0.08, count)
+        self.flow = 0.95 * self.flow + market_model.rng.normal(0, 0.35, count)
+        return bursting, np.tanh(self.flow)
+
+    def _ticks(self, bursting: np.ndarray, imbalance: np.ndarray):
+        """Draw all ticks of this interval at once; returns (counts, owner index, prices, volumes, directions)"""
+        multiplier = np.where(bursting, self.burst_multiplier, 1)
+        counts = market_model.rng.poisson(self.tick_rate * multiplier * self.interval)
+        total = int(counts.sum())
+        if total == 0:
+            return counts, None, None, None, None
+        owner = np.repeat(np.arange(len(self.tickers)), counts)
+        step = self.interval / np.maximum(counts, 1)
+        sigma = (self.volatility / np.sqrt(6.5 * 3600) * np.sqrt(step) * np.exp(self.log_vol) * np.where(bursting, 2, 1))[owner]
+        drift = (np.where(bursting, self.burst_drift, 0) * step)[owner] + 0.3 * sigma * imbalance[owner]
+        returns = drift + sigma * market_model.rng.standard_normal(total)
+
+        # Per-ticker cumulative returns from one global cumsum
+        cumulative = np.cumsum(returns)
+        ends = np.cumsum(counts)
+        offsets = np.concatenate(([0.0], cumulative))[ends - counts]
+        prices = np.round(self.prices[owner] * np.exp(cumulative - np.repeat(offsets, counts)), 2)
+        volumes = market_model.rng.integers(1, 500, total) * multiplier[owner]
+        directions = np.where(returns >= 0, 'BUY', 'SELL')
+
+        active = counts > 0
+        self.prices[active] = prices[ends[active] - 1]
+        return counts, owner, prices, volumes, directions
+
+    def _update_candles(self, opening_prices, counts, prices, volumes, now_dt):
+        # moomoo K_1M time_key is the end of the bar
+        timestamp = (now_dt.replace(second=0, microsecond=0) + timedelta(minutes=1)).strftime('%Y-%m-%d %H:%M:%S')
+        active = np.flatnonzero(counts)
+        if prices is not None and len(active):
+            starts = (np.cumsum(counts) - counts)[active]
+            highs = np.maximum.reduceat(prices, starts)
+            lows = np.minimum.reduceat(prices, starts)
+            sums = np.add.reduceat(volumes, starts)
+        for index, price in enumerate(opening_prices.tolist()):
+            candle = self.candles[index]
+            if candle is None or candle['timestamp'] != timestamp:
+                self.candles[index] = {'timestamp': timestamp, 'open': price, 'high': price, 'low': price, 'close': price, 'volume': 0}
+        for position, index in enumerate(active.tolist()):
+            candle = self.candles[index]
+            candle['high'] = max(candle['high'], float(highs[position]))
+            candle['low'] = min(candle['low'], float(lows[position]))
+            candle['close'] = float(self.prices[index])
+            candle['volume'] += int(sums[position])
+
+    def step(self):
+        """Generate one interval of data for every ticker and push it in one batch through the ingest caps"""
+        now = clock.time()
+        now_dt = get_current_time()
+        recv_ts = time.time()
+        bursting, imbalance = self._advance(now)
+        opening_prices = self.prices.copy()
+        counts, owner, prices, volumes, directions = self._ticks(bursting, imbalance)
+        self._update_candles(opening_prices, counts, prices, volumes, now_dt)
+
+        queues = {}
+        if prices is not None:
+            time_str = now_dt.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+            ticks = {}
+            for index, price, volume, direction in zip(owner.tolist(), prices.tolist(), volumes.tolist(), directions.tolist()):
+                ticks.setdefault(index, []).append(json.dumps({
+                    'code': self.tickers[index],
+                    'time': time_str,
+                    'price': price,
+                    'volume': volume,
+                    'ticker_direction': direction,
+                    'simulated': True,
+                    'recv_ts': recv_ts,
+                }))
+            for index, items in ticks.items():
+                queues[f'moomoo:tick:{self.tickers[index]}'] = items
+            self.counts['tick'] += len(prices)
+
+        candle_due = np.flatnonzero(now - self.last_candle >= 1 / self.candle_rate)
+        for index in candle_due.tolist():
+            queues[f'moomoo:candlestick:{self.tickers[index]}'] = [json.dumps(dict(self.candles[index], recv_ts=recv_ts))]
+        self.last_candle[candle_due] = now
+        self.counts['candlestick'] += len(candle_due)
+
+        orderbook_rate = self.orderbook_rate * np.where(bursting, self.burst_multiplier, 1)
+        orderbook_due = np.flatnonzero(now - self.last_orderbook >= 1 / orderbook_rate)
+        if len(orderbook_due):
+            bid_sizes, ask_sizes = market_model.depth_block(len(orderbook_due), self.depth_levels, 0.7, imbalance[orderbook_due])
+            bid_prices = np.round(self.prices[orderbook_due, None] - self.level_offsets[None, :], 2)
+            ask_prices = np.round(self.prices[orderbook_due, None] + self.level_offsets[None, :], 2)
+            for position, index in enumerate(orderbook_due.tolist()):
+                queues[f'moomoo:orderbook:{self.tickers[index]}'] = [json.dumps({
+                    'code': self.tickers[index],
+                    'Bid': [(price, size, 1, {}) for price, size in zip(bid_prices[position].tolist(), bid_sizes[position].tolist())],
+                    'Ask': [(price, size, 1, {}) for price, size in zip(ask_prices[position].tolist(), ask_sizes[position].tolist())],
+                    'simulated': True,
+                    'recv_ts': recv_ts,
+                })]
+            self.last_orderbook[orderbook_due] = now
+            self.counts['orderbook'] += len(orderbook_due)
+        ingest_queues.push(queues)
+
+    def run_generation(self, duration_seconds: float):
+        end_time = clock.time() + duration_seconds
+        logging.info(f"Generating load for {len(self.tickers)} tickers ({int(self.gainer.sum())} gainers) for {duration_seconds}s")
+        try:
+            while clock.time() < end_time:
+                started = time.time()
+                self.step()
+                elapsed = time.time() - started
+                if elapsed > self.interval:
+                    logging.warning(f"Load generator is behind: step took {elapsed:.3f}s for {len(self.tickers)} tickers")
+                clock.sleep(max(self.interval - elapsed, 0))
+        except KeyboardInterrupt:
+            logging.info("Load generation interrupted by user")
+        finally:
+            logging.info(f"Load generation completed: {self.counts}")
+
+def run(tickers: List[str], duration_seconds: float = 120, tick_rate: float = 5.0, orderbook_rate: float = 2.0,
+        candle_rate: float = 1.0, gainer_ratio: float = 0.1, seed_history: bool = True):
+    """Main function to run load generation for a group of tickers"""
+    setup_logging(file_name=f'load/simulation_load_worker_{tickers[0]}.log')
+
+    generator = LoadGenerator(tickers, tick_rate, orderbook_rate, candle_rate, gainer_ratio)
+    if seed_history:
+        generator.seed_history()
+    generator.run_generation(duration_seconds)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate market data load for many simulated tickers")
+    parser.add_argument("--tickers", type=int, default=50, help="Number of simulated tickers")
+    parser.add_argument("--duration", type=float, default=120, help="Duration in seconds")
+    parser.add_argument("--tick-rate", type=float, default=5.0, help="Ticks per second per ticker")
+    parser.add_argument("--orderbook-rate", type=float, default=2.0, help="Orderbook updates per second per ticker")
+    parser.add_argument("--candle-rate", type=float, default=1.0, help="Candle updates per second per ticker")
+    parser.add_argument("--gainer-ratio", type=float, default=0.1, help="Share of tickers with bursty gainer profile")
+
+    args = parser.parse_args()
+
+    run([f'US.SIM{index:04d}' for index in range(args.tickers)], args.duration, args.tick_rate,
+        args.orderbook_rate, args.candle_rate, args.gainer_ratio)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Simulation Replay Worker
+Feeds a recorded ticker-day back through the real moomoo ingest queues
+"""
+
+import os
+import json
+import time
+import logging
+import argparse
+from typing import Dict, Any, List
+from config import get_config
+from config.logging import setup_logging
+from services.redis_manager import redis_manager
+from services.ingest_queues import ingest_queues
+from services.market_recorder import read_recording, recording_path
+
+QUEUE_KEYS = {
+    'tick': 'moomoo:tick:{ticker}',
+    'candlestick': 'moomoo:candlestick:{ticker}',
+    'orderbook': 'moomoo:orderbook:{ticker}',
+}
+
+class MarketReplayer:
+    def __init__(self, ticker: str, date: str, speed: float = 1.0, record_dir: str = None, batch_size: int = 500):
+        self.ticker = ticker
+        self.date = date
+        self.speed = speed  # 1 = real time, N = N times faster, 0 = as fast as possible
+        self.record_dir = record_dir or get_config().MARKET_RECORD_DIR or 'recordings'
+        self.batch_size = batch_size
+        self.records: List[Dict[str, Any]] = []
+        self.counts = {}
+
+    def load(self):
+        """Load the recording sorted by receive time"""
+        path = recording_path(self.record_dir, self.date, self.ticker)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No recording for {self.ticker} on {self.date}: {path}")
+        self.records = sorted(read_recording(path), key=lambda record: record['ts'])
+        logging.info(f"Loaded {len(self.records)} records for {self.ticker} on {self.date} from {path}")
+        return len(self.records)
+
+    def _due_index(self, start_index: int, first_ts: float, wall_start: float) -> int:
+        """Index one past the last record whose virtual time has been reached"""
+        end_index = min(start_index + self.batch_size, len(self.records))
+        if self.speed <= 0:
+            return end_index
+        virtual_now = first_ts + (time.time() - wall_start) * self.speed
+        index = start_index
+        while index < end_index and self.records[index]['ts'] <= virtual_now:
+            index += 1
+        return index
+
+    def _push(self, queues: Dict[str, List[str]], record: Dict[str, Any]):
+        stream = record['stream']
+        data = record['data']
+        if stream == 'history':
+            # Backfill has to land before the live candles it is merged with
+            ingest_queues.push(queues)
+            queues.clear()
+            redis_manager.merge_candles(self.ticker, data)
+        elif stream in QUEUE_KEYS:
+            # Restamp so latency tracing measures the replayed pipeline, not the recording
+            data['recv_ts'] = time.time()
+            queues.setdefault(QUEUE_KEYS[stream].format(ticker=self.ticker), []).append(json.dumps(data))
+        else:
+            logging.warning(f"Unknown stream in recording: {stream}")
+            return
+        self.counts[stream] = self.counts.get(stream, 0) + 1
+
+    def run_replay(self) -> Dict[str, Any]:
+        """Replay all loaded records under the virtual clock"""
+        if not self.records:
+            self.load()
+        if not self.records:
+            return {}
+
+        first_ts = self.records[0]['ts']
+        wall_start = time.time()
+        index = 0
+        logging.info(f"Replaying {self.ticker} {self.date} at {'max' if self.speed <= 0 else f'{self.speed}x'} speed")
+
+        try:
+            while index < len(self.records):
+                due_index = self._due_index(index, first_ts, wall_start)
+                if due_index == index:
+                    delay = (self.records[index]['ts'] - first_ts) / self.speed - (time.time() - wall_start)
+                    time.sleep(min(max(delay, 0.001), 0.1))
+                    continue
+
+                queues = {}
+                for record in self.records[index:due_index]:
+                    self._push(queues, record)
+                # Through the production caps and gauges, so replays exercise the same drop policies
+                ingest_queues.push(queues)
+                redis_manager.set_replay_clock(self.records[due_index - 1]['ts'], self.speed)
+                index = due_index
+        except KeyboardInterrupt:
+            logging.info("Replay interrupted by user")
+
+        elapsed = time.time() - wall_start
+        summary = {
+            'ticker': self.ticker,
+            'date': self.date,
+            'speed': self.speed,
+            'records': index,
+            'counts': self.counts,
+            'elapsed_seconds': round(elapsed, 3),
+            'recorded_seconds': round(self.records[index - 1]['ts'] - first_ts, 3) if index else 0,
+            'records_per_second': round(index / elapsed, 1) if elapsed > 0 else None,
+        }
+        logging.info(f"Replay completed: {summary}")
+        return summary
+
+def run(ticker: str, date: str, speed: float = 1.0, record_dir: str = None):
+    """Main function to run a market data replay"""
+    setup_logging(file_name=f'{ticker}/simulation_replay_worker.log')
+
+    replayer = MarketReplayer(ticker, date, speed, record_dir)
+    return replayer.run_replay()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded market data for testing")
+    parser.add_argument("ticker", type=str, help="Recorded ticker, e.g. US.AAPL")
+    parser.add_argument("--date", type=str, required=True, help="Recorded trading day (YYYY-MM-DD)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier (0 = as fast as possible)")
+    parser.add_argument("--record-dir", type=str, default=None, help="Recording directory (defaults to MARKET_RECORD_DIR)")
+
+    args = parser.parse_args()
+
+    run(args.ticker, args.date, args.speed, args.record_dir)
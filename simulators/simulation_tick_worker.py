@@ -5,15 +5,15 @@ Generates realistic tick data for testing the Doppler Bot system
 """
 
 import logging
-import time
 import json
-import random
 import argparse
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, List
 import numpy as np
 from config.logging import setup_logging
-from services.redis_manager import redis_manager
+from services.ingest_queues import ingest_queues
+from utils.clock import clock
+from simulators import market_model
 
 class TickSimulator:
     def __init__(self, ticker: str, base_price: float = 100.0, volatility: float = 0.02):
@@ -21,7 +21,7 @@ class TickSimulator:
         self.base_price = base_price
         self.current_price = base_price
         self.volatility = volatility
-        self.last_tick_time = datetime.now()
+        self.last_tick_time = clock.now()
         self.tick_count = 0
         
         # Market microstructure parameters
@@ -30,11 +30,17 @@ class TickSimulator:
         self.volume_range = (1, 100)
         
         # Time-based patterns
-        self.market_open = datetime.now().replace(hour=9, minute=30, second=0, microsecond=0)
-        self.market_close = datetime.now().replace(hour=16, minute=0, second=0, microsecond=0)
+        self.market_open = clock.now().replace(hour=9, minute=30, second=0, microsecond=0)
+        self.market_close = clock.now().replace(hour=16, minute=0, second=0, microsecond=0)
         
         # Volatility clustering (higher volatility during open/close)
         self.volatility_multiplier = 1.0
+
+        # Pre-generated block of ticks
+        self.path = market_model.PathState(base_price)
+        self.block_size = 600
+        self.block = None
+        self.block_index = 0
         
     def _calculate_volatility(self, current_time: datetime) -> float:
         """Calculate time-based volatility"""
@@ -49,105 +55,73 @@ class TickSimulator:
         else:
             return self.volatility * 0.8
     
-    def _generate_price_movement(self) -> float:
-        """Generate realistic price movement using random walk with mean reversion"""
-        # Random walk component
-        random_component = np.random.normal(0, self.volatility_multiplier * self.volatility)
-        
-        # Mean reversion component (tendency to return to base price)
-        mean_reversion = (self.base_price - self.current_price) * 0.001
-        
-        # Combine components
-        price_change = random_component + mean_reversion
-        
-        # Apply minimum tick size
-        price_change = round(price_change / self.min_tick_size) * self.min_tick_size
-        
-        return price_change
-    
-    def _generate_volume(self) -> int:
-        """Generate realistic volume based on price movement and time"""
-        base_volume = random.randint(*self.volume_range)
-        
-        # Higher volume for larger price movements
-        price_change_abs = abs(self.current_price - self.base_price)
-        volume_multiplier = 1 + (price_change_abs / self.base_price) * 10
-        
-        # Time-based volume patterns
-        current_time = datetime.now()
-        if current_time.hour in [9, 10, 15, 16]:  # Market open/close hours
-            volume_multiplier *= 1.5
-        
-        return int(base_volume * volume_multiplier)
-    
-    def _determine_tick_direction(self, price_change: float) -> str:
-        """Determine if tick represents buy or sell pressure"""
-        if price_change > 0:
-            return "BUY"
-        elif price_change < 0:
-            return "SELL"
-        else:
-            # Random direction for no price change
-            return random.choice(["BUY", "SELL"])
-    
+    def _refill_block(self, current_time: datetime):
+        """Pre-generate the next block of prices, volumes and directions"""
+        self.volatility_multiplier = self._calculate_volatility(current_time) / self.volatility
+        step_sigma = self.volatility_multiplier * self.volatility / self.base_price
+        # Mean reversion towards the base price, applied as drift over the block
+        drift = np.log(self.base_price / self.path.price) * 0.001
+
+        previous_price = self.path.price
+        prices, imbalance = market_model.price_block(self.path, self.block_size, step_sigma, drift, self.min_tick_size)
+        hour_multiplier = 1.5 if current_time.hour in [9, 10, 15, 16] else 1.0  # Market open/close hours
+        self.block = {
+            'prices': prices,
+            'volumes': market_model.tick_volumes(prices, self.base_price, imbalance, self.volume_range, hour_multiplier),
+            'directions': market_model.tick_directions(prices, previous_price, imbalance),
+        }
+        self.block_index = 0
+
+    def generate_ticks(self, count: int, start_time: datetime, tick_interval: float) -> List[Dict[str, Any]]:
+        """Generate count ticks spaced tick_interval apart starting at start_time"""
+        ticks = []
+        for i in range(count):
+            if self.block is None or self.block_index >= self.block_size:
+                self._refill_block(start_time)
+            current_time = start_time + timedelta(seconds=i * tick_interval)
+            index = self.block_index
+            self.block_index += 1
+            self.current_price = float(self.block['prices'][index])
+            ticks.append({
+                'code': self.ticker,
+                'time': current_time.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+                'price': round(self.current_price, 2),
+                'volume': int(self.block['volumes'][index]),
+                'ticker_direction': str(self.block['directions'][index]),
+                'simulated': True,
+                'timestamp': current_time.timestamp()
+            })
+            self.tick_count += 1
+            self.last_tick_time = current_time
+        return ticks
+
     def generate_tick(self) -> Dict[str, Any]:
         """Generate a single tick data point"""
-        current_time = datetime.now()
-        
-        # Update volatility based on time
-        self.volatility_multiplier = self._calculate_volatility(current_time)
-        
-        # Generate price movement
-        price_change = self._generate_price_movement()
-        self.current_price += price_change
-        
-        # Ensure price doesn't go negative
-        if self.current_price <= 0:
-            self.current_price = self.base_price * 0.1
-        
-        # Generate volume
-        volume = self._generate_volume()
-        
-        # Determine tick direction
-        tick_direction = self._determine_tick_direction(price_change)
-        
-        # Create tick data
-        tick_data = {
-            'code': self.ticker,
-            'time': current_time.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
-            'price': round(self.current_price, 2),
-            'volume': volume,
-            'ticker_direction': tick_direction,
-            'simulated': True,
-            'timestamp': current_time.timestamp()
-        }
-        
-        self.tick_count += 1
-        self.last_tick_time = current_time
-        
-        return tick_data
+        return self.generate_ticks(1, clock.now(), 0)[0]
     
-    def run_simulation(self, tick_interval: float = 0.1, duration_hours: float = 8):
-        """Run the tick simulation for specified duration"""
-        start_time = datetime.now()
+    def run_simulation(self, tick_interval: float = 0.1, duration_hours: float = 8, batch_interval: float = 0.5):
+        """Run the tick simulation for specified duration, pushing one pipelined batch per batch_interval"""
+        start_time = clock.now()
         end_time = start_time + timedelta(hours=duration_hours)
+        batch_interval = max(batch_interval, tick_interval)
+        ticks_per_batch = max(1, int(round(batch_interval / tick_interval)))
         
         logging.info(f"Starting tick simulation for {self.ticker}")
         logging.info(f"Base price: ${self.base_price:.2f}, Volatility: {self.volatility:.4f}")
-        logging.info(f"Tick interval: {tick_interval}s, Duration: {duration_hours}h")
+        logging.info(f"Tick interval: {tick_interval}s, Batch: {ticks_per_batch} ticks, Duration: {duration_hours}h")
         
         try:
-            while datetime.now() < end_time:
-                tick_data = self.generate_tick()
+            while clock.now() < end_time:
+                ticks = self.generate_ticks(ticks_per_batch, clock.now(), tick_interval)
                 
                 # Push to Redis using the same format as real system
-                redis_manager.redis_client.rpush(f'moomoo:tick:{self.ticker}', json.dumps(tick_data))
+                ingest_queues.push({f'moomoo:tick:{self.ticker}': [json.dumps(tick) for tick in ticks]})
                 
-                # Log every 100 ticks
-                if self.tick_count % 100 == 0:
-                    logging.info(f"Generated {self.tick_count} ticks, Current price: ${tick_data['price']:.2f}")
+                # Log every ~100 ticks
+                if self.tick_count % 100 < ticks_per_batch:
+                    logging.info(f"Generated {self.tick_count} ticks, Current price: ${ticks[-1]['price']:.2f}")
                 
-                time.sleep(tick_interval)
+                clock.sleep(batch_interval)
                 
         except KeyboardInterrupt:
             logging.info("Simulation interrupted by user")
@@ -1,12 +1,22 @@
+import os
+import sys
+import time
+import json
 import logging
 import argparse
 from moomoo import *
 from polygon import RESTClient
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
 from config import get_config
 from config.logging import setup_logging
 from services.redis_manager import redis_manager
+from services.redis_metrics import redis_metrics
+from services.latency_tracer import latency_tracer
+from services.market_recorder import market_recorder
+from services.rate_limiter import rate_limiter
+from services.ingest_queues import ingest_queues
+from services.candle_archive import candle_archive
 import pandas as pd
 from multiprocessing import Process
 import threading
@@ -20,101 +30,166 @@ import ema_detection_worker
 import green_detection_worker
 import pattern_evaluation_worker
 from utils.util import get_current_time, get_short_ticker, get_current_session
+from utils.trading_calendar import trading_calendar
+
+# An archive whose last bar is this recent needs no backfill; the first K_1M push covers the gap
+ARCHIVE_CURRENT_MINUTES = 2
+# The ingest writer flushes on every push and at least this often; order books are queued at most once per interval
+WRITER_INTERVAL = 0.05
+ORDERBOOK_CONFLATE_SECONDS = 0.1
 
 # Moomoo configuration
 SysConfig.enable_proto_encrypt(True)
 SysConfig.set_init_rsa_file("moomoo1/rsa.txt")
 
-class TickerHandler(TickerHandlerBase):
+class IngestWriter:
+    """Moves every Redis write off the moomoo callback thread: queued pushes go out in one pipeline per flush"""
+
     def __init__(self):
+        self.queues = {}        # {redis key: [serialized items]}
+        self.books = {}         # {ticker: latest serialized orderbook}, conflated between flushes
+        self.first_tick_ts = None
+        self.last_book_flush = 0
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def push(self, key, items, tick_recv_ts=None):
+        with self.lock:
+            self.queues.setdefault(key, []).extend(items)
+            if self.first_tick_ts is None:
+                self.first_tick_ts = tick_recv_ts
+        self.wakeup.set()
+
+    def push_orderbook(self, ticker, book):
+        with self.lock:
+            self.books[ticker] = book
+
+    def _run(self):
+        while True:
+            self.wakeup.wait(WRITER_INTERVAL)
+            self.wakeup.clear()
+            try:
+                self._flush()
+            except Exception as e:
+                logging.error(f"Error in ingest writer: {e}")
+
+    def _flush(self):
+        now = time.time()
+        with self.lock:
+            queues, self.queues = self.queues, {}
+            first_tick_ts, self.first_tick_ts = self.first_tick_ts, None
+            if self.books and now - self.last_book_flush >= ORDERBOOK_CONFLATE_SECONDS:
+                for ticker, book in self.books.items():
+                    queues.setdefault(f'moomoo:orderbook:{ticker}', []).append(book)
+                self.books = {}
+                self.last_book_flush = now
+        if not queues:
+            return
+
+        if ingest_queues.push(queues) and first_tick_ts:
+            latency_tracer.record_since('tick_ingest', first_tick_ts)
+
+class TickerHandler(TickerHandlerBase):
+    def __init__(self, writer):
         super(TickerHandler, self).__init__()
-        self._last_batch_time = time.time()
-        self._tick_queue = []
-        self._batch_size = 100
-        self._max_queue_size = 1000
+        self.writer = writer
 
     def on_recv_rsp(self, rsp_pb):
         ret_code, data = super(TickerHandler,self).on_recv_rsp(rsp_pb)
         if ret_code != RET_OK:
             print("TickerTest: error, msg: %s"% data)
             return RET_ERROR, data
-        for _, row in data.iterrows():
-            if len(self._tick_queue) >= self._max_queue_size:
-                self._process_batch()
-
+        recv_ts = time.time()
+        columns = zip(
+            data['code'].tolist(),
+            data['time'].tolist(),
+            data['price'].tolist(),
+            data['volume'].tolist(),
+            data['ticker_direction'].tolist(),
+        )
+        items = {}
+        for code, tick_time, price, volume, ticker_direction in columns:
             tick_data = {
-                'code': row['code'],
-                'time': row['time'],
-                'price': row['price'],
-                'volume': row['volume'],
-                'ticker_direction': row['ticker_direction'],
+                'code': code,
+                'time': tick_time,
+                'price': price,
+                'volume': volume,
+                'ticker_direction': ticker_direction,
+                'recv_ts': recv_ts,
             }
-            self._tick_queue.append((row['code'], tick_data))
-
-        if len(self._tick_queue) >= self._batch_size or ((time.time() - self._last_batch_time >= 1) and len(self._tick_queue) > 0):
-            self._process_batch()
-            self._last_batch_time = time.time()
+            items.setdefault(code, []).append(json.dumps(tick_data))
+            market_recorder.record(code, 'tick', tick_data, recv_ts)
 
+        for code, ticks in items.items():
+            self.writer.push(f'moomoo:tick:{code}', ticks, recv_ts)
         return RET_OK, data
-    
-    def _process_batch(self):
-        if len(self._tick_queue) == 0:
-            return
-        
-        try:
-            with redis_manager.redis_client.pipeline() as pipe:
-                for code, tick_data in self._tick_queue:
-                    pipe.rpush(f'moomoo:tick:{code}', json.dumps(tick_data))
-                pipe.execute()
-            logging.info(f"Ticker batch processed: {len(self._tick_queue)} last time: {tick_data['time']}")
-        except Exception as e:
-            logging.error(f"Error processing ticker batch: {e}")
-        finally:
-            self._tick_queue = []
 
 class CandlestickHandler(CurKlineHandlerBase):
+    def __init__(self, writer):
+        super(CandlestickHandler, self).__init__()
+        self.writer = writer
+
     def on_recv_rsp(self, rsp_pb) -> tuple:
         ret_code, data = super(CandlestickHandler, self).on_recv_rsp(rsp_pb)
         if ret_code != RET_OK:
             logging.error(f"TickerHandler error: {data}")
             return RET_ERROR, data
 
-        for _, row in data.iterrows():
+        recv_ts = time.time()
+        columns = zip(
+            data['code'].tolist(),
+            data['time_key'].tolist(),
+            data['open'].tolist(),
+            data['high'].tolist(),
+            data['low'].tolist(),
+            data['close'].tolist(),
+            data['volume'].tolist(),
+        )
+        items = {}
+        for code, time_key, open_price, high, low, close, volume in columns:
             candle = {
-                'timestamp': row['time_key'],
-                'open': row['open'],
-                'high': row['high'],
-                'low': row['low'],
-                'close': row['close'],
-                'volume': row['volume']
+                'timestamp': time_key,
+                'open': open_price,
+                'high': high,
+                'low': low,
+                'close': close,
+                'volume': volume,
+                'recv_ts': recv_ts,
             }
-            redis_manager.push_candlestick(row['code'], candle)
-            logging.info(f"Candlestick pushed to Redis: open: {candle['open']}, high: {candle['high']}, low: {candle['low']}, close: {candle['close']}, volume: {candle['volume']}, timestamp: {candle['timestamp']}")
-        
+            items.setdefault(code, []).append(json.dumps(candle))
+            market_recorder.record(code, 'candlestick', candle, recv_ts)
+
+        for code, candles in items.items():
+            self.writer.push(f'moomoo:candlestick:{code}', candles)
+        if len(data) > 0:
+            logging.info(f"Candlesticks queued: {len(data)} last: {data['time_key'].iloc[-1]} close: {data['close'].iloc[-1]}")
         return RET_OK, data
 
 class OrderbookHandler(OrderBookHandlerBase):
+    def __init__(self, writer):
+        super(OrderbookHandler, self).__init__()
+        self.writer = writer
+
     def on_recv_rsp(self, rsp_pb):
         ret_code, data = super(OrderbookHandler, self).on_recv_rsp(rsp_pb)
         if ret_code != RET_OK:
             logging.error(f"OrderBookHandler error: {data}")
             return RET_ERROR, data
 
-        redis_manager.push_orderbook(data['code'], data)
-        # logging.info(f"Orderbook pushed to Redis: {data}")
+        data['recv_ts'] = time.time()
+        self.writer.push_orderbook(data['code'], json.dumps(data))
+        market_recorder.record(data['code'], 'orderbook', data, data['recv_ts'])
 
         return RET_OK, data
 
 def get_previous_trading_day(quote_ctx):
     try:
-        start = (get_current_time() - timedelta(days=7)).strftime('%Y-%m-%d')
-        end = (get_current_time() - timedelta(days=1)).strftime('%Y-%m-%d')
-        ret, data = quote_ctx.request_trading_days(TradeDateMarket.US, start=start, end=end)
-        if ret == RET_OK:
-            return data[-1]['time']
-        else:
-            logging.error(f"Error getting previous trading day: {data}")
-            return None
+        # Only the first worker of the day fetches the calendar; the rest read it from Redis
+        if trading_calendar.needs_refresh():
+            trading_calendar.refresh(quote_ctx)
+        return trading_calendar.previous_trading_day()
     except Exception as e:
         logging.error(f"Error getting previous trading day: {e}")
         return None
@@ -125,13 +200,19 @@ def get_prev_close_price(candles):
         date = get_previous_trading_day
     
 
-def complete_intraday_candles_polygon(ticker, previous_trading_day):
+def complete_intraday_candles_polygon(ticker, previous_trading_day, since=None):
     POLYGON_API_KEY = os.getenv('POLYGON_API_KEY')
     client = RESTClient(POLYGON_API_KEY)
     current_date = get_current_time().strftime('%Y-%m-%d')
     start = previous_trading_day
+    if since:
+        # Candles are labelled with their end time; from the start of the bar labelled since, in milliseconds
+        since_dt = pytz.timezone('US/Eastern').localize(datetime.strptime(since, '%Y-%m-%d %H:%M:%S')) - timedelta(minutes=1)
+        start = int(since_dt.timestamp() * 1000)
     end = current_date
     candles = []
+    if not rate_limiter.acquire('polygon:rest'):
+        return candles
     for a in client.list_aggs(
         get_short_ticker(ticker),
         1,
@@ -153,27 +234,63 @@ def complete_intraday_candles_polygon(ticker, previous_trading_day):
         })
     return candles
 
+def fetch_intraday_candles(quote_ctx, ticker, start, since=None):
+    """1-minute candles from start (or the bar labelled since) through today, from moomoo with Polygon as the
+    fallback; None on failure. moomoo only takes whole days, so its result still begins at start's first bar"""
+    current_date = get_current_time().strftime('%Y-%m-%d')
+    if rate_limiter.acquire('moomoo:history_kline', timeout=60):
+        ret, data, _ = quote_ctx.request_history_kline(ticker, start=start, end=current_date, ktype=KLType.K_1M, extended_time=True, max_count=None)
+        if ret == RET_OK:
+            data['timestamp'] = data['time_key']
+            return data[['timestamp', 'open', 'high', 'low', 'close', 'volume']].to_dict(orient='records')
+        logging.error(f"Error completing intraday candles for {ticker}: {data}")
+    try:
+        candles = complete_intraday_candles_polygon(ticker, start, since)
+        if len(candles) > 0:
+            return candles
+    except Exception as e:
+        logging.error(f"Error completing intraday candles for {ticker} from polygon: {e}")
+    return None
+
 def complete_intraday_candles(quote_ctx, ticker, previous_trading_day):
     current_date = get_current_time().strftime('%Y-%m-%d')
-    completed = False
-    while not completed:
-        logging.info(f"Completing intraday candles for {ticker}")
-        ret, data, _ = quote_ctx.request_history_kline(ticker, start=previous_trading_day, end=current_date, ktype=KLType.K_1M, extended_time=True, max_count=None)
-        if ret != RET_OK:
-            logging.error(f"Error completing intraday candles for {ticker}: {data}")
-            candles = complete_intraday_candles_polygon(ticker, previous_trading_day)
-            if len(candles) > 0:
-                redis_manager.merge_candles(ticker, candles)
-                logging.info(f"Completed intraday candles for {ticker}: {len(candles)}")
-                completed = True
-            continue
-        
-        data['timestamp'] = data['time_key']
-        candles_data = data[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
-        candles = candles_data.to_dict(orient='records')
+    days = [previous_trading_day, current_date]
+    archived = candle_archive.load(ticker, days)
+    last_archived = archived[-1]['timestamp'] if archived else None
+
+    # Only the tail after the last archived bar is fetched; skip it when the archive is current
+    tail = []
+    if not last_archived or last_archived < (get_current_time() - timedelta(minutes=ARCHIVE_CURRENT_MINUTES)).strftime('%Y-%m-%d %H:%M:%S'):
+        start = previous_trading_day
+        since = None
+        last_day = last_archived[:10] if last_archived else None
+        # An earlier day archived mid-session (or not at all) still has bars to fetch
+        if last_day and all(candle_archive.is_complete(ticker, day) for day in days if day < last_day):
+            start = current_date if candle_archive.is_complete(ticker, last_day) else last_day
+            since = last_archived if start == last_day else None
+        backoff = 1
+        while True:
+            logging.info(f"Completing intraday candles for {ticker} from {since or start}")
+            fetched = fetch_intraday_candles(quote_ctx, ticker, start, since)
+            if fetched is not None:
+                # The last archived bar may have been in progress when archived, so it is refetched too
+                archived_timestamps = {candle['timestamp'] for candle in archived}
+                tail = [
+                    candle for candle in fetched
+                    if not last_archived or str(candle['timestamp']) >= last_archived or str(candle['timestamp']) not in archived_timestamps
+                ]
+                break
+            logging.warning(f"Retrying intraday candles for {ticker} in {backoff}s")
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+    merged = {candle['timestamp']: candle for candle in archived}
+    merged.update((str(candle['timestamp']), candle) for candle in tail)
+    candles = [merged[timestamp] for timestamp in sorted(merged)]
+    if len(candles) > 0:
         redis_manager.merge_candles(ticker, candles)
-        logging.info(f"Completed intraday candles for {ticker}: {len(candles)}")
-        completed = True
+        market_recorder.record(ticker, 'history', candles)
+    logging.info(f"Completed intraday candles for {ticker}: {len(archived)} archived, {len(tail)} fetched")
     
     if not redis_manager.check_prev_close_price(ticker):
         candle_timestamp = f'{current_date} 16:00:00' if get_current_session() == 'afterhours' else f'{previous_trading_day} 16:00:00'
@@ -182,22 +299,51 @@ def complete_intraday_candles(quote_ctx, ticker, previous_trading_day):
             redis_manager.set_prev_close_price(ticker, candle[0]['close'])
             logging.info(f"Set previous close price for {ticker}: {candle[0]['close']}")
 
-def run(ticker, mode):
-    """Main application entry point"""
-    quote_ctx = None
+def start_processing_workers(ticker):
+    """Start the per-ticker processing, detection and evaluation workers fed by the moomoo:* queues"""
+    targets = [
+        # Data processing
+        ticker_process_worker.run,
+        candlestick_process_worker.run,
+        orderbook_process_worker.run,
+        technical_indicators_worker.run,
+        fire_detection_worker.run,
+        explosion_detection_worker.run,
+        # Pattern and Strategy Evaluation
+        pattern_evaluation_worker.run,
+        # Auto trading signal analyzer
+        ema_detection_worker.run,
+        green_detection_worker.run,
+    ]
+    processes = []
+    for target in targets:
+        process = Process(target=target, args=(ticker,))
+        process.start()
+        processes.append(process)
+    return processes
+
+def connect():
+    """Open the quote context with the push handlers attached"""
     config = get_config()
+    quote_ctx = OpenQuoteContext(host=config.MOOMOO_HOST, port=config.MOOMOO_PORT1)
+    writer = IngestWriter()
+    quote_ctx.set_handler(TickerHandler(writer))
+    quote_ctx.set_handler(CandlestickHandler(writer))
+    quote_ctx.set_handler(OrderbookHandler(writer))
+    return quote_ctx, writer
+
+def run(ticker, mode, requested_ts=None, quote_ctx=None, writer=None):
+    """Main application entry point"""
     try:
-        # Initialize quote context
-        quote_ctx = OpenQuoteContext(host=config.MOOMOO_HOST, port=config.MOOMOO_PORT1)
+        # Initialize quote context unless a warm worker connected ahead of time
+        if quote_ctx is None:
+            quote_ctx, writer = connect()
+        if requested_ts:
+            # The ticker process worker measures the subscribe stage at the first tick it consumes
+            redis_manager.set_trace_timestamp(ticker, 'subscribe', requested_ts)
         previous_trading_day = get_previous_trading_day(quote_ctx)
         if not previous_trading_day:
             previous_trading_day = get_current_time().strftime('%Y-%m-%d')
-        ticker_handler = TickerHandler()
-        candlestick_handler = CandlestickHandler()
-        orderbook_handler = OrderbookHandler()
-        quote_ctx.set_handler(ticker_handler)
-        quote_ctx.set_handler(candlestick_handler)
-        quote_ctx.set_handler(orderbook_handler)
         ret, data = quote_ctx.subscribe(
             [ticker], 
             [SubType.TICKER, SubType.K_1M, SubType.ORDER_BOOK],
@@ -208,44 +354,47 @@ def run(ticker, mode):
         )
         if ret == RET_OK:
             logging.info(f"Subscribed to {ticker}")
-            redis_manager.set_subscribed_time(ticker)
+            # Mode first: setting the subscribed time materializes the dashboard row
             redis_manager.set_mode(ticker, mode)
+            redis_manager.set_subscribed_time(ticker)
 
             complete_candles_thread = threading.Thread(target=complete_intraday_candles, args=(quote_ctx, ticker, previous_trading_day))
             complete_candles_thread.start()
             
-            # Data processing
-            ticker_process = Process(target=ticker_process_worker.run, args=(ticker,))
-            ticker_process.start()
-            candlestick_process = Process(target=candlestick_process_worker.run, args=(ticker,))
-            candlestick_process.start()
-            orderbook_process = Process(target=orderbook_process_worker.run, args=(ticker,))
-            orderbook_process.start()
-            indicators_process = Process(target=technical_indicators_worker.run, args=(ticker,))
-            indicators_process.start()
-            fire_detection_process = Process(target=fire_detection_worker.run, args=(ticker,))
-            fire_detection_process.start()
-            explosion_detection_process = Process(target=explosion_detection_worker.run, args=(ticker,))
-            explosion_detection_process.start()
-
-            # Pattern and Strategy Evaluation
-            pattern_evaluation_process = Process(target=pattern_evaluation_worker.run, args=(ticker,))
-            pattern_evaluation_process.start()
-
-            # Auto trading signal analyzer
-            ema_detection_process = Process(target=ema_detection_worker.run, args=(ticker,))
-            ema_detection_process.start()
-            green_detection_process = Process(target=green_detection_worker.run, args=(ticker,))
-            green_detection_process.start()
+            start_processing_workers(ticker)
         else:
             logging.error(f"Subscription error: {data}")
     except Exception as e:
         logging.error(f"Fatal error: {e}")
 
+def run_warm():
+    """Import and connect ahead of time, then wait for the manager to assign a ticker on stdin"""
+    setup_logging(file_name=f'warm/subscribe_worker_{os.getpid()}.log')
+    quote_ctx, writer = connect()
+    logging.info("Warm subscribe worker ready")
+
+    assignment = sys.stdin.readline().split()
+    if not assignment:
+        logging.info("Warm subscribe worker released without an assignment")
+        quote_ctx.close()
+        return
+    ticker, mode, requested_ts = assignment
+    setup_logging(file_name=f'{ticker}/subscribe_worker.log')
+    redis_metrics.set_source('subscribe_worker', ticker)
+    run(ticker, mode, float(requested_ts), quote_ctx, writer)
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("ticker", type=str, help="Ticker to subscribe to")
-    parser.add_argument("--mode", type=str, help="Subscription mode", required=True)
+    parser.add_argument("ticker", type=str, nargs='?', help="Ticker to subscribe to")
+    parser.add_argument("--mode", type=str, help="Subscription mode")
+    parser.add_argument("--requested-ts", type=float, help="Time the subscription was requested, for latency reporting")
+    parser.add_argument("--warm", action="store_true", help="Start warm and wait for a ticker assignment on stdin")
     args = parser.parse_args()
-    setup_logging(file_name=f'{args.ticker}/subscribe_worker.log')
-    run(args.ticker, args.mode)
+    if args.warm:
+        run_warm()
+    else:
+        if not args.ticker or not args.mode:
+            parser.error("ticker and --mode are required unless --warm is given")
+        setup_logging(file_name=f'{args.ticker}/subscribe_worker.log')
+        redis_metrics.set_source('subscribe_worker', args.ticker)
+        run(args.ticker, args.mode, args.requested_ts)
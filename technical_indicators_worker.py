@@ -1,11 +1,14 @@
 import logging
-import time
 from services.redis_manager import redis_manager
+from services.redis_metrics import redis_metrics
+from services.latency_tracer import latency_tracer
 from config.logging import setup_logging
 from services.technical_service import update_technical_indicators
+from utils.clock import clock
 
 def run(ticker):
     setup_logging(file_name=f'{ticker}/technical_indicators_worker.log')
+    redis_metrics.set_source('technical_indicators_worker', ticker)
 
     prev_last_candle = None
     prev_timestamp = None
@@ -14,21 +17,25 @@ def run(ticker):
             last_candle = redis_manager.get_last_minute_candle(ticker)
 
             if last_candle is None:
-                time.sleep(1)
+                clock.sleep(1)
                 continue
 
             #
             if (
                 (prev_last_candle and last_candle['close'] == prev_last_candle['close'] and last_candle['volume'] == prev_last_candle['volume']) or
-                (prev_timestamp and time.time() - prev_timestamp < 5)
+                (prev_timestamp and clock.time() - prev_timestamp < 5)
             ):
-                time.sleep(1)
+                clock.sleep(1)
                 continue
             
             prev_last_candle = last_candle
-            prev_timestamp = time.time()
+            prev_timestamp = clock.time()
 
+            source_ts = redis_manager.get_trace_timestamp(ticker, 'candle')
             update_technical_indicators(ticker)
+            latency_tracer.record_since('indicators', source_ts)
+            if source_ts:
+                redis_manager.set_trace_timestamp(ticker, 'indicators', source_ts)
             redis_manager.publish('socket_emit', {
                 'event': 'indicators',
                 'data': {
@@ -46,4 +53,4 @@ def run(ticker):
             logging.info(f"Technical indicators updated for {ticker} for {last_candle}")
         except Exception as e:
             logging.error(f"Error in technical indicators worker {ticker}: {e}")
-        time.sleep(1)
+        clock.sleep(1)
@@ -1,21 +1,30 @@
-import logging
 import time
+import logging
 from config.logging import setup_logging
 from services.redis_manager import redis_manager
+from services.redis_metrics import redis_metrics
+from services.latency_tracer import latency_tracer
+from utils.clock import clock
 
 def run(ticker):
     setup_logging(file_name=f'{ticker}/ticker_process_worker.log')
+    redis_metrics.set_source('ticker_process_worker', ticker)
+    requested_ts = redis_manager.get_trace_timestamp(ticker, 'subscribe')
 
     while True:
         try:
             ret, data = redis_manager.remove_old_tick(ticker)
             if not ret:
-                time.sleep(1)
+                clock.sleep(1)
                 continue
+            if requested_ts and data is not None:
+                latency_tracer.record_since('subscribe', requested_ts)
+                logging.info(f"First tick consumed {time.time() - requested_ts:.3f}s after the subscribe request")
+                requested_ts = None
             if data:
                 logging.info(f"Removed {data} old tick data from {ticker}")
                 
         except Exception as e:
             logging.error(f"Error in aggregate worker: {e}", exc_info=True)
         
-        time.sleep(1)
\ No newline at end of file
+        clock.sleep(1)
\ No newline at end of file
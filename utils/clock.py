@@ -0,0 +1,127 @@
+import os
+import time as _time
+import threading
+from datetime import datetime
+import pytz
+from config import get_config
+
+class WallClock:
+    """Real time"""
+
+    def time(self) -> float:
+        return _time.time()
+
+    def sleep(self, seconds: float):
+        _time.sleep(seconds)
+
+class ScaledClock:
+    """Time running `speed` times faster than wall time from a fixed start"""
+
+    def __init__(self, start_ts: float, wall_anchor: float, speed: float):
+        self.start_ts = start_ts
+        self.wall_anchor = wall_anchor
+        self.speed = speed
+
+    def time(self) -> float:
+        return self.start_ts + (_time.time() - self.wall_anchor) * self.speed
+
+    def sleep(self, seconds: float):
+        _time.sleep(max(seconds, 0) / self.speed)
+
+class ManualClock:
+    """Time that only moves when set, advanced or slept on (deterministic tests)"""
+
+    def __init__(self, start_ts: float):
+        self.current = start_ts
+        self.lock = threading.Lock()
+
+    def time(self) -> float:
+        return self.current
+
+    def set(self, ts: float):
+        with self.lock:
+            self.current = ts
+
+    def advance(self, seconds: float):
+        with self.lock:
+            self.current += seconds
+
+    def sleep(self, seconds: float):
+        self.advance(max(seconds, 0))
+
+class ReplayClock:
+    """Time following the replay:clock anchor published by the market data replayer"""
+
+    def __init__(self, refresh_interval: float = 0.2):
+        self.refresh_interval = refresh_interval
+        self.anchor = None
+        self.refreshed_at = 0
+
+    def _anchor(self, refresh: bool = False):
+        if refresh or _time.time() - self.refreshed_at >= self.refresh_interval:
+            from services.redis_manager import redis_manager
+            self.anchor = redis_manager.get_replay_clock()
+            self.refreshed_at = _time.time()
+        return self.anchor
+
+    def time(self) -> float:
+        anchor = self._anchor()
+        if not anchor:
+            return _time.time()
+        if anchor['speed'] <= 0:
+            return anchor['virtual_ts']
+        return anchor['virtual_ts'] + (_time.time() - anchor['wall_ts']) * anchor['speed']
+
+    def sleep(self, seconds: float):
+        anchor = self._anchor(refresh=True)
+        if not anchor:
+            _time.sleep(seconds)
+        elif anchor['speed'] > 0:
+            _time.sleep(max(seconds, 0) / anchor['speed'])
+        else:
+            # As-fast-as-possible replay: wait for the replayer to move virtual time,
+            # but never longer than the requested wall time in case it stalled or ended
+            target = self.time() + seconds
+            wall_deadline = _time.time() + seconds
+            while self._anchor(refresh=True) and self.time() < target and _time.time() < wall_deadline:
+                _time.sleep(0.005)
+
+class Clock:
+    """Process-wide clock used by workers and services instead of time.time/sleep and datetime.now"""
+
+    def __init__(self):
+        self.source = self._create_source()
+
+    def _create_source(self):
+        config = get_config()
+        mode = config.CLOCK_MODE
+        if mode == 'wall':
+            return WallClock()
+        if mode == 'replay':
+            return ReplayClock()
+        start_ts = self._parse_start(config.CLOCK_START)
+        if mode == 'manual':
+            return ManualClock(start_ts or _time.time())
+        if mode == 'scaled':
+            # Share the wall anchor with every child process (forked or spawned by Popen)
+            wall_anchor = float(os.environ.setdefault('CLOCK_ANCHOR', str(_time.time())))
+            return ScaledClock(start_ts or wall_anchor, wall_anchor, config.CLOCK_SPEED)
+        raise ValueError(f"Unknown clock mode: {mode}")
+
+    def _parse_start(self, start):
+        """Parse a US/Eastern 'YYYY-MM-DD HH:MM:SS' start time"""
+        if not start:
+            return None
+        est = pytz.timezone('US/Eastern')
+        return est.localize(datetime.strptime(start, '%Y-%m-%d %H:%M:%S')).timestamp()
+
+    def time(self) -> float:
+        return self.source.time()
+
+    def now(self, tz=None) -> datetime:
+        return datetime.fromtimestamp(self.source.time(), tz)
+
+    def sleep(self, seconds: float):
+        self.source.sleep(seconds)
+
+clock = Clock()
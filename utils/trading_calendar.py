@@ -0,0 +1,156 @@
+import bisect
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pytz
+from utils.clock import clock
+
+EST = pytz.timezone('US/Eastern')
+SESSIONS = ['closed', 'premarket', 'regular', 'afterhours']
+
+# Session label ranges [start, end) per trade date type, at the minute granularity of bar timestamps:
+# the 09:30 bar still belongs to premarket, the 16:00 bar to regular and the 20:00 bar to afterhours
+SESSION_HOURS = {
+    'WHOLE': (('premarket', '04:00', '09:31'), ('regular', '09:31', '16:01'), ('afterhours', '16:01', '20:01')),
+    # Half days close the regular session at 13:00 and extended hours at 17:00
+    'MORNING': (('premarket', '04:00', '09:31'), ('regular', '09:31', '13:01'), ('afterhours', '13:01', '17:01')),
+}
+WINDOW_DAYS = 15        # days built around the looked up time on each side
+FETCH_PAST_DAYS = 30
+FETCH_FUTURE_DAYS = 30
+
+class TradingCalendar:
+    """Trading days and their session boundaries as sorted epoch ranges, reloaded from Redis once per day"""
+
+    def __init__(self):
+        self.trading_days: Dict[str, str] = {}
+        self.updated = None
+        # (starts, ends, codes, start_list, range, expires_at), replaced in one assignment so lock-free
+        # readers never pair the arrays of two builds
+        self.table = (np.empty(0), np.empty(0), np.empty(0, dtype=np.int8), [], (0.0, 0.0), 0.0)
+        self.lock = threading.Lock()
+
+    def _day_type(self, date: str) -> Optional[str]:
+        """Trade date type of a day, assuming Monday to Friday outside the known calendar"""
+        if date in self.trading_days:
+            return self.trading_days[date]
+        if self.trading_days and min(self.trading_days) <= date <= max(self.trading_days):
+            return None
+        return 'WHOLE' if datetime.strptime(date, '%Y-%m-%d').weekday() < 5 else None
+
+    def _build(self, low: float, high: float):
+        from services.redis_manager import redis_manager
+        self.trading_days, self.updated = redis_manager.get_trading_days()
+
+        first_day = datetime.fromtimestamp(low, EST).date() - timedelta(days=WINDOW_DAYS)
+        last_day = datetime.fromtimestamp(high, EST).date() + timedelta(days=WINDOW_DAYS)
+        starts, ends, codes = [], [], []
+        for offset in range((last_day - first_day).days + 1):
+            date = (first_day + timedelta(days=offset)).strftime('%Y-%m-%d')
+            day_type = self._day_type(date)
+            if day_type is None:
+                continue
+            for session, start, end in SESSION_HOURS.get(day_type, SESSION_HOURS['WHOLE']):
+                starts.append(EST.localize(datetime.strptime(f'{date} {start}', '%Y-%m-%d %H:%M')).timestamp())
+                ends.append(EST.localize(datetime.strptime(f'{date} {end}', '%Y-%m-%d %H:%M')).timestamp())
+                codes.append(SESSIONS.index(session))
+
+        first = EST.localize(datetime.combine(first_day, datetime.min.time())).timestamp()
+        last = EST.localize(datetime.combine(last_day + timedelta(days=1), datetime.min.time())).timestamp()
+        midnight = EST.localize(datetime.combine(datetime.fromtimestamp(clock.time(), EST).date() + timedelta(days=1), datetime.min.time())).timestamp()
+        self.table = (np.array(starts), np.array(ends), np.array(codes, dtype=np.int8), starts, (first, last), midnight)
+
+    def _covers(self, table: tuple, low: float, high: float) -> bool:
+        covered, expires_at = table[4], table[5]
+        return covered[0] <= low and high < covered[1] and clock.time() < expires_at
+
+    def _ensure(self, low: float, high: float = None) -> tuple:
+        """Session table covering [low, high], rebuilt when it does not; callers read only the returned table"""
+        high = low if high is None else high
+        table = self.table
+        if not self._covers(table, low, high):
+            with self.lock:
+                if not self._covers(self.table, low, high):
+                    self._build(low, high)
+                table = self.table
+        return table
+
+    def session_at(self, ts: float) -> str:
+        """Session of an epoch time"""
+        _, ends, codes, start_list, _, _ = self._ensure(ts)
+        i = bisect.bisect_right(start_list, ts) - 1
+        if i >= 0 and ts < ends[i]:
+            return SESSIONS[codes[i]]
+        return 'closed'
+
+    def sessions(self, timestamps: np.ndarray) -> np.ndarray:
+        """Sessions of an array of epoch times"""
+        timestamps = np.asarray(timestamps, dtype=float)
+        finite = timestamps[np.isfinite(timestamps)]
+        if len(finite) == 0:
+            return np.full(len(timestamps), 'closed', dtype=object)
+        starts, ends, codes, _, _, _ = self._ensure(float(finite.min()), float(finite.max()))
+        if len(starts) == 0:
+            return np.full(len(timestamps), 'closed', dtype=object)
+        i = np.maximum(np.searchsorted(starts, timestamps, side='right') - 1, 0)
+        inside = (timestamps >= starts[i]) & (timestamps < ends[i])
+        return np.array(SESSIONS, dtype=object)[np.where(inside, codes[i], 0)]
+
+    def session_bounds(self, date: str, session: str) -> Optional[Tuple[float, float]]:
+        """Epoch range [start, end) of a session on a day; None on non-trading days"""
+        self._ensure(EST.localize(datetime.strptime(date, '%Y-%m-%d')).timestamp())
+        day_type = self._day_type(date)
+        if day_type is None:
+            return None
+        for name, start, end in SESSION_HOURS.get(day_type, SESSION_HOURS['WHOLE']):
+            if name == session:
+                return (
+                    EST.localize(datetime.strptime(f'{date} {start}', '%Y-%m-%d %H:%M')).timestamp(),
+                    EST.localize(datetime.strptime(f'{date} {end}', '%Y-%m-%d %H:%M')).timestamp(),
+                )
+        return None
+
+    def previous_trading_day(self, date: str = None) -> Optional[str]:
+        """Last trading day before date (today by default)"""
+        now = clock.time()
+        self._ensure(now)
+        day = datetime.strptime(date, '%Y-%m-%d').date() if date else datetime.fromtimestamp(now, EST).date()
+        for offset in range(1, WINDOW_DAYS):
+            previous = (day - timedelta(days=offset)).strftime('%Y-%m-%d')
+            if self._day_type(previous) is not None:
+                return previous
+        return None
+
+    def needs_refresh(self) -> bool:
+        """True when Redis holds no calendar fetched today"""
+        self._ensure(clock.time())
+        return self.updated != datetime.fromtimestamp(clock.time(), EST).strftime('%Y-%m-%d')
+
+    def refresh(self, quote_ctx):
+        """Fetch the trading days around today from OpenD and share them through Redis"""
+        from moomoo import RET_OK, TradeDateMarket
+        from services.redis_manager import redis_manager
+        from services.rate_limiter import rate_limiter
+        try:
+            today = datetime.fromtimestamp(clock.time(), EST).date()
+            start = (today - timedelta(days=FETCH_PAST_DAYS)).strftime('%Y-%m-%d')
+            end = (today + timedelta(days=FETCH_FUTURE_DAYS)).strftime('%Y-%m-%d')
+            if not rate_limiter.acquire('moomoo:trading_days'):
+                return False
+            ret, data = quote_ctx.request_trading_days(TradeDateMarket.US, start=start, end=end)
+            if ret != RET_OK:
+                logging.error(f"Error getting trading days: {data}")
+                return False
+            trading_days = {day['time']: day.get('trade_date_type', 'WHOLE') for day in data}
+            redis_manager.set_trading_days(trading_days, today.strftime('%Y-%m-%d'))
+            with self.lock:
+                self.table = self.table[:5] + (0.0,)
+            logging.info(f"Loaded {len(trading_days)} trading days from {start} to {end}")
+            return True
+        except Exception as e:
+            logging.error(f"Error refreshing trading calendar: {e}")
+            return False
+
+trading_calendar = TradingCalendar()
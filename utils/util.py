@@ -1,43 +1,14 @@
-import pytz
 from datetime import datetime
+from utils.clock import clock
+from utils.trading_calendar import trading_calendar, EST
 
 def get_current_session() -> str:
     """Determine current market session"""
-    est = pytz.timezone('US/Eastern')
-    now = datetime.now(est)
-    hour = now.hour
-    minute = now.minute
-    
-    if hour == 4 or (hour == 9 and minute <= 30) or (4 < hour < 9):
-        return 'premarket'
-    elif (hour == 9 and minute > 30) or (9 < hour < 16) or (hour == 16 and minute == 0):
-        return 'regular'
-    elif (16 <= hour < 20) or (hour == 20 and minute == 0):
-        return 'afterhours'
-    else:
-        return 'closed'
+    return trading_calendar.session_at(clock.time())
 
 def get_session_from_time(time):
-    est = pytz.timezone('US/Eastern')
-    time = est.localize(time)
-    hour = time.hour
-    minute = time.minute
-
-    # Check for premarket session (4:00 AM to 9:30 AM)
-    if hour == 4 or (hour == 9 and minute <= 30) or (4 < hour < 9):
-        return 'premarket'
-
-    # Check for regular session (9:30 AM to 4:00 PM)
-    elif (hour == 9 and minute > 30) or (9 < hour < 16) or (hour == 16 and minute == 0):
-        return 'regular'
-
-    # Check for afterhours session (4:00 PM to 8:00 PM)
-    elif (16 <= hour < 20) or (hour == 20 and minute == 0):
-        return 'afterhours'
-
-    # Outside of trading hours
-    else:
-        return 'closed'
+    """Session of a naive US/Eastern bar time"""
+    return trading_calendar.session_at(EST.localize(time).timestamp())
 
 def get_today_session_point_time(session_name, point, as_string=False):
     """
@@ -45,37 +16,28 @@ def get_today_session_point_time(session_name, point, as_string=False):
     session_name: 'premarket', 'regular', 'afterhours'
     point: 'open', 'close'
     """
-    est = pytz.timezone('US/Eastern')
-    today = datetime.now(est)
+    today = clock.now(EST).strftime('%Y-%m-%d')
+    bounds = trading_calendar.session_bounds(today, session_name)
     today_session_point_time = None
-    if session_name == 'premarket':
-        if point == 'open':
-            today_session_point_time = datetime(today.year, today.month, today.day, 4, 1, 0)
-        elif point == 'close':
-            today_session_point_time = datetime(today.year, today.month, today.day, 9, 30, 0)
-    elif session_name == 'regular':
-        if point == 'open':
-            today_session_point_time = datetime(today.year, today.month, today.day, 9, 31, 0)
-        elif point == 'close':
-            today_session_point_time = datetime(today.year, today.month, today.day, 16, 0, 0)
-    elif session_name == 'afterhours':
+    if bounds:
+        # Bounds are bar label ranges: the close bar is the last minute of the range. Premarket's range also
+        # holds the 04:00 label, but its first bar (04:00-04:01) is labelled 04:01
         if point == 'open':
-            today_session_point_time = datetime(today.year, today.month, today.day, 16, 1, 0)
-        elif point == 'close':
-            today_session_point_time = datetime(today.year, today.month, today.day, 20, 0, 0)
+            point_ts = bounds[0] + 60 if session_name == 'premarket' else bounds[0]
+        else:
+            point_ts = bounds[1] - 60
+        today_session_point_time = datetime.fromtimestamp(point_ts, EST).replace(tzinfo=None)
 
-    if as_string:
+    if as_string and today_session_point_time:
         return today_session_point_time.strftime('%Y-%m-%d %H:%M:%S')
     else:
         return today_session_point_time
 
 def get_current_time():
-    est = pytz.timezone('US/Eastern')
-    return datetime.now(est)
+    return clock.now(EST)
 
 def apply_offset_est(time):
-    est = pytz.timezone('US/Eastern')
-    return est.localize(time)
+    return EST.localize(time)
 
 def get_moomoo_ticker(ticker):
     return ticker if ticker.startswith('US.') else f"US.{ticker}"